@@ -1,16 +1,159 @@
 import os
+import time
 import warnings
-from celery import Celery
+from datetime import datetime
+
+from celery import Celery, Task, signals
 from celery.schedules import crontab
+from celery.utils.log import get_task_logger
+from kombu import Queue
 
 # Suppress Triton warnings about missing CUDA binaries
 warnings.filterwarnings('ignore', message='Failed to find.*', module='triton.knobs')
 
 os.environ.setdefault("DJANGO_SETTINGS_MODULE", "Careermate.settings")
 
-app = Celery("Careermate")
+logger = get_task_logger(__name__)
+
+# Times a late-acked task may be redelivered after its worker died (OOM kill,
+# segfault in a native library) before it is failed instead of run again
+CELERY_MAX_REDELIVERIES = int(os.getenv("CELERY_MAX_REDELIVERIES", "2"))
+_DELIVERY_COUNT_TTL = 24 * 3600
+
+
+class TaskRedeliveryLimitExceeded(Exception):
+    """The task's worker was lost more than CELERY_MAX_REDELIVERIES times"""
+
+
+class RedeliveryCappedTask(Task):
+    """
+    Base task class: counts the starts of late-acked tasks in Redis.
+
+    A message is only delivered again when the worker running it was lost, so
+    a second start of the same task ID and retry is a redelivery. Past the cap
+    the task fails (and its message is acked) so a message that keeps killing
+    workers can't loop forever.
+    """
+
+    def __call__(self, *args, **kwargs):
+        if self.acks_late and not self.request.is_eager:
+            self._count_delivery()
+        return super().__call__(*args, **kwargs)
+
+    def _count_delivery(self):
+        from agent_core.utils.redis_client import get_shared_redis_client
+
+        r = get_shared_redis_client()
+        if r is None or not self.request.id:
+            return
+        key = f"celery:deliveries:{self.request.id}:{self.request.retries}"
+        try:
+            deliveries = r.incr(key)
+            if deliveries == 1:
+                r.expire(key, _DELIVERY_COUNT_TTL)
+        except Exception as e:
+            logger.warning(f"⚠️ Redelivery count unavailable for {self.name}: {e}")
+            return
+        if deliveries > 1 + CELERY_MAX_REDELIVERIES:
+            raise TaskRedeliveryLimitExceeded(
+                f"{self.name}[{self.request.id}] redelivered {deliveries - 1} times after lost workers"
+            )
+        if deliveries > 1:
+            logger.warning(f"⚠️ {self.name}[{self.request.id}] redelivered ({deliveries - 1}/{CELERY_MAX_REDELIVERIES})")
+
+
+app = Celery("Careermate", task_cls=RedeliveryCappedTask)
 app.config_from_object("django.conf:settings", namespace="CELERY")
 app.autodiscover_tasks()
+# cv_analysis_agent keeps its tasks in task.py (autodiscovery only looks for tasks.py)
+app.autodiscover_tasks(["apps.cv_analysis_agent"], related_name="task")
+
+# Queues: each one is consumed by its own worker (pool, concurrency and prefetch
+# suited to the workload, see start_celery_workers.sh)
+#   ocr      - PDF/DOCX text extraction and OCR (CPU-bound, prefork)
+#   llm      - resume parsing with the LLM (I/O-bound, threads)
+#   training  - CF retrain and the snapshot refresh fan-out (CPU/memory heavy, prefork, 1 at a time)
+#   snapshots - recommendation snapshot chunks (I/O-bound embedding/Weaviate calls, prefork,
+#               several chunks in parallel)
+#   sync      - periodic sync and housekeeping (short, prefork)
+CELERY_QUEUES = ("ocr", "llm", "training", "snapshots", "sync")
+
+# queue -> (tasks, soft time limit, hard time limit); limits in seconds
+CELERY_QUEUE_TASKS = {
+    "ocr": (
+        [
+            "apps.cv_analysis_agent.task.extract_resume_text_task",
+        ],
+        int(os.getenv("CELERY_OCR_SOFT_TIME_LIMIT", "120")),
+        int(os.getenv("CELERY_OCR_TIME_LIMIT", "180")),
+    ),
+    "llm": (
+        [
+            "apps.cv_analysis_agent.task.analyze_resume_text_task",
+            "apps.cv_analysis_agent.task.analyze_ats_task",
+        ],
+        # OpenAI client: 60 s timeout x (1 + 3 retries), plus extraction for ATS tasks
+        int(os.getenv("CELERY_LLM_SOFT_TIME_LIMIT", "270")),
+        int(os.getenv("CELERY_LLM_TIME_LIMIT", "300")),
+    ),
+    "training": (
+        [
+            "apps.recommendation_agent.tasks.train_cf_model_task",
+            "apps.recommendation_agent.tasks.refresh_recommendation_snapshots_task",
+        ],
+        int(os.getenv("CELERY_TRAINING_SOFT_TIME_LIMIT", "1500")),
+        int(os.getenv("CELERY_TRAINING_TIME_LIMIT", "1800")),
+    ),
+    "snapshots": (
+        [
+            "apps.recommendation_agent.tasks.build_recommendation_snapshot_chunk_task",
+        ],
+        int(os.getenv("CELERY_SNAPSHOTS_SOFT_TIME_LIMIT", "1500")),
+        int(os.getenv("CELERY_SNAPSHOTS_TIME_LIMIT", "1800")),
+    ),
+    "sync": (
+        [
+            "apps.recommendation_agent.tasks.periodic_sync_jobs",
+            "apps.recommendation_agent.tasks.full_resync",
+            "apps.recommendation_agent.tasks.flush_feedback_stream_task",
+            "apps.cv_analysis_agent.task.purge_upload_blobs_task",
+            # Deprecated base64 entry point: stores the blob and hands over to the pipeline
+            "apps.cv_analysis_agent.task.process_resume_task",
+        ],
+        int(os.getenv("CELERY_SYNC_SOFT_TIME_LIMIT", "540")),
+        int(os.getenv("CELERY_SYNC_TIME_LIMIT", "600")),
+    ),
+}
+
+app.conf.task_queues = [Queue(name) for name in CELERY_QUEUES]
+app.conf.task_default_queue = "sync"
+app.conf.task_routes = {
+    task: {"queue": queue}
+    for queue, (tasks, _, _) in CELERY_QUEUE_TASKS.items()
+    for task in tasks
+}
+# Queues whose tasks are safe to run twice (LLM calls and syncs whose results
+# are cached or upserted): acked after the task ran, so a killed worker's task
+# is redelivered (at most CELERY_MAX_REDELIVERIES times). ocr, training and
+# snapshots tasks are acked on receipt: a document or retrain that kills its worker
+# would otherwise take down the next worker too. The broker's visibility
+# timeout (1 hour) must stay above the late-acked queues' time limits.
+CELERY_ACKS_LATE_QUEUES = ("llm", "sync")
+# Not idempotent even on a late-acked queue: a redelivery would start a second pipeline
+CELERY_ACKS_EARLY_TASKS = {
+    "apps.cv_analysis_agent.task.process_resume_task",
+}
+
+app.conf.task_annotations = {
+    task: {
+        "soft_time_limit": soft_limit,
+        "time_limit": hard_limit,
+        "acks_late": queue in CELERY_ACKS_LATE_QUEUES and task not in CELERY_ACKS_EARLY_TASKS,
+        "reject_on_worker_lost": queue in CELERY_ACKS_LATE_QUEUES and task not in CELERY_ACKS_EARLY_TASKS,
+    }
+    for queue, (tasks, soft_limit, hard_limit) in CELERY_QUEUE_TASKS.items()
+    for task in tasks
+}
 
 # Periodic tasks configuration
 app.conf.beat_schedule = {
@@ -23,7 +166,74 @@ app.conf.beat_schedule = {
         'schedule': crontab(hour=2, minute=0),  # Every day at 2:00 AM
     },
     "retrain-cf-model-every-6h": {
-        "task": "apps.recommendations.tasks.train_cf_model_task",
+        "task": "apps.recommendation_agent.tasks.train_cf_model_task",
         "schedule": 21600.0,  # 6 giờ
     },
+    "refresh-recommendation-snapshots-daily": {
+        "task": "apps.recommendation_agent.tasks.refresh_recommendation_snapshots_task",
+        "schedule": crontab(hour=3, minute=0),  # Every day at 3:00 AM (after the job resync)
+    },
+    "flush-feedback-stream": {
+        "task": "apps.recommendation_agent.tasks.flush_feedback_stream_task",
+        "schedule": float(os.getenv("FEEDBACK_FLUSH_INTERVAL", "5")),  # Write-behind feedback, seconds
+    },
+    "purge-upload-blobs-hourly": {
+        "task": "apps.cv_analysis_agent.task.purge_upload_blobs_task",
+        "schedule": 3600.0,  # Uploads left behind by failed tasks
+    },
 }
+
+
+# Per-queue metrics: wait in the queue (publish or ETA -> start) and run time
+_task_started = {}
+
+
+@signals.before_task_publish.connect
+def _stamp_publish_time(headers=None, **kwargs):
+    if headers is None:
+        return
+    published_at = time.time()
+    eta = headers.get("eta")
+    if eta:
+        try:
+            published_at = max(published_at, datetime.fromisoformat(eta).timestamp())
+        except (TypeError, ValueError):
+            pass
+    headers["published_at"] = published_at
+
+
+def _task_queue(task):
+    delivery_info = getattr(task.request, "delivery_info", None) or {}
+    return delivery_info.get("routing_key") or getattr(task, "queue", None)
+
+
+@signals.task_prerun.connect
+def _record_task_start(task_id=None, task=None, **kwargs):
+    from agent_core.utils.metrics import record_task_wait
+
+    now = time.time()
+    _task_started[task_id] = time.perf_counter()
+    published_at = getattr(task.request, "published_at", None)
+    if published_at:
+        record_task_wait(_task_queue(task), now - float(published_at))
+
+
+@signals.task_postrun.connect
+def _record_task_end(task_id=None, task=None, state=None, **kwargs):
+    from agent_core.utils.metrics import record_task_runtime
+
+    started = _task_started.pop(task_id, None)
+    if started is not None:
+        record_task_runtime(_task_queue(task), task.name, state, time.perf_counter() - started)
+
+
+@signals.worker_init.connect
+def _start_metrics_server(**kwargs):
+    """Expose this worker's metrics when CELERY_METRICS_PORT is set"""
+    port = os.getenv("CELERY_METRICS_PORT")
+    if port:
+        from prometheus_client import start_http_server
+
+        from agent_core.utils.metrics import _collect_registry
+
+        start_http_server(int(port), registry=_collect_registry())
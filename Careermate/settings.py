@@ -24,6 +24,7 @@ INSTALLED_APPS = [
     'django.contrib.messages',
     'django.contrib.staticfiles',
     'rest_framework',
+    'adrf',
     'drf_spectacular',
     'corsheaders',  # Add CORS headers support
     # Add your app
@@ -82,6 +83,7 @@ TEMPLATES = [
 ]
 
 WSGI_APPLICATION = 'Careermate.wsgi.application'
+ASGI_APPLICATION = 'Careermate.asgi.application'
 
 # Database Configuration
 # Priority: DATABASE_URL (Neon PostgreSQL) > Local PostgreSQL config
@@ -106,13 +108,6 @@ else:
         },
     }
 
-CELERY_BEAT_SCHEDULE = {
-    "retrain-cf-model-every-6h": {
-        "task": "apps.recommendations.tasks.train_cf_model_task",
-        "schedule": 21600.0,  # 6 giờ
-    },
-}
-
 
 AUTH_PASSWORD_VALIDATORS = []
 
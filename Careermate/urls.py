@@ -1,6 +1,8 @@
 from django.urls import path, include
 from drf_spectacular.views import SpectacularAPIView, SpectacularSwaggerView, SpectacularRedocView
 
+from agent_core.utils.metrics import metrics_view
+
 urlpatterns = [
     path('swagger/api/docs/schema/', SpectacularAPIView.as_view(), name='schema'),
     path('swagger/api/docs/', SpectacularSwaggerView.as_view(url_name='schema'), name='swagger-ui'),
@@ -8,4 +10,5 @@ urlpatterns = [
     path('api/v1/cv/', include('apps.cv_analysis_agent.urls')),
     path('api/v1/jobs/', include('apps.recommendation_agent.urls')),
     path('api/cv-creation/', include('apps.cv_creation_agent.urls')),
+    path('metrics', metrics_view, name='metrics'),
 ]
@@ -15,6 +15,8 @@ OPENAI_MODEL_NAME = "gpt-4o"
 google_api_key = os.getenv("GOOGLE_API_KEY")
 openai_api_key = os.getenv("OPENAI_API_KEY")
 openai_base_url = os.getenv("OPENAI_BASE_URL", "https://aiportalapi.stu-platform.live/jpe")
+# Strict JSON-schema response_format; set to false for OpenAI-compatible endpoints without structured outputs
+STRUCTURED_OUTPUT = os.getenv("OPENAI_STRUCTURED_OUTPUT", "true").lower() == "true"
 
 if not google_api_key:
     raise ValueError("❌ GOOGLE_API_KEY not found in environment variables.")
@@ -92,3 +94,24 @@ def get_openai_model(
     except Exception as e:
         logger.error(f"❌ Failed to initialize OpenAI model: {str(e)}")
         raise
+
+
+def with_json_schema(model, name: str, schema: dict):
+    """
+    Bind a strict JSON-schema response_format (OpenAI structured outputs) to a chat model.
+
+    Params:
+        model: ChatOpenAI instance
+        name: schema name sent to the API
+        schema: JSON schema (see agent_core.schemas)
+
+    Returns:
+        Runnable whose output content is JSON matching the schema,
+        or the model unchanged when STRUCTURED_OUTPUT is off
+    """
+    if not STRUCTURED_OUTPUT:
+        return model
+    return model.bind(response_format={
+        "type": "json_schema",
+        "json_schema": {"name": name, "strict": True, "schema": schema},
+    })
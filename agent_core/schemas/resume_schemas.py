@@ -1 +1,137 @@
+# agent_core/schemas/resume_schemas.py
+"""
+JSON schemas for enforcing structured output from the LLMs.
 
+RESUME_EXTRACTION_SCHEMA and ATS_ANALYSIS_SCHEMA are used with OpenAI strict
+structured outputs (see agent_core.llm.with_json_schema), so they follow its
+rules: every object lists all its properties in "required" and sets
+"additionalProperties": false. Property order is the order the model writes
+the fields in (summary first, for streaming).
+"""
+
+
+def _object(properties: dict) -> dict:
+    return {
+        "type": "object",
+        "properties": properties,
+        "required": list(properties),
+        "additionalProperties": False,
+    }
+
+
+def _strings() -> dict:
+    return {"type": "array", "items": {"type": "string"}}
+
+
+_PASS_FAIL = {"type": "string", "enum": ["PASS", "FAIL"]}
+
+# Schema for resume extraction (same fields as extract_resume_prompts.SYSTEM_PROMPT)
+RESUME_EXTRACTION_SCHEMA = _object({
+    "name": {"type": "string"},
+    "email": {"type": "string"},
+    "aboutMe": {"type": "string"},
+    "phone": {"type": "string"},
+    "title": {"type": "string"},
+    "education": {"type": "array", "items": _object({
+        "degree": {"type": "string"},
+        "institution": {"type": "string"},
+    })},
+    "experience": {"type": "array", "items": _object({
+        "title": {"type": "string"},
+        "company": {"type": "string"},
+    })},
+    "projects": {"type": "array", "items": _object({
+        "name": {"type": "string"},
+        "tech_stack": _strings(),
+    })},
+    "skills": _object({
+        "soft_skills": _strings(),
+        "technical_skills": _strings(),
+    }),
+    "certificates": _strings(),
+    "languages": {"type": "array", "items": _object({
+        "name": {"type": "string"},
+        "level": {"type": "string"},
+    })},
+})
+
+# Schema for ATS CV vs JD analysis (ai_checker_resume_service.ANALYSIS_PROMPT)
+ATS_ANALYSIS_SCHEMA = _object({
+    "summary": _object({
+        "overall_match": {"type": "integer"},
+        "overview_comment": {"type": "string"},
+        "strengths": _strings(),
+        "improvements": _strings(),
+    }),
+    "content": _object({
+        "score": {"type": "integer"},
+        "measurable_results": _strings(),
+        "grammar_issues": _strings(),
+        "tips": _strings(),
+    }),
+    "skills": _object({
+        "score": {"type": "integer"},
+        "technical": _object({"matched": _strings(), "missing": _strings()}),
+        "soft": _object({"missing": _strings()}),
+        "tips": _strings(),
+    }),
+    "format": _object({
+        "score": {"type": "integer"},
+        "checks": _object({"date_format": _PASS_FAIL, "length": _PASS_FAIL, "bullet_points": _PASS_FAIL}),
+        "tips": _strings(),
+    }),
+    "sections": _object({
+        "score": {"type": "integer"},
+        "missing": _strings(),
+        "tips": _strings(),
+    }),
+    "style": _object({
+        "score": {"type": "integer"},
+        "tone": _strings(),
+        "buzzwords": _strings(),
+        "tips": _strings(),
+    }),
+    "recommendations": _object({"items": _strings()}),
+    "overall_score": {"type": "integer"},
+    "overall_comment": {"type": "string"},
+})
+
+# Model part of the ATS analysis when format, sections and technical skills are
+# computed locally (apps/cv_analysis_agent/services/ats_local_checks.py)
+ATS_SUBJECTIVE_SCHEMA = _object({
+    "summary": ATS_ANALYSIS_SCHEMA["properties"]["summary"],
+    "content": ATS_ANALYSIS_SCHEMA["properties"]["content"],
+    "skills": _object({
+        "soft": _object({"missing": _strings()}),
+        "tips": _strings(),
+    }),
+    "style": ATS_ANALYSIS_SCHEMA["properties"]["style"],
+    "recommendations": ATS_ANALYSIS_SCHEMA["properties"]["recommendations"],
+    "overall_comment": {"type": "string"},
+})
+
+# Schema for feedback generation
+FEEDBACK_SCHEMA = {
+    "type": "object",
+    "properties": {
+        "strength": {
+            "type": "string",
+            "description": "2-3 key strengths in the resume"
+        },
+        "weakness": {
+            "type": "string",
+            "description": "2-3 areas to improve"
+        },
+        "suggest": {
+            "type": "string",
+            "description": "Top 3 actionable suggestions"
+        },
+        "overall_score": {
+            "type": "integer",
+            "description": "Score from 0-100 based on experience (30%), skills (25%), projects (20%), education (15%), completeness (10%)",
+            "minimum": 0,
+            "maximum": 100
+        }
+    },
+    "required": ["strength", "weakness", "suggest", "overall_score"]
+}
@@ -0,0 +1,189 @@
+# agent_core/utils/metrics.py
+"""
+Prometheus metrics for the recommendation pipeline.
+
+Stages are timed with `stage_timer` (usable in sync and async code) and
+aggregated into one histogram labelled by stage. Under gunicorn set
+PROMETHEUS_MULTIPROC_DIR so /metrics aggregates every worker process.
+
+Celery tasks report their queue wait and run time per queue (signal handlers
+in Careermate/celery_app.py); queue depth is read from the broker at scrape time.
+"""
+import logging
+import os
+import time
+from contextlib import contextmanager
+
+from django.http import HttpResponse
+from prometheus_client import (
+    CONTENT_TYPE_LATEST,
+    REGISTRY,
+    CollectorRegistry,
+    Counter,
+    Histogram,
+    generate_latest,
+)
+from prometheus_client.core import GaugeMetricFamily
+
+logger = logging.getLogger(__name__)
+
+# Remote calls dominate (embedding ~100ms-1s); CF/formatting are sub-10ms
+_STAGE_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+STAGE_LATENCY = Histogram(
+    "recommendation_stage_duration_seconds",
+    "Latency of each recommendation pipeline stage",
+    ["stage"],
+    buckets=_STAGE_BUCKETS,
+)
+
+CACHE_EVENTS = Counter(
+    "recommendation_cache_events_total",
+    "Cache lookups by cache and result (hit/miss)",
+    ["cache", "result"],
+)
+
+CACHE_BYTES = Counter(
+    "cache_bytes_total",
+    "Bytes read from (hits) and written to caches",
+    ["cache", "op"],
+)
+
+SINGLE_FLIGHT_EVENTS = Counter(
+    "single_flight_events_total",
+    "Coalesced calls by name and role (leader computed, follower shared, timeout/fallback computed anyway)",
+    ["name", "role"],
+)
+
+CANDIDATE_JOBS = Counter(
+    "recommendation_candidate_jobs_total",
+    "Jobs fetched as candidates and jobs filtered out, per recommender",
+    ["source", "outcome"],
+)
+
+
+@contextmanager
+def stage_timer(stage: str):
+    """Observe the wall time of the enclosed block under `stage`"""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        STAGE_LATENCY.labels(stage=stage).observe(time.perf_counter() - start)
+
+
+# Celery tasks: LLM calls take seconds, OCR and CF retrains up to many minutes
+_TASK_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0, 1800.0)
+
+CELERY_QUEUE_WAIT = Histogram(
+    "celery_task_queue_wait_seconds",
+    "Time between publishing a task (or its ETA) and a worker starting it, per queue",
+    ["queue"],
+    buckets=_TASK_BUCKETS,
+)
+
+CELERY_TASK_RUNTIME = Histogram(
+    "celery_task_runtime_seconds",
+    "Task execution time per queue, task and final state",
+    ["queue", "task", "state"],
+    buckets=_TASK_BUCKETS,
+)
+
+
+def record_cache(cache: str, hit: bool, count: int = 1):
+    if count:
+        CACHE_EVENTS.labels(cache=cache, result="hit" if hit else "miss").inc(count)
+
+
+def record_cache_bytes(cache: str, op: str, size: int):
+    if size:
+        CACHE_BYTES.labels(cache=cache, op=op).inc(size)
+
+
+def record_single_flight(name: str, role: str):
+    SINGLE_FLIGHT_EVENTS.labels(name=name, role=role).inc()
+
+
+def record_candidates(source: str, fetched: int, filtered: int = 0):
+    """Count jobs retrieved by a recommender and how many were dropped"""
+    CANDIDATE_JOBS.labels(source=source, outcome="fetched").inc(fetched)
+    if filtered:
+        CANDIDATE_JOBS.labels(source=source, outcome="filtered").inc(filtered)
+
+
+def record_task_wait(queue: str, seconds: float):
+    CELERY_QUEUE_WAIT.labels(queue=queue or "unknown").observe(max(seconds, 0.0))
+
+
+def record_task_runtime(queue: str, task: str, state: str, seconds: float):
+    CELERY_TASK_RUNTIME.labels(queue=queue or "unknown", task=task, state=state or "UNKNOWN").observe(seconds)
+
+
+# kombu's Redis transport keeps one list per priority step: "<queue>", "<queue>\x06\x163", ...
+_REDIS_PRIORITY_STEPS = (0, 3, 6, 9)
+_REDIS_PRIORITY_SEP = "\x06\x16"
+
+
+class CeleryQueueDepthCollector:
+    """Messages waiting in each Celery queue, read from the Redis broker on every scrape"""
+
+    def __init__(self):
+        self._client = None
+
+    def _redis(self):
+        if self._client is None:
+            import redis
+            from django.conf import settings
+
+            self._client = redis.Redis.from_url(settings.CELERY_BROKER_URL, socket_timeout=1, socket_connect_timeout=1)
+        return self._client
+
+    @staticmethod
+    def _gauge():
+        return GaugeMetricFamily("celery_queue_depth", "Messages waiting in the broker queue", labels=["queue"])
+
+    def describe(self):
+        # Lets the registry learn the metric name without querying the broker
+        yield self._gauge()
+
+    def collect(self):
+        from celery import current_app
+
+        gauge = self._gauge()
+        try:
+            queues = [queue.name for queue in current_app.conf.task_queues or ()]
+            client = self._redis()
+            pipe = client.pipeline(transaction=False)
+            for name in queues:
+                for step in _REDIS_PRIORITY_STEPS:
+                    pipe.llen(name if step == 0 else f"{name}{_REDIS_PRIORITY_SEP}{step}")
+            lengths = pipe.execute()
+            steps = len(_REDIS_PRIORITY_STEPS)
+            for i, name in enumerate(queues):
+                gauge.add_metric([name], sum(lengths[i * steps:(i + 1) * steps]))
+        except Exception as e:
+            logger.warning(f"Celery queue depth unavailable: {e}")
+        yield gauge
+
+
+_queue_depth_collector = CeleryQueueDepthCollector()
+
+
+def _collect_registry():
+    if os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+        from prometheus_client import multiprocess
+
+        registry = CollectorRegistry()
+        multiprocess.MultiProcessCollector(registry)
+        registry.register(_queue_depth_collector)
+        return registry
+    return REGISTRY
+
+
+if not os.getenv("PROMETHEUS_MULTIPROC_DIR"):
+    REGISTRY.register(_queue_depth_collector)
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint"""
+    return HttpResponse(generate_latest(_collect_registry()), content_type=CONTENT_TYPE_LATEST)
@@ -0,0 +1,135 @@
+# agent_core/utils/redis_client.py
+"""
+Shared Redis connection helpers.
+
+The sync client is cached per process; the asyncio client is cached per event
+loop so that ASGI workers reuse one connection pool for the lifetime of the
+worker instead of reconnecting on every request.
+"""
+import asyncio
+import logging
+import os
+import time
+import weakref
+
+try:
+    import redis  # type: ignore
+    import redis.asyncio as aioredis  # type: ignore
+except Exception:  # pragma: no cover
+    redis = None  # Fallback if redis not installed at runtime
+    aioredis = None
+
+logger = logging.getLogger(__name__)
+
+_sync_clients = {}
+_async_clients = weakref.WeakKeyDictionary()
+
+# Don't retry an unreachable Redis on every call
+RECONNECT_BACKOFF_SECONDS = 30
+_last_failure = None
+
+
+def get_redis_url() -> str:
+    """Get Redis URL, prioritizing REDIS_URL for production."""
+    redis_url = os.getenv("REDIS_URL")
+    if redis_url:
+        return redis_url
+
+    # Fallback to constructing URL from individual vars (local dev)
+    host = os.getenv("REDIS_HOST", "localhost")
+    port = os.getenv("REDIS_PORT", "6379")
+    db = os.getenv("REDIS_DB", "0")
+    password = os.getenv("REDIS_PASSWORD", "")
+
+    if password:
+        return f"redis://:{password}@{host}:{port}/{db}"
+    return f"redis://{host}:{port}/{db}"
+
+
+def get_shared_redis_client(decode_responses: bool = True):
+    """
+    Get the process-wide Redis client (connection pool is reused).
+
+    Returns:
+        redis.Redis or None if Redis is not installed or unreachable
+    """
+    global _last_failure
+    if redis is None:
+        return None
+
+    client = _sync_clients.get(decode_responses)
+    if client is not None:
+        return client
+
+    if _last_failure is not None and time.monotonic() - _last_failure < RECONNECT_BACKOFF_SECONDS:
+        return None
+
+    try:
+        client = redis.Redis.from_url(
+            get_redis_url(),
+            decode_responses=decode_responses,
+            socket_connect_timeout=5,
+        )
+        client.ping()
+    except Exception as e:
+        logger.warning(f"Redis client error: {e}")
+        _last_failure = time.monotonic()
+        return None
+
+    _sync_clients[decode_responses] = client
+    return client
+
+
+async def get_async_redis_client(decode_responses: bool = True):
+    """
+    Get the asyncio Redis client bound to the running event loop.
+
+    One client (and connection pool) is kept per loop; under uvicorn workers
+    that is one per worker process. Like the sync client it is checked with a
+    PING when created, and an unreachable Redis is not retried for
+    RECONNECT_BACKOFF_SECONDS.
+
+    Returns:
+        redis.asyncio.Redis or None if Redis is not installed or unreachable
+    """
+    global _last_failure
+    if aioredis is None:
+        return None
+
+    loop = asyncio.get_running_loop()
+    clients = _async_clients.setdefault(loop, {})
+    client = clients.get(decode_responses)
+    if client is not None:
+        return client
+
+    if _last_failure is not None and time.monotonic() - _last_failure < RECONNECT_BACKOFF_SECONDS:
+        return None
+
+    client = aioredis.Redis.from_url(
+        get_redis_url(),
+        decode_responses=decode_responses,
+        socket_connect_timeout=5,
+    )
+    try:
+        await client.ping()
+    except Exception as e:
+        logger.warning(f"Redis client error: {e}")
+        _last_failure = time.monotonic()
+        await client.aclose()
+        return None
+
+    # Another task on this loop may have connected meanwhile: keep one pool
+    existing = clients.setdefault(decode_responses, client)
+    if existing is not client:
+        await client.aclose()
+    return existing
+
+
+async def close_async_redis_clients():
+    """Close the running loop's asyncio clients (the loop is about to be discarded)"""
+    clients = _async_clients.pop(asyncio.get_running_loop(), {})
+    for client in clients.values():
+        try:
+            await client.aclose()
+        except Exception as e:
+            logger.warning(f"Redis client close error: {e}")
@@ -0,0 +1,229 @@
+# agent_core/utils/single_flight.py
+"""
+Single-flight coalescing of identical expensive calls (LLM requests) across
+processes and replicas.
+
+The first caller for a key takes a Redis lock and computes; concurrent callers
+with the same key subscribe to the key's pub/sub channel and wait. When the
+leader finishes it stores the JSON result in a short-lived result slot and
+publishes a notification, so every follower returns the same result after a
+single upstream call. Followers also poll the slot, which covers lost
+notifications, and take over when the leader fails (lock released) or dies
+(lock expires after SINGLE_FLIGHT_LOCK_TTL). A result the caller marks as not
+shareable (e.g. an error placeholder) is treated like a failure: it is
+returned to the leader only and a follower computes again.
+
+single_flight_stream does the same for a generator (a streamed LLM answer):
+the leader's events are passed through as they come, followers replay the
+published result.
+
+Without Redis every caller simply computes.
+"""
+import json
+import logging
+import os
+import time
+import uuid
+from typing import Any, Callable, Generator, Iterable, Optional, Tuple
+
+from agent_core.utils.metrics import record_single_flight
+from agent_core.utils.redis_client import get_shared_redis_client
+
+logger = logging.getLogger(__name__)
+
+# Longest a leader may hold the lock (the llm queue hard time limit)
+SINGLE_FLIGHT_LOCK_TTL = int(os.getenv("SINGLE_FLIGHT_LOCK_TTL", "300"))
+# Longest a follower waits before computing on its own
+SINGLE_FLIGHT_WAIT_TIMEOUT = float(os.getenv("SINGLE_FLIGHT_WAIT_TIMEOUT", "300"))
+# How long a finished result stays readable for late followers
+SINGLE_FLIGHT_RESULT_TTL = int(os.getenv("SINGLE_FLIGHT_RESULT_TTL", "60"))
+SINGLE_FLIGHT_POLL_SECONDS = float(os.getenv("SINGLE_FLIGHT_POLL_SECONDS", "0.5"))
+
+_LEAD = object()
+
+
+def _release(r, lock_key: str, token: str):
+    """Delete the lock only if this caller still owns it"""
+    from redis.exceptions import WatchError
+
+    with r.pipeline() as pipe:
+        try:
+            pipe.watch(lock_key)
+            if pipe.get(lock_key) == token:
+                pipe.multi()
+                pipe.delete(lock_key)
+                pipe.execute()
+            else:
+                pipe.unwatch()
+        except WatchError:
+            pass
+
+
+def _fail(r, name: str, base: str, token: str):
+    """Leader without a result to share: followers retry the lock and one of them takes over"""
+    try:
+        _release(r, f"{base}:lock", token)
+        r.publish(base, "failed")
+    except Exception as e:
+        logger.warning(f"Single-flight {name} release failed: {e}")
+
+
+def _publish(r, name: str, base: str, token: str, result):
+    """Leader done: store the result for followers, then wake them"""
+    try:
+        r.set(f"{base}:result", json.dumps(result, ensure_ascii=False), ex=SINGLE_FLIGHT_RESULT_TTL)
+        _release(r, f"{base}:lock", token)
+        r.publish(base, "done")
+    except Exception as e:
+        logger.warning(f"Single-flight {name} publish failed: {e}")
+
+
+def _wait_or_lead(r, base: str, token: str, wait_timeout: float):
+    """
+    Returns:
+        _LEAD when this caller holds the lock, the shared result (decoded JSON),
+        or None when the wait timed out
+    """
+    result_key, lock_key = f"{base}:result", f"{base}:lock"
+    deadline = time.monotonic() + wait_timeout
+    pubsub = None
+    try:
+        while True:
+            raw = r.get(result_key)
+            if raw is not None:
+                return json.loads(raw)
+            if r.set(lock_key, token, nx=True, ex=SINGLE_FLIGHT_LOCK_TTL):
+                return _LEAD
+            if pubsub is None:
+                # Subscribe, then check the slot again so a result published in between is not missed
+                pubsub = r.pubsub(ignore_subscribe_messages=True)
+                pubsub.subscribe(base)
+                continue
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return None
+            # Woken by "done"/"failed", otherwise re-check after the poll interval
+            pubsub.get_message(timeout=min(SINGLE_FLIGHT_POLL_SECONDS, remaining))
+    finally:
+        if pubsub is not None:
+            try:
+                pubsub.close()
+            except Exception:
+                pass
+
+
+def single_flight(
+    name: str,
+    key: str,
+    compute: Callable[[], Any],
+    wait_timeout: Optional[float] = None,
+    shareable: Optional[Callable[[Any], bool]] = None,
+) -> Tuple[Any, bool]:
+    """
+    Run `compute` once for all concurrent callers with the same name and key
+
+    Args:
+        name: call family, used for the Redis keys and metrics
+        key: identity of the request (e.g. a cache key or prompt hash)
+        compute: produces a JSON-serializable result
+        wait_timeout: seconds a follower waits before computing itself
+        shareable: returns False for results followers must not receive
+
+    Returns:
+        tuple: (result, shared) - shared is True when another caller computed it
+    """
+    r = get_shared_redis_client()
+    if r is None:
+        record_single_flight(name, "fallback")
+        return compute(), False
+
+    base = f"singleflight:{name}:{key}"
+    token = uuid.uuid4().hex
+    try:
+        outcome = _wait_or_lead(r, base, token, SINGLE_FLIGHT_WAIT_TIMEOUT if wait_timeout is None else wait_timeout)
+    except Exception as e:
+        logger.warning(f"Single-flight {name} unavailable, computing directly: {e}")
+        record_single_flight(name, "fallback")
+        return compute(), False
+
+    if outcome is None:
+        logger.warning(f"Single-flight {name}: timed out waiting for {key}, computing directly")
+        record_single_flight(name, "timeout")
+        return compute(), False
+    if outcome is not _LEAD:
+        record_single_flight(name, "follower")
+        return outcome, True
+
+    record_single_flight(name, "leader")
+    try:
+        result = compute()
+    except Exception:
+        _fail(r, name, base, token)
+        raise
+
+    if shareable is not None and not shareable(result):
+        _fail(r, name, base, token)
+        return result, False
+
+    _publish(r, name, base, token, result)
+    return result, False
+
+
+def single_flight_stream(
+    name: str,
+    key: str,
+    produce: Callable[[], Generator[Any, None, Any]],
+    replay: Callable[[Any], Iterable],
+    wait_timeout: Optional[float] = None,
+    shareable: Optional[Callable[[Any], bool]] = None,
+):
+    """
+    Streaming single_flight: same keys as single_flight, so streamed and
+    plain callers of one name coalesce with each other
+
+    Args:
+        produce: generator yielding events and returning the final result
+                 (None when there is nothing to share, e.g. the stream failed)
+        replay: events for a result computed by another caller
+
+    Yields:
+        the leader's events as produced, or replay(result) for followers
+    """
+    r = get_shared_redis_client()
+    if r is None:
+        record_single_flight(name, "fallback")
+        yield from produce()
+        return
+
+    base = f"singleflight:{name}:{key}"
+    token = uuid.uuid4().hex
+    try:
+        outcome = _wait_or_lead(r, base, token, SINGLE_FLIGHT_WAIT_TIMEOUT if wait_timeout is None else wait_timeout)
+    except Exception as e:
+        logger.warning(f"Single-flight {name} unavailable, computing directly: {e}")
+        record_single_flight(name, "fallback")
+        yield from produce()
+        return
+
+    if outcome is None:
+        logger.warning(f"Single-flight {name}: timed out waiting for {key}, computing directly")
+        record_single_flight(name, "timeout")
+        yield from produce()
+        return
+    if outcome is not _LEAD:
+        record_single_flight(name, "follower")
+        yield from replay(outcome)
+        return
+
+    record_single_flight(name, "leader")
+    try:
+        result = yield from produce()
+    except BaseException:
+        # Includes GeneratorExit: the client went away mid-stream
+        _fail(r, name, base, token)
+        raise
+
+    if result is None or (shareable is not None and not shareable(result)):
+        _fail(r, name, base, token)
+        return
+    _publish(r, name, base, token, result)
@@ -0,0 +1,73 @@
+# agent_core/utils/testing.py
+"""
+Shared helpers for the apps' test suites.
+
+UnmanagedTablesMixin creates the tables of an app's managed = False models
+(owned by the Spring Boot backend, so the test runner never creates them) for
+the duration of a test class. FakeRedisMixin points the shared Redis helpers
+at a fresh in-memory fakeredis server for every test.
+"""
+from types import SimpleNamespace
+from unittest import mock
+
+from django.apps import apps
+from django.db import connection
+
+from agent_core.utils import redis_client
+
+
+class UnmanagedTablesMixin:
+    """Create the app's unmanaged tables around the test class"""
+
+    unmanaged_app_label = "recommendation_agent"
+
+    @classmethod
+    def _unmanaged_models(cls):
+        return [m for m in apps.get_app_config(cls.unmanaged_app_label).get_models() if not m._meta.managed]
+
+    @classmethod
+    def setUpClass(cls):
+        # Outside the class-level atomic block: SQLite can't alter the schema inside it
+        with connection.schema_editor() as editor:
+            for model in cls._unmanaged_models():
+                editor.create_model(model)
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        with connection.schema_editor() as editor:
+            for model in reversed(cls._unmanaged_models()):
+                editor.delete_model(model)
+
+
+class FakeRedisMixin:
+    """Serve get_shared_redis_client / get_async_redis_client from fakeredis"""
+
+    def setUp(self):
+        import fakeredis
+
+        super().setUp()
+        server = fakeredis.FakeServer()
+        self.redis = fakeredis.FakeRedis(server=server, decode_responses=True)
+
+        def sync_client(url, **kwargs):
+            return fakeredis.FakeRedis(server=server, decode_responses=kwargs.get("decode_responses", False))
+
+        def async_client(url, **kwargs):
+            return fakeredis.aioredis.FakeRedis(server=server, decode_responses=kwargs.get("decode_responses", False))
+
+        for patcher in (
+            mock.patch.object(redis_client, "redis", SimpleNamespace(Redis=SimpleNamespace(from_url=sync_client))),
+            mock.patch.object(redis_client, "aioredis", SimpleNamespace(Redis=SimpleNamespace(from_url=async_client))),
+            mock.patch.object(redis_client, "_last_failure", None),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self._clear_redis_clients()
+        self.addCleanup(self._clear_redis_clients)
+
+    @staticmethod
+    def _clear_redis_clients():
+        redis_client._sync_clients.clear()
+        redis_client._async_clients.clear()
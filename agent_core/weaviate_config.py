@@ -48,3 +48,37 @@ class WeaviateClientManager:
             print("🧹 Closing Weaviate client connection...")
             self._client.close()
             self._client = None
+
+
+class AsyncWeaviateClientManager(WeaviateClientManager):
+    """Quản lý WeaviateAsyncClient, dùng chung một client cho mỗi event loop (ASGI worker)."""
+    _client: Optional[weaviate.WeaviateAsyncClient] = None
+
+    async def connect(self):
+        """Khởi tạo và kết nối async client nếu chưa tồn tại."""
+        if not self.url or not self.api_key:
+            raise ValueError("Cannot connect to Weaviate: Missing WEAVIATE_URL or WEAVIATE_API_KEY in environment variables.")
+
+        if self._client is None:
+            print("🔗 Creating new async Weaviate client connection...")
+            self._client = weaviate.use_async_with_weaviate_cloud(
+                cluster_url=self.url,
+                auth_credentials=Auth.api_key(self.api_key),
+                additional_config=weaviate.classes.init.AdditionalConfig(
+                    timeout=Timeout(init=30, query=60, insert=120)
+                )
+            )
+        if not self._client.is_connected():
+            await self._client.connect()
+        return self._client
+
+    async def get_client(self):
+        """Lấy async client hiện tại (tự động connect nếu cần)."""
+        return await self.connect()
+
+    async def close(self):
+        """Đóng async client khi không còn dùng."""
+        if self._client is not None:
+            print("🧹 Closing async Weaviate client connection...")
+            await self._client.close()
+            self._client = None
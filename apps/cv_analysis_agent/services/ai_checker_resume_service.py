@@ -3,8 +3,22 @@ import json
 import hashlib
 import time
 import logging
-from agent_core.llm import get_openai_model
+from agent_core.llm import STRUCTURED_OUTPUT, get_openai_model, with_json_schema
+from agent_core.schemas import ATS_ANALYSIS_SCHEMA, ATS_SUBJECTIVE_SCHEMA
+from agent_core.utils.single_flight import single_flight, single_flight_stream
 from . import clean_json_output, extract_text
+from .ats_local_checks import LOCAL_CHECKS_VERSION, findings_summary, run_local_checks
+from .clean_json_output import parse_structured_output
+from .stream_json import JSONSectionParser
+from ..utils.extraction_cache import file_sha256
+from ..utils.result_cache import TieredCache
+from ..utils.text_fingerprint import (
+    SimHashIndex,
+    canonical_key_text,
+    normalize_text,
+    scope_hash,
+    simhash64,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -45,69 +59,16 @@ RECOMMENDATION_HEADER = {
 CACHE_DIR = os.path.join(os.path.dirname(__file__), "../../../.cache/ai_cv_analysis")
 CACHE_TTL_SECONDS = int(os.getenv("AI_CV_ANALYSIS_CACHE_TTL", "604800"))  # 7 days default
 CACHE_VERSION = os.getenv("AI_CV_ANALYSIS_CACHE_VERSION", "v1")
+CACHE_MEMORY_ITEMS = int(os.getenv("AI_CV_ANALYSIS_CACHE_MEMORY_ITEMS", "256"))  # per process
+CACHE_FILE_MAX_BYTES = int(os.getenv("AI_CV_ANALYSIS_CACHE_FILE_MAX_BYTES", str(64 * 1024 * 1024)))  # 0 = no file tier
+# Characters of CV / JD text sent to the model; the CV is only extracted that far
+CV_SUMMARY_CHARS = 2000
+JD_SUMMARY_CHARS = 1500
+# Reuse the analysis of a near-identical CV + JD pair (SimHash similarity of both >= threshold)
+NEAR_DUPLICATE_ENABLED = os.getenv("AI_CV_ANALYSIS_NEAR_DUPLICATE", "false").lower() == "true"
+NEAR_DUPLICATE_THRESHOLD = float(os.getenv("AI_CV_ANALYSIS_NEAR_DUPLICATE_THRESHOLD", "0.95"))
 
-
-def _ensure_cache_dir():
-    os.makedirs(os.path.abspath(CACHE_DIR), exist_ok=True)
-
-
-def _cache_path(key: str) -> str:
-    _ensure_cache_dir()
-    return os.path.abspath(os.path.join(CACHE_DIR, f"{key}.json"))
-
-
-def _cache_get(key: str):
-    try:
-        path = _cache_path(key)
-        if not os.path.exists(path):
-            return None
-        # TTL check
-        if CACHE_TTL_SECONDS > 0:
-            mtime = os.path.getmtime(path)
-            if time.time() - mtime > CACHE_TTL_SECONDS:
-                return None
-        with open(path, "r", encoding="utf-8") as f:
-            data = json.load(f)
-        # mark cache hit
-        if isinstance(data, dict):
-            data.setdefault("cache", {})
-            data["cache"].update({"hit": True, "key": key, "age_seconds": int(time.time() - os.path.getmtime(path))})
-        return data
-    except Exception:
-        return None
-
-
-def _cache_set(key: str, result: dict):
-    path = _cache_path(key)
-    tmp = path + ".tmp"
-    # include cache metadata
-    to_write = dict(result)
-    to_write.setdefault("cache", {})
-    to_write["cache"].update({"hit": False, "key": key, "stored_at": int(time.time())})
-    with open(tmp, "w", encoding="utf-8") as f:
-        json.dump(to_write, f, ensure_ascii=False)
-    os.replace(tmp, path)
-
-
-def try_get_cached_result(cv_file, job_description: str):
-    """
-    Try to get cached result without calling AI API.
-    Returns cached result if found, None otherwise.
-    """
-    try:
-        # Extract and normalize CV text
-        cv_text = extract_text.extract_text(cv_file)
-        cv_summary = cv_text[:2000]
-        jd_summary = job_description[:1500]
-
-        # Build same cache key as analyze_cv_vs_jd
-        model_config = {
-            "model": os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
-            "temperature": 0.5,
-            "top_p": 0.9,
-        }
-
-        prompt = f"""Analyze CV vs Job. Score 0-100. Return ONLY valid JSON.
+ANALYSIS_PROMPT = """Analyze CV vs Job. Score 0-100. Return ONLY valid JSON.
 
 {{
   "summary": {{"overall_match": <int>, "overview_comment": "<text>", "strengths": ["item1", "item2", "item3"], "improvements": ["item1", "item2", "item3"]}},
@@ -129,46 +90,17 @@ JOB DESCRIPTION:
 
 Analyze and return complete JSON:"""
 
-        key_basis = json.dumps({
-            "version": CACHE_VERSION,
-            "prompt": prompt,
-            "config": model_config,
-        }, ensure_ascii=False)
-        key = hashlib.sha256(key_basis.encode("utf-8")).hexdigest()
-
-        # Try to get from cache
-        return _cache_get(key)
-    except Exception as e:
-        print(f"⚠️ Cache check error: {e}")
-        return None
-
-
-def analyze_cv_vs_jd(cv_file, job_description: str, force_refresh: bool = False):
-    """
-    AI-powered CV + JD analysis (Cake.me style)
-    Returns structured JSON with sections:
-    summary, content, skills, format, sections, style, recommendations, overall_score
-    """
-
-    # 1️⃣ Extract and normalize CV text
-    cv_text = extract_text.extract_text(cv_file)
-
-    # 2️⃣ Tóm tắt CV và JD để giảm token
-    cv_summary = cv_text[:2000]
-    jd_summary = job_description[:1500]
-
-    # 3️⃣ Build the analysis prompt - Tối ưu cho OpenAI
-    prompt = f"""Analyze CV vs Job. Score 0-100. Return ONLY valid JSON.
+# Format, sections and technical skills come from ats_local_checks; the model only
+# gives the subjective feedback. ANALYSIS_PROMPT is kept for CVs without a text layer.
+SUBJECTIVE_ANALYSIS_PROMPT = """Review CV vs Job. Score 0-100. Return ONLY valid JSON.
+Already checked (don't repeat): {local_findings}
 
 {{
   "summary": {{"overall_match": <int>, "overview_comment": "<text>", "strengths": ["item1", "item2", "item3"], "improvements": ["item1", "item2", "item3"]}},
   "content": {{"score": <int>, "measurable_results": ["item1", "item2"], "grammar_issues": ["item1", "item2"], "tips": ["item1", "item2"]}},
-  "skills": {{"score": <int>, "technical": {{"matched": ["skill1", "skill2", "skill3"], "missing": ["skill1", "skill2", "skill3"]}}, "soft": {{"missing": ["skill1", "skill2"]}}, "tips": ["item1", "item2"]}},
-  "format": {{"score": <int>, "checks": {{"date_format": "PASS|FAIL", "length": "PASS|FAIL", "bullet_points": "PASS|FAIL"}}, "tips": ["item1", "item2"]}},
-  "sections": {{"score": <int>, "missing": ["section1", "section2"], "tips": ["item1", "item2"]}},
+  "skills": {{"soft": {{"missing": ["skill1", "skill2"]}}, "tips": ["item1", "item2"]}},
   "style": {{"score": <int>, "tone": ["issue1", "issue2"], "buzzwords": ["word1", "word2"], "tips": ["item1", "item2"]}},
   "recommendations": {{"items": ["rec1", "rec2", "rec3"]}},
-  "overall_score": <int>,
   "overall_comment": "<text max 50 words>"
 }}
 
@@ -180,36 +112,297 @@ JOB DESCRIPTION:
 
 Analyze and return complete JSON:"""
 
-    # 3.5️⃣ Cache key by full prompt hash + config (prompt caching)
-    # Include cache version, model/config to avoid stale collisions after changes
-    model_config = {
+
+# In-process LRU -> Redis (shared by all replicas) -> size-capped local files
+_result_cache = TieredCache(
+    "ai_cv_analysis",
+    ttl=CACHE_TTL_SECONDS,
+    memory_items=CACHE_MEMORY_ITEMS,
+    file_dir=CACHE_DIR,
+    file_max_bytes=CACHE_FILE_MAX_BYTES,
+)
+
+
+_near_duplicates = SimHashIndex("ai_cv_analysis", ttl=CACHE_TTL_SECONDS)
+
+# SHA-256 of the uploaded file + JD -> analysis cache key, so the API can answer
+# a re-upload without extracting the text (memory LRU -> Redis)
+_file_index = TieredCache("ai_cv_analysis_file", ttl=CACHE_TTL_SECONDS, memory_items=CACHE_MEMORY_ITEMS)
+
+
+def _model_config() -> dict:
+    return {
         "model": os.getenv("OPENAI_MODEL", "gpt-4o-mini"),
         "temperature": 0.5,
         "top_p": 0.9,
     }
+
+
+def _summarize(cv_text: str, job_description: str):
+    """CV and JD text sent to the model (JD whitespace normalized before truncation)"""
+    return cv_text[:CV_SUMMARY_CHARS], normalize_text(job_description)[:JD_SUMMARY_CHARS]
+
+
+def _analysis_model(model_config: dict, schema: dict):
+    """OpenAI model constrained to the response schema"""
+    model = get_openai_model(temperature=model_config["temperature"], top_p=model_config["top_p"])
+    return with_json_schema(model, "ats_analysis", schema)
+
+
+def _parse_analysis(raw_text: str, schema: dict) -> dict:
+    """Schema-enforced output takes one orjson pass; JSON recovery only when that fails or is off"""
+    if STRUCTURED_OUTPUT:
+        try:
+            return parse_structured_output(raw_text, schema["required"])
+        except ValueError as e:
+            # e.g. output cut at max_tokens or a refusal
+            logger.warning(f"⚠️ Structured output invalid ({e}), falling back to JSON recovery")
+    return clean_json_output.clean_json_output(raw_text)
+
+
+def _cache_scope(model_config: dict) -> str:
+    # Cache version, prompt template and model/config: results are only shared within one scope
+    return scope_hash(
+        CACHE_VERSION,
+        ANALYSIS_PROMPT,
+        SUBJECTIVE_ANALYSIS_PROMPT,
+        LOCAL_CHECKS_VERSION,
+        json.dumps(model_config, sort_keys=True),
+    )
+
+
+def _layer_hash(layer):
+    """
+    Hash of the whole text layer the local checks read: two CVs sharing the
+    first CV_SUMMARY_CHARS can still differ in length, dates or sections
+
+    Returns:
+        str or None: None for a scanned PDF (no local checks, the prompt is all that matters)
+    """
+    if layer is None:
+        return None
+    return hashlib.sha256(json.dumps([layer["pages"], layer["lines"]], ensure_ascii=False).encode("utf-8")).hexdigest()
+
+
+def _cache_key(cv_summary: str, jd_summary: str, model_config: dict, layer_hash: str = None) -> str:
+    """Hash of the canonical CV / JD text, so whitespace and case variants share one entry"""
     key_basis = json.dumps({
-        "version": CACHE_VERSION,
-        "prompt": prompt,
-        "config": model_config,
+        "scope": _cache_scope(model_config),
+        "cv": canonical_key_text(cv_summary),
+        "jd": canonical_key_text(jd_summary),
+        "layer": layer_hash,
     }, ensure_ascii=False)
-    key = hashlib.sha256(key_basis.encode("utf-8")).hexdigest()
+    return hashlib.sha256(key_basis.encode("utf-8")).hexdigest()
+
+
+def _lookup_cached(cv_summary: str, jd_summary: str, model_config: dict, layer_hash: str = None):
+    """
+    Exact cache lookup, then (when enabled) near-duplicate lookup
+
+    Returns:
+        tuple: (cache key, cached result or None)
+    """
+    key = _cache_key(cv_summary, jd_summary, model_config, layer_hash)
+    cached = _cache_get(key)
+    if cached:
+        cached["cache"]["match"] = "exact"
+        return key, cached
+
+    if NEAR_DUPLICATE_ENABLED:
+        cv_hash, jd_hash = simhash64(cv_summary), simhash64(jd_summary)
+        if cv_hash is not None and jd_hash is not None:
+            scope = _cache_scope(model_config)
+            for match_key, cv_similarity, jd_similarity in _near_duplicates.find(
+                scope, cv_hash, jd_hash, NEAR_DUPLICATE_THRESHOLD
+            ):
+                cached = _cache_get(match_key)
+                if cached:
+                    cached["cache"].update({
+                        "key": key,
+                        "match": "near_duplicate",
+                        "matched_key": match_key,
+                        "similarity": {"cv": round(cv_similarity, 3), "jd": round(jd_similarity, 3)},
+                    })
+                    return key, cached
+    return key, None
+
+
+def _file_key(cv_file, jd_summary: str, model_config: dict) -> str:
+    content_hash = getattr(cv_file, 'sha256', None) or file_sha256(cv_file)
+    key_basis = json.dumps({
+        "scope": _cache_scope(model_config),
+        "file": content_hash,
+        "jd": canonical_key_text(jd_summary),
+    }, ensure_ascii=False)
+    return hashlib.sha256(key_basis.encode("utf-8")).hexdigest()
+
+
+def _index_file(cv_file, jd_summary: str, model_config: dict, key: str):
+    """Point the file hash at the analysis cache entry holding its result"""
+    try:
+        _file_index.set(_file_key(cv_file, jd_summary, model_config), {"key": key})
+    except Exception as e:
+        logger.warning(f"⚠️ File index write failed: {e}")
+
+
+def _index_near_duplicate(key: str, cv_summary: str, jd_summary: str, model_config: dict):
+    if not NEAR_DUPLICATE_ENABLED:
+        return
+    cv_hash, jd_hash = simhash64(cv_summary), simhash64(jd_summary)
+    if cv_hash is not None and jd_hash is not None:
+        _near_duplicates.add(_cache_scope(model_config), key, cv_hash, jd_hash)
+
+
+def _cache_get(key: str):
+    try:
+        data, tier, age = _result_cache.get(key)
+        # mark cache hit
+        if isinstance(data, dict):
+            data.setdefault("cache", {})
+            data["cache"].update({"hit": True, "key": key, "age_seconds": int(age), "tier": tier})
+        return data
+    except Exception:
+        return None
+
+
+def _cache_set(key: str, result: dict):
+    # include cache metadata
+    to_write = dict(result)
+    to_write.setdefault("cache", {})
+    to_write["cache"].update({"hit": False, "key": key, "stored_at": int(time.time())})
+    _result_cache.set(key, to_write)
+
+
+def try_get_cached_result(cv_file, job_description: str):
+    """
+    Try to get cached result without calling AI API or extracting the CV text:
+    looked up by the SHA-256 of the file bytes, indexed when this file and JD
+    were last analyzed.
+    Returns cached result if found, None otherwise.
+    """
+    try:
+        jd_summary = normalize_text(job_description)[:JD_SUMMARY_CHARS]
+        entry, _, _ = _file_index.get(_file_key(cv_file, jd_summary, _model_config()))
+        if not entry:
+            return None
+        cached = _cache_get(entry["key"])
+        if cached:
+            cached["cache"]["match"] = "file"
+        return cached
+    except Exception as e:
+        logger.warning(f"⚠️ Cache check error: {e}")
+        return None
+
+
+def analyze_cv_vs_jd(cv_file, job_description: str, force_refresh: bool = False):
+    """
+    AI-powered CV + JD analysis (Cake.me style)
+    Returns structured JSON with sections:
+    summary, content, skills, format, sections, style, recommendations, overall_score
+    """
+
+    # 1️⃣ Extract and normalize CV text (and the raw text layer for the local checks)
+    cv_text, layer = extract_text.extract_text_and_layer_cached(cv_file, budget=CV_SUMMARY_CHARS)
+    layer_hash = _layer_hash(layer)
+
+    # 2️⃣ Tóm tắt CV và JD để giảm token
+    cv_summary, jd_summary = _summarize(cv_text, job_description)
+
+    # 3️⃣ Cache key from the canonical CV/JD text + prompt/config scope (prompt caching)
+    # Include cache version, model/config to avoid stale collisions after changes
+    model_config = _model_config()
 
     if not force_refresh:
-        cached = _cache_get(key)
+        key, cached = _lookup_cached(cv_summary, jd_summary, model_config, layer_hash)
         if cached:
             logger.info(f"🗃️ Cache HIT: {key} (age={cached.get('cache',{}).get('age_seconds','?')}s)")
             print(f"🗃️ Cache HIT: {key} (age={cached.get('cache',{}).get('age_seconds','?')}s)")
+            # Near duplicates point at the entry they matched
+            _index_file(cv_file, jd_summary, model_config, cached["cache"].get("matched_key", key))
             return cached
     else:
+        key = _cache_key(cv_summary, jd_summary, model_config, layer_hash)
         logger.info("🗃️ Cache BYPASSED (force_refresh=True)")
         print("🗃️ Cache BYPASSED (force_refresh=True)")
 
+    # 3.5️⃣ Build the analysis prompt - format/sections/technical skills are checked locally
+    prompt, schema, checks = _build_prompt(layer, cv_summary, jd_summary)
+
+    # 4️⃣ Identical requests in flight (double clicks, popular JD) share one OpenAI call
+    # Forced refreshes only coalesce with each other
+    flight_key = f"{key}:refresh" if force_refresh else key
+    # Error placeholders are neither shared nor cached
+    result, shared = single_flight(
+        "ai_cv_analysis",
+        flight_key,
+        lambda: _run_analysis(prompt, schema, checks, key, cv_summary, jd_summary, model_config),
+        shareable=lambda result: "error_details" not in result,
+    )
+    if shared:
+        result["cache"] = {"hit": True, "key": key, "match": "in_flight"}
+        logger.info(f"🗃️ Shared in-flight analysis: {key}")
+    if "error_details" not in result:
+        _index_file(cv_file, jd_summary, model_config, key)
+    return result
+
+
+def _build_prompt(layer, cv_summary: str, jd_summary: str):
+    """
+    Run the local ATS checks and build the prompt for the rest
+
+    Returns:
+        tuple: (prompt, response schema, local check results or None when the
+        CV has no text layer and the model does the whole analysis)
+    """
+    checks = run_local_checks(layer, jd_summary)
+    if checks is None:
+        return ANALYSIS_PROMPT.format(cv_summary=cv_summary, jd_summary=jd_summary), ATS_ANALYSIS_SCHEMA, None
+    prompt = SUBJECTIVE_ANALYSIS_PROMPT.format(
+        local_findings=findings_summary(checks),
+        cv_summary=cv_summary,
+        jd_summary=jd_summary,
+    )
+    return prompt, ATS_SUBJECTIVE_SCHEMA, checks
+
+
+def _merge_local(name: str, section, checks: dict):
+    """Local results replace the model's format/sections and complete its skills"""
+    if checks is None or name not in checks:
+        return section
+    local = checks[name]
+    if name != "skills":
+        return dict(local)
+    section = section if isinstance(section, dict) else {}
+    return {
+        "score": local["score"],
+        "technical": local["technical"],
+        **{k: v for k, v in section.items() if k not in ("score", "technical")},
+    }
+
+
+def _overall_score(result: dict):
+    """Mean of the section scores (content, skills, format, sections, style)"""
+    scores = [
+        result[name].get("score") for name in FIELD_EXPLANATIONS if isinstance(result.get(name), dict)
+    ]
+    scores = [score for score in scores if isinstance(score, (int, float))]
+    return round(sum(scores) / len(scores)) if scores else None
+
+
+def _ordered(result: dict) -> dict:
+    # Same field order as the full analysis, whichever part produced them
+    order = [name for name in ATS_ANALYSIS_SCHEMA["properties"] if name in result]
+    return {**{name: result[name] for name in order}, **result}
+
+
+def _run_analysis(prompt: str, schema: dict, checks, key: str, cv_summary: str, jd_summary: str, model_config: dict):
+    """Call OpenAI, post-process the JSON and store it in the cache"""
     # 4️⃣ Run OpenAI API
     logger.info("🚀 Calling OpenAI API...")
     logger.info(f"📊 Prompt length: {len(prompt)} chars")
 
     try:
-        model = get_openai_model(temperature=model_config["temperature"], top_p=model_config["top_p"])
+        model = _analysis_model(model_config, schema)
         logger.info("✅ OpenAI model obtained successfully")
     except Exception as e:
         logger.error(f"❌ Failed to get OpenAI model: {str(e)}", exc_info=True)
@@ -271,40 +464,163 @@ Analyze and return complete JSON:"""
         output_tokens = len(raw_text) // 4
         total_tokens = input_tokens + output_tokens
 
-    # 5️⃣ Clean and parse the JSON safely
-    result = clean_json_output.clean_json_output(raw_text)
+    # 5️⃣ Parse the JSON safely
+    result = _parse_analysis(raw_text, schema)
 
-    # 6️⃣ Inject static explanations into each ATS field
-    for key_field, desc in FIELD_EXPLANATIONS.items():
-        if key_field in result:
-            result[key_field]["description"] = desc
-        else:
-            result[key_field] = {"description": desc}
+    # 5.5️⃣ Add the local format / sections / technical skills results
+    if checks is not None:
+        for key_field in checks:
+            result[key_field] = _merge_local(key_field, result.get(key_field), checks)
+        result["overall_score"] = _overall_score(result)
 
+    # 6️⃣ Inject static explanations into each ATS field
     # 7️⃣ Ensure recommendations section exists
-    if "recommendations" not in result:
-        result["recommendations"] = {"items": []}
-    result["recommendations"].update({
-        "title": "Recommendations for You",
-        "description": (
-            "Here are some personalized recommendations to help you improve your resume and "
-            "increase your ATS score, as well as suggestions to guide your skill or career development."
-        ),
-    })
+    for key_field in [*FIELD_EXPLANATIONS, "recommendations"]:
+        result[key_field] = _decorate_section(key_field, result.get(key_field))
+    result = _ordered(result)
+
+    return _finish_result(result, key, input_tokens, output_tokens, cv_summary, jd_summary, model_config)
+
+
+def _decorate_section(name: str, section):
+    """Static explanation for an ATS field, header for recommendations"""
+    if name in FIELD_EXPLANATIONS:
+        if not isinstance(section, dict):
+            section = {}
+        section["description"] = FIELD_EXPLANATIONS[name]
+    elif name == "recommendations":
+        if not isinstance(section, dict):
+            section = {"items": []}
+        section.update(RECOMMENDATION_HEADER)
+    return section
+
 
+def _finish_result(result: dict, key: str, input_tokens: int, output_tokens: int,
+                   cv_summary: str, jd_summary: str, model_config: dict) -> dict:
     # 8️⃣ Add token usage info to result
     result["token_usage"] = {
         "input_tokens": input_tokens,
         "output_tokens": output_tokens,
-        "total_tokens": total_tokens,
+        "total_tokens": input_tokens + output_tokens,
         "estimated": True,
         "cache": {
             "key": key,
-            "hit": False if force_refresh else False,
+            "hit": False,
         },
     }
 
-    # 9️⃣ Save to cache
-    _cache_set(key, result)
+    # 9️⃣ Save to cache (not the fallback answer of a failed API call)
+    if "error_details" not in result:
+        _cache_set(key, result)
+        _index_near_duplicate(key, cv_summary, jd_summary, model_config)
+
+    return result
+
+
+def iter_result_events(result: dict):
+    """
+    Replay a finished (e.g. cached) analysis as stream events
+
+    Yields:
+        tuple: ("section", {"name", "data"}) per top-level field, then ("done", {...})
+    """
+    for name, value in result.items():
+        if name not in ("cache", "token_usage"):
+            yield "section", {"name": name, "data": value}
+    yield "done", {"cache": result.get("cache", {}), "token_usage": result.get("token_usage")}
+
+
+def stream_cv_vs_jd(cv_file, job_description: str, force_refresh: bool = False):
+    """
+    Streaming variant of analyze_cv_vs_jd: each top-level field (summary, content,
+    skills, ...) is yielded as soon as the model has closed it. Coalesces with
+    identical in-flight requests (streamed or not): followers replay the
+    leader's result when it is done.
+
+    Yields:
+        tuple: ("section", {"name", "data"}) per field, then ("done", {...}),
+        or ("error", {...}) if the model call fails
+    """
+    cv_text, layer = extract_text.extract_text_and_layer_cached(cv_file, budget=CV_SUMMARY_CHARS)
+    cv_summary, jd_summary = _summarize(cv_text, job_description)
+    model_config = _model_config()
+    layer_hash = _layer_hash(layer)
+
+    if not force_refresh:
+        key, cached = _lookup_cached(cv_summary, jd_summary, model_config, layer_hash)
+        if cached:
+            logger.info(f"🗃️ Cache HIT (stream): {key}")
+            _index_file(cv_file, jd_summary, model_config, cached["cache"].get("matched_key", key))
+            yield from iter_result_events(cached)
+            return
+    else:
+        key = _cache_key(cv_summary, jd_summary, model_config, layer_hash)
+
+    def replay(result):
+        result["cache"] = {"hit": True, "key": key, "match": "in_flight"}
+        logger.info(f"🗃️ Shared in-flight analysis (stream): {key}")
+        _index_file(cv_file, jd_summary, model_config, key)
+        return iter_result_events(result)
+
+    # Same flight as analyze_cv_vs_jd
+    yield from single_flight_stream(
+        "ai_cv_analysis",
+        f"{key}:refresh" if force_refresh else key,
+        lambda: _stream_analysis(cv_file, layer, key, cv_summary, jd_summary, model_config),
+        replay,
+    )
+
+
+def _stream_analysis(cv_file, layer, key: str, cv_summary: str, jd_summary: str, model_config: dict):
+    """
+    Stream the model's answer section by section and cache the assembled result
+
+    Returns:
+        dict or None: the result (what followers replay), None when the stream failed
+    """
+    result = {}
+    prompt, schema, checks = _build_prompt(layer, cv_summary, jd_summary)
+    if checks is not None:
+        # Local sections are ready before the model starts
+        for name in ("format", "sections"):
+            result[name] = _decorate_section(name, _merge_local(name, None, checks))
+            yield "section", {"name": name, "data": result[name]}
+
+    chunks = []
+    parser = JSONSectionParser()
+    try:
+        model = _analysis_model(model_config, schema)
+        logger.info("📡 Streaming OpenAI API...")
+        for chunk in model.stream(prompt):
+            text = chunk.content if hasattr(chunk, 'content') else str(chunk)
+            if not text:
+                continue
+            chunks.append(text)
+            for name, value in parser.feed(text):
+                result[name] = _decorate_section(name, _merge_local(name, value, checks))
+                yield "section", {"name": name, "data": result[name]}
+    except Exception as e:
+        error_type = type(e).__name__
+        logger.error(f"❌ OpenAI stream error ({error_type}): {e}", exc_info=True)
+        # Partial results are not cached
+        yield "error", {"error_type": error_type, "error_message": str(e)}
+        return None
 
+    raw_text = "".join(chunks).strip()
+    # Whatever the incremental parser could not close (truncated or malformed output)
+    parsed = {} if parser.closed else _parse_analysis(raw_text, schema)
+    missing = {name: value for name, value in parsed.items() if name not in result} if isinstance(parsed, dict) else {}
+    missing.update({name: None for name in [*FIELD_EXPLANATIONS, "recommendations"] if name not in result and name not in missing})
+    for name, value in missing.items():
+        result[name] = _decorate_section(name, _merge_local(name, value, checks))
+        yield "section", {"name": name, "data": result[name]}
+    if checks is not None:
+        result["overall_score"] = _overall_score(result)
+        yield "section", {"name": "overall_score", "data": result["overall_score"]}
+
+    result = _ordered(result)
+    _finish_result(result, key, len(prompt) // 4, len(raw_text) // 4, cv_summary, jd_summary, model_config)
+    _index_file(cv_file, jd_summary, model_config, key)
+    logger.info(f"📊 Total tokens (estimated, stream): {result['token_usage']['total_tokens']}")
+    yield "done", {"cache": {"hit": False, "key": key}, "token_usage": result["token_usage"]}
     return result
@@ -1,18 +1,22 @@
 # apps/cv_creation_agent/services/analyzer_service.py
+import hashlib
 import json
 import re
 from functools import lru_cache
 
-from agent_core.llm import get_openai_model
+from agent_core.llm import OPENAI_MODEL_NAME, STRUCTURED_OUTPUT, get_openai_model, with_json_schema
 from agent_core.prompts import extract_resume_prompts
-from apps.cv_analysis_agent.services.extract_text import extract_text
+from agent_core.schemas import RESUME_EXTRACTION_SCHEMA
+from agent_core.utils.single_flight import single_flight
+from apps.cv_analysis_agent.services.clean_json_output import parse_structured_output
+from apps.cv_analysis_agent.services.extract_text import extract_text_cached
 
 
 # Cache model instances to avoid recreation overhead
 @lru_cache(maxsize=2)
 def get_cached_model(temperature: float):
-    """Cache model instances for reuse"""
-    return get_openai_model(temperature=temperature)
+    """Cache model instances for reuse (output constrained to RESUME_EXTRACTION_SCHEMA)"""
+    return with_json_schema(get_openai_model(temperature=temperature), "resume_extraction", RESUME_EXTRACTION_SCHEMA)
 
 
 def extract_json_from_response(response: str) -> str:
@@ -56,9 +60,6 @@ def analyze_resume_text(text: str) -> dict:
     if len(text) < 50:
         raise ValueError(f"Resume text too short ({len(text)} chars). May not contain valid resume content.")
 
-    # Use cached model for better performance
-    model = get_cached_model(temperature=0.2)
-
     # Streamlined prompt - system instruction + user content
     full_prompt = f"""{extract_resume_prompts.SYSTEM_PROMPT}
 
@@ -68,6 +69,16 @@ def analyze_resume_text(text: str) -> dict:
 
             Return ONLY valid JSON."""
 
+    # Concurrent requests with the same prompt (same resume text) share one model call
+    prompt_key = hashlib.sha256(f"{OPENAI_MODEL_NAME}:0.2:{full_prompt}".encode("utf-8")).hexdigest()
+    parsed, _ = single_flight("resume_extraction", prompt_key, lambda: _invoke_and_parse(full_prompt))
+    return parsed
+
+
+def _invoke_and_parse(full_prompt: str) -> dict:
+    # Use cached model for better performance
+    model = get_cached_model(temperature=0.2)
+
     response = model.invoke(full_prompt)
 
     # LangChain returns AIMessage object, get the content
@@ -77,6 +88,12 @@ def analyze_resume_text(text: str) -> dict:
     if not response_text:
         raise ValueError("Model returned None or empty string. Check API key and model configuration.")
     # return response_text
+    if STRUCTURED_OUTPUT:
+        # Schema-enforced output: a single parse, no regex recovery
+        try:
+            return parse_structured_output(response_text, RESUME_EXTRACTION_SCHEMA["required"])
+        except ValueError as e:
+            raise ValueError(f"Invalid structured output from model ({e}). Response preview: {response_text[:500]}") from e
     try:
         json_str = extract_json_from_response(response_text)
         parsed = json.loads(json_str)
@@ -93,7 +110,7 @@ def analyze_resume_sync(file) -> dict:
     Returns structured data and feedback.
     """
     # Step 1: Extract text from PDF
-    text = extract_text(file)
+    text = extract_text_cached(file)
     # Step 2: Extract structured information
     structured = analyze_resume_text(text)
     print("feedback data:", type(structured))
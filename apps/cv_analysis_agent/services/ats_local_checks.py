@@ -0,0 +1,186 @@
+"""
+Deterministic ATS checks computed without the LLM.
+
+The `format` (date format, length, bullet points) and `sections` parts of the
+ATS analysis and the technical `matched` / `missing` skills are rule-based, so
+they are computed here from the document's own text layer and the JD, with
+compiled regexes and SkillExtractor. The results are reproducible for the
+same file and JD; the model is only asked for the subjective parts (content,
+style, feedback).
+
+extract_text() output can't be used: it is lowercased with punctuation,
+digits and line breaks removed. The text layer is read in the same pass over
+the file and cached with it (extract_text.extract_text_and_layer_cached).
+"""
+import os
+import re
+from functools import lru_cache
+from typing import Optional
+
+from apps.cv_creation_agent.core.nlp_extractor import SkillExtractor
+
+# Bump when a rule changes: part of the analysis cache scope
+LOCAL_CHECKS_VERSION = "1"
+
+ATS_MAX_PAGES = int(os.getenv("ATS_MAX_PAGES", "2"))
+ATS_MIN_WORDS = int(os.getenv("ATS_MIN_WORDS", "200"))
+ATS_MIN_BULLETS = int(os.getenv("ATS_MIN_BULLETS", "3"))
+WORDS_PER_PAGE = 500  # page estimate for formats without pages (DOCX, TXT)
+FAIL_PENALTY = 30  # format score: 100 minus this per failed check
+
+_MONTHS = (
+    r"(?:jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+    r"|sep(?:t(?:ember)?)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?"
+)
+_DATE_STYLES = {
+    "month_name": re.compile(rf"\b{_MONTHS}\s*[,']?\s*(?:19|20)\d{{2}}\b", re.IGNORECASE),
+    "numeric": re.compile(r"\b(?:0?[1-9]|1[0-2])\s*[/.\-]\s*(?:19|20)\d{2}\b|\b(?:19|20)\d{2}\s*[/.\-]\s*(?:0?[1-9]|1[0-2])\b"),
+}
+_YEAR_RANGE = re.compile(r"\b(?:19|20)\d{2}\s*[-–—]\s*(?:(?:19|20)\d{2}|present|now|current|nay|hiện tại)\b", re.IGNORECASE)
+# Includes the Symbol/Wingdings private-use glyphs Word exports bullets as
+_BULLET_LINE = re.compile(r"^\s*(?:[•●○◦▪▫■□‣∙·►▸▶➢➤✓✔❖\uf0a7\uf0b7\uf076\uf0d8]|[-*–](?=\s|$))")
+_WORD = re.compile(r"\w+")
+_EMAIL = re.compile(r"[\w.+-]+@[\w-]+\.[\w.-]+")
+_PHONE = re.compile(r"\+?\d[\d\s().-]{7,}\d")
+_DIGIT_GROUP = re.compile(r"\d+")
+_YEAR = re.compile(r"(?:19|20)\d{2}")
+
+# Section headings (English and Vietnamese), matched on short lines only
+_HEADING_MAX_WORDS = 5
+SECTION_HEADINGS = {
+    "summary": re.compile(r"\b(summary|profile|objective|about me|introduction|giới thiệu|mục tiêu)\b", re.IGNORECASE),
+    "experience": re.compile(r"\b(experience|employment|work history|kinh nghiệm)\b", re.IGNORECASE),
+    "education": re.compile(r"\b(education|academic|học vấn)\b", re.IGNORECASE),
+    "skills": re.compile(r"\b(skills|competencies|technologies|kỹ năng)\b", re.IGNORECASE),
+}
+OPTIONAL_SECTIONS = {
+    "projects": re.compile(r"\b(projects?|dự án)\b", re.IGNORECASE),
+    "certifications": re.compile(r"\b(certifications?|certificates?|chứng chỉ)\b", re.IGNORECASE),
+}
+
+
+@lru_cache(maxsize=1)
+def _skill_extractor() -> SkillExtractor:
+    return SkillExtractor()
+
+
+def _check_format(lines: list, pages: Optional[int]) -> dict:
+    text = "\n".join(lines)
+    words = len(_WORD.findall(text))
+    estimated_pages = pages if pages is not None else max(1, -(-words // WORDS_PER_PAGE))
+
+    date_styles = sorted(style for style, pattern in _DATE_STYLES.items() if pattern.search(text))
+    year_ranges = len(_YEAR_RANGE.findall(text))
+    bullet_lines = sum(1 for line in lines if _BULLET_LINE.match(line))
+
+    checks = {
+        # One consistent style; year-only ranges ("2019 - 2021") are fine on their own
+        "date_format": "PASS" if len(date_styles) == 1 or (not date_styles and year_ranges) else "FAIL",
+        "length": "PASS" if estimated_pages <= ATS_MAX_PAGES and words >= ATS_MIN_WORDS else "FAIL",
+        "bullet_points": "PASS" if bullet_lines >= ATS_MIN_BULLETS else "FAIL",
+    }
+    tips = []
+    if checks["date_format"] == "FAIL":
+        if date_styles:
+            tips.append("Use one date format throughout (e.g. 'Jan 2022 - Mar 2024'), not a mix of month names and numbers.")
+        else:
+            tips.append("Add start and end dates (month and year) to your experience and education.")
+    if checks["length"] == "FAIL":
+        if words < ATS_MIN_WORDS:
+            tips.append(f"Your resume is short ({words} words); describe your experience and projects in more detail.")
+        else:
+            tips.append(f"Keep your resume to {ATS_MAX_PAGES} pages or fewer (currently about {estimated_pages}).")
+    if checks["bullet_points"] == "FAIL":
+        tips.append("Describe responsibilities and achievements as bullet points instead of paragraphs.")
+
+    fails = sum(1 for value in checks.values() if value == "FAIL")
+    return {
+        "score": 100 - FAIL_PENALTY * fails,
+        "checks": checks,
+        "tips": tips,
+        "measured": {
+            "pages": estimated_pages,
+            "pages_estimated": pages is None,
+            "words": words,
+            "bullet_lines": bullet_lines,
+            "date_styles": date_styles,
+        },
+    }
+
+
+def _has_phone(text: str) -> bool:
+    # 9-15 digits, and not only years ("2019 - 2021 2022")
+    for candidate in _PHONE.findall(text):
+        groups = _DIGIT_GROUP.findall(candidate)
+        if 9 <= sum(len(g) for g in groups) <= 15 and not all(_YEAR.fullmatch(g) for g in groups):
+            return True
+    return False
+
+
+def _check_sections(lines: list) -> dict:
+    text = "\n".join(lines)
+    headings = [line.strip() for line in lines if 0 < len(line.split()) <= _HEADING_MAX_WORDS]
+
+    found = {"contact": bool(_EMAIL.search(text)) or _has_phone(text)}
+    for name, pattern in {**SECTION_HEADINGS, **OPTIONAL_SECTIONS}.items():
+        found[name] = any(pattern.search(line) for line in headings)
+
+    required = ["contact", *SECTION_HEADINGS]
+    missing = [name for name in required if not found[name]]
+    tips = [
+        "Add your email address and phone number at the top." if name == "contact" else f"Add a clearly titled '{name.title()}' section."
+        for name in missing
+    ]
+    tips += [
+        f"Consider adding a '{name.title()}' section."
+        for name in OPTIONAL_SECTIONS if not found[name]
+    ]
+    return {
+        "score": round(100 * (len(required) - len(missing)) / len(required)),
+        "missing": missing,
+        "tips": tips,
+    }
+
+
+def _check_skills(lines: list, job_description: str) -> dict:
+    extractor = _skill_extractor()
+    jd_skills = extractor.extract_skills(job_description)
+    cv_skills = set(extractor.extract_skills("\n".join(lines)))
+    matched = [skill for skill in jd_skills if skill in cv_skills]
+    missing = [skill for skill in jd_skills if skill not in cv_skills]
+    return {
+        # No recognizable technical skills in the JD: nothing is missing
+        "score": round(100 * len(matched) / len(jd_skills)) if jd_skills else 100,
+        "technical": {"matched": matched, "missing": missing},
+    }
+
+
+def run_local_checks(layout: Optional[dict], job_description: str) -> Optional[dict]:
+    """
+    Compute the rule-based parts of the ATS analysis
+
+    Args:
+        layout: the document's text layer ({"lines", "pages"}), None for a scanned PDF
+
+    Returns:
+        dict or None: {"format", "sections", "skills"} partial sections, or None
+        when the document has no text layer (the model then does the whole analysis)
+    """
+    if layout is None:
+        return None
+    return {
+        "format": _check_format(layout["lines"], layout["pages"]),
+        "sections": _check_sections(layout["lines"]),
+        "skills": _check_skills(layout["lines"], job_description),
+    }
+
+
+def findings_summary(checks: dict) -> str:
+    """One-line digest of the local results for the prompt, so the model's feedback agrees with them"""
+    fmt, sections, skills = checks["format"], checks["sections"], checks["skills"]
+    parts = [
+        ", ".join(f"{name} {value}" for name, value in fmt["checks"].items()),
+        f"missing sections: {', '.join(sections['missing']) or 'none'}",
+        f"missing JD skills: {', '.join(skills['technical']['missing']) or 'none'}",
+    ]
+    return "; ".join(parts)
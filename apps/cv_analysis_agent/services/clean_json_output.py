@@ -1,6 +1,8 @@
 import json
 import re
 
+import orjson
+
 def clean_json_output(text):
     """
     Chuẩn hóa và parse JSON từ output AI.
@@ -42,3 +44,21 @@ def clean_json_output(text):
 
     # 🔴 Fallback: trả text thô
     return {"raw_text": text}
+
+
+def parse_structured_output(text, required=()):
+    """
+    Parse output generated under a JSON-schema response_format.
+    - Một lần orjson.loads, không dùng regex để bóc JSON
+    - Raise ValueError nếu không phải JSON object hoặc thiếu field bắt buộc
+    """
+    if isinstance(text, dict):
+        data = text
+    else:
+        data = orjson.loads(text)
+    if not isinstance(data, dict):
+        raise ValueError(f"Expected a JSON object, got {type(data).__name__}")
+    missing = [field for field in required if field not in data]
+    if missing:
+        raise ValueError(f"Missing required fields: {', '.join(missing)}")
+    return data
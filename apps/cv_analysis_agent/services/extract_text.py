@@ -1,100 +1,338 @@
 # apps/cv_creation_agent/services/analyzer_service.py
 import io
+import json
+import logging
 import os
 import re
+import time
+from concurrent.futures import ThreadPoolExecutor, wait
+from functools import lru_cache
 
 import fitz  # PyMuPDF
 import docx2txt
 import pytesseract
 from PIL import Image
-from sklearn.feature_extraction.text import TfidfVectorizer
+
+from apps.cv_analysis_agent.utils.extraction_cache import (
+    extraction_cache_key,
+    file_sha256,
+    get_extracted_text,
+    set_extracted_text,
+)
+from sklearn.feature_extraction.text import ENGLISH_STOP_WORDS
 
 pytesseract_path = os.environ["TESSERACT_PATH"]
 pytesseract.pytesseract.tesseract_cmd = pytesseract_path
 
-# Initialize TfidfVectorizer with stopwords removal
-tfidf_vectorizer = TfidfVectorizer(
-    stop_words='english',  # Remove common English stopwords like 'a', 'an', 'the', etc.
-    lowercase=True,
-    token_pattern=r'\b[a-zA-Z]{2,}\b'  # Only keep words with 2+ letters
-)
+logger = logging.getLogger(__name__)
+
+# OCR: only pages without a usable text layer are OCRed, in parallel, within a time budget
+OCR_MIN_PAGE_CHARS = int(os.getenv("OCR_MIN_PAGE_CHARS", "20"))  # fewer chars => page is treated as scanned
+OCR_MAX_WORKERS = int(os.getenv("OCR_MAX_WORKERS", str(min(4, os.cpu_count() or 1))))
+OCR_TIME_BUDGET = float(os.getenv("OCR_TIME_BUDGET", "30"))  # seconds per document
+OCR_MIN_DPI = 150
+OCR_MAX_DPI = 300
+OCR_DEFAULT_DPI = 200  # pages without an embedded scan image
+OCR_MAX_PIXELS = 12_000_000  # caps the render size of large pages
+OCR_PROBE_DPI = 100
+
+# Letters only Vietnamese uses: ă, đ, ơ, ư (both cases) and the tone-marked vowel block
+_VIETNAMESE_CHARS = re.compile(r"[\u0102\u0103\u0110\u0111\u01A0\u01A1\u01AF\u01B0\u1EA0-\u1EF9]")
+
+_ocr_executor = None
+
+# Same vocabulary the TfidfVectorizer(stop_words='english', token_pattern=...) pass
+# kept, without fitting a vectorizer per document: lowercase words of 2+ letters
+# that are not English stopwords, in their original order
+STOPWORDS = frozenset(ENGLISH_STOP_WORDS)
+_WORD_RE = re.compile(r'\b[a-z]{2,}\b')
 
 
-def remove_stopwords_tfidf(text):
+def remove_stopwords(text):
     """
-    Remove stopwords and extract meaningful terms using TfidfVectorizer.
-    This is more sophisticated than simple stopword removal as it:
+    Remove stopwords in a single pass over the text.
     - Removes common words like 'a', 'an', 'the', 'is', 'are', etc.
     - Removes punctuation and special characters
     - Keeps only alphabetic words with 2+ characters
     - Preserves word order
     """
-    if not text or not text.strip():
+    if not text:
         return ""
+    return ' '.join(word for word in _WORD_RE.findall(text.lower()) if word not in STOPWORDS)
+
+
+# Backward-compatible name
+remove_stopwords_tfidf = remove_stopwords
 
-    # Get feature names (valid tokens after stopword removal)
-    try:
-        tfidf_vectorizer.fit([text])
-        feature_names = tfidf_vectorizer.get_feature_names_out()
 
-        # Create a set for fast lookup
-        valid_words = set(feature_names)
+def _get_ocr_executor():
+    # pytesseract runs the tesseract binary in a subprocess, so threads OCR pages in parallel
+    global _ocr_executor
+    if _ocr_executor is None:
+        _ocr_executor = ThreadPoolExecutor(max_workers=OCR_MAX_WORKERS, thread_name_prefix="ocr")
+    return _ocr_executor
 
-        # Tokenize original text and keep only valid words (preserving order)
-        words = re.findall(r'\b[a-zA-Z]{2,}\b', text.lower())
-        filtered_words = [word for word in words if word in valid_words]
 
-        return ' '.join(filtered_words)
+@lru_cache(maxsize=1)
+def _tesseract_languages():
+    try:
+        return frozenset(pytesseract.get_languages(config=""))
     except Exception:
-        # Fallback: just lowercase and remove short words
-        words = re.findall(r'\b[a-zA-Z]{2,}\b', text.lower())
-        return ' '.join(words)
+        return frozenset({"eng", "vie"})
+
+
+def _needs_ocr(page, page_text):
+    """A page needs OCR when it has (almost) no text layer but carries an image (scan)"""
+    return len(page_text.strip()) < OCR_MIN_PAGE_CHARS and bool(page.get_images())
+
+
+def _ocr_dpi(page):
+    """
+    Render DPI for a scanned page: the native resolution of its largest image,
+    clamped to [OCR_MIN_DPI, OCR_MAX_DPI] and to OCR_MAX_PIXELS
+    """
+    dpi, largest_area = OCR_DEFAULT_DPI, 0
+    for image in page.get_images(full=True):
+        xref, width = image[0], image[2]
+        for rect in page.get_image_rects(xref):
+            area = rect.width * rect.height
+            if rect.width > 0 and area > largest_area:
+                largest_area = area
+                dpi = width / (rect.width / 72)
+    dpi = min(max(dpi, OCR_MIN_DPI), OCR_MAX_DPI)
+
+    page_area = page.rect.width * page.rect.height
+    if page_area > 0:
+        dpi = min(dpi, 72 * (OCR_MAX_PIXELS / page_area) ** 0.5)
+    return int(dpi)
+
+
+def _render_page(page, dpi, clip=None):
+    """Grayscale render straight from the pixmap samples (no PNG round trip)"""
+    pix = page.get_pixmap(dpi=dpi, colorspace=fitz.csGRAY, clip=clip)
+    return Image.frombytes("L", (pix.width, pix.height), pix.samples)
+
+
+def _is_vietnamese(text):
+    return len(_VIETNAMESE_CHARS.findall(text)) >= 3
+
+
+def _choose_ocr_lang(doc, ocr_indexes, known_text, deadline):
+    """
+    Pick "eng" or "vie+eng" instead of always loading both models
+
+    The text layer of the other pages decides when there is one; otherwise the
+    top half of the first scanned page is OCRed at low DPI with "vie" and
+    checked for Vietnamese-only letters.
+    """
+    if "vie" not in _tesseract_languages():
+        return "eng"
+
+    sample = known_text
+    if not sample.strip():
+        page = doc[ocr_indexes[0]]
+        top_half = fitz.Rect(page.rect.x0, page.rect.y0, page.rect.x1, page.rect.y0 + page.rect.height / 2)
+        try:
+            sample = pytesseract.image_to_string(
+                _render_page(page, OCR_PROBE_DPI, clip=top_half),
+                lang="vie",
+                timeout=max(deadline - time.monotonic(), 1),
+            )
+        except Exception as e:
+            logger.warning(f"OCR language probe failed: {e}")
+            return "vie+eng"
+    return "vie+eng" if _is_vietnamese(sample) else "eng"
+
+
+def _ocr_image(image, lang, timeout):
+    return pytesseract.image_to_string(image, lang=lang, timeout=timeout)
+
+
+def _ocr_pages(doc, ocr_indexes, known_text, deadline=None, lang=None):
+    """
+    OCR the given pages in parallel within OCR_TIME_BUDGET seconds
+
+    Args:
+        deadline: time.monotonic() deadline shared with earlier batches (default: now + OCR_TIME_BUDGET)
+        lang: Tesseract language, chosen from known_text when not given
+
+    Returns:
+        dict: page index -> OCR text, for the pages finished within the budget
+    """
+    if deadline is None:
+        deadline = time.monotonic() + OCR_TIME_BUDGET
+    if lang is None:
+        lang = _choose_ocr_lang(doc, ocr_indexes, known_text, deadline)
+    executor = _get_ocr_executor()
+
+    # Pages are rendered here, one at a time, and each is handed to an OCR
+    # thread as soon as it is rendered. PyMuPDF is single-threaded (a document
+    # must not be used from the OCR threads, even through separate handles),
+    # and the prefork ocr worker can't start a process pool. A render takes
+    # ~30 ms per page at 150 DPI (run_benchmark.py --render-only), far less than
+    # a Tesseract run, so only the first render is not overlapped with OCR.
+    futures = {}
+    for index in ocr_indexes:
+        remaining = deadline - time.monotonic()
+        if remaining <= 0:
+            break
+        page = doc[index]
+        futures[executor.submit(_ocr_image, _render_page(page, _ocr_dpi(page)), lang, remaining)] = index
+
+    done, not_done = wait(futures, timeout=max(deadline - time.monotonic(), 0))
+    for future in not_done:
+        future.cancel()
+
+    results = {}
+    for future in done:
+        try:
+            results[futures[future]] = future.result()
+        except Exception as e:
+            # pytesseract raises RuntimeError when its timeout kills tesseract
+            logger.warning(f"OCR failed on page {futures[future] + 1}: {e}")
+
+    skipped = len(ocr_indexes) - len(results)
+    if skipped:
+        logger.warning(f"OCR budget {OCR_TIME_BUDGET}s: {skipped} of {len(ocr_indexes)} scanned pages skipped")
+    return results
+
+
+def _has_enough_content(filtered_chars, budget):
+    """Sufficient content: the stopword-filtered text read so far fills the budget"""
+    return budget is not None and filtered_chars >= budget
+
+
+def _read_pages_within_budget(doc, budget):
+    """
+    Read pages in order until the filtered text reaches `budget` characters
+
+    Scanned pages are OCRed in batches of up to OCR_MAX_WORKERS consecutive
+    pages (sharing one OCR_TIME_BUDGET deadline), so the content check also
+    runs between OCR batches and the remaining pages are never rendered.
+
+    Returns:
+        list: Texts of the pages read, in page order
+    """
+    page_texts = []
+    filtered_chars = 0
+    deadline = time.monotonic() + OCR_TIME_BUDGET
+    lang = None
+    index = 0
+    while index < len(doc) and not _has_enough_content(filtered_chars, budget):
+        page = doc[index]
+        text = page.get_text("text")
+        if not _needs_ocr(page, text):
+            page_texts.append(text)
+            filtered_chars += len(remove_stopwords(text)) + 1
+            index += 1
+            continue
 
+        # Run of consecutive scanned pages, OCRed together
+        batch = [index]
+        while len(batch) < OCR_MAX_WORKERS and batch[-1] + 1 < len(doc):
+            next_page = doc[batch[-1] + 1]
+            if not _needs_ocr(next_page, next_page.get_text("text")):
+                break
+            batch.append(batch[-1] + 1)
 
-def extract_text(file):
+        known_text = "".join(page_texts)
+        if lang is None:
+            lang = _choose_ocr_lang(doc, batch, known_text, deadline)
+        ocr_results = _ocr_pages(doc, batch, known_text, deadline=deadline, lang=lang)
+        for i in batch:
+            ocr_text = ocr_results.get(i, "")
+            page_texts.append(ocr_text)
+            filtered_chars += len(remove_stopwords(ocr_text)) + 1
+        index = batch[-1] + 1
+
+    return page_texts
+
+
+def extract_text(file, budget=None):
     """
     Extract plain text content from uploaded file.
     Supports PDF (via PyMuPDF) and DOCX (via docx2txt).
-    Falls back to Tesseract OCR if PDF is scanned.
-    Automatically removes stopwords using TfidfVectorizer.
+    PDF pages without a text layer are OCRed with Tesseract (in parallel,
+    within OCR_TIME_BUDGET seconds per document).
+    Automatically removes English stopwords.
     Returns UTF-8 string.
+
+    Args:
+        budget: Characters of (stopword-filtered) text the caller needs, e.g.
+                2000 for a prompt summary. PDF pages are read in order and
+                reading stops once the budget is met; the result may be longer
+                than the budget but is a prefix of the full text. None reads
+                the whole document.
+    """
+    return _extract(file, budget=budget)[0]
+
+
+def _open_pdf(file):
+    # Blobs on disk are opened by path (MuPDF reads the file itself, no copy)
+    if getattr(file, 'path', None):
+        return fitz.open(file.path, filetype="pdf")
+
+    # Reset file pointer to beginning before reading
+    if hasattr(file, 'seek'):
+        file.seek(0)
+
+    pdf_bytes = file.read()
+
+    # Reset file pointer after reading so it can be read again if needed
+    if hasattr(file, 'seek'):
+        file.seek(0)
+
+    return fitz.open(stream=io.BytesIO(pdf_bytes), filetype="pdf")
+
+
+def _text_layer(text, pages=None):
+    """
+    The document's own text as lines, before OCR and stopword removal (for
+    ats_local_checks, which needs case, punctuation, digits and line breaks)
+
+    Returns:
+        dict or None: {"lines", "pages"} (pages is None for formats without
+        pages), or None when a PDF has no usable text layer (scanned)
+    """
+    if pages is not None and len(text.strip()) < OCR_MIN_PAGE_CHARS * max(pages, 1):
+        return None
+    return {"lines": text.splitlines(), "pages": pages}
+
+
+def _extract(file, budget=None, with_layer=False):
+    """
+    extract_text, optionally reading the text layer in the same pass
+
+    Returns:
+        tuple: (extracted text, text layer or None when not requested)
     """
 
     filename = file.name.lower()
+    layer = None
 
     # ✅ Handle PDF
     if filename.endswith(".pdf"):
-        text = ""
         try:
-            # Reset file pointer to beginning before reading
-            if hasattr(file, 'seek'):
-                file.seek(0)
-
-            pdf_bytes = file.read()
-
-            # Reset file pointer after reading so it can be read again if needed
-            if hasattr(file, 'seek'):
-                file.seek(0)
-
-            with fitz.open(stream=io.BytesIO(pdf_bytes), filetype="pdf") as doc:
-                for page in doc:
-                    page_text = page.get_text("text")
-                    text += page_text
+            with _open_pdf(file) as doc:
+                if with_layer:
+                    layer = _text_layer("\n".join(page.get_text("text") for page in doc), len(doc))
 
-                # Nếu toàn bộ PDF không có text => có thể là scanned PDF
-                if not text.strip():
-                    ocr_text = ""
-                    for page_index, page in enumerate(doc):
-                        # render page thành ảnh
-                        pix = page.get_pixmap(dpi=300)
-                        img = Image.open(io.BytesIO(pix.tobytes("png")))
-                        # OCR
-                        ocr_text += pytesseract.image_to_string(img, lang="eng+vie")
+                if budget is not None:
+                    # Chỉ đọc đủ số trang cần cho budget
+                    page_texts = _read_pages_within_budget(doc, budget)
+                else:
+                    page_texts = [page.get_text("text") for page in doc]
 
-                    text = ocr_text
+                    # Trang không có text layer (scan) => OCR riêng những trang đó
+                    ocr_indexes = [i for i, page in enumerate(doc) if _needs_ocr(page, page_texts[i])]
+                    if ocr_indexes:
+                        known_text = "".join(t for i, t in enumerate(page_texts) if i not in ocr_indexes)
+                        for index, ocr_text in _ocr_pages(doc, ocr_indexes, known_text).items():
+                            page_texts[index] = ocr_text
 
+            text = "".join(page_texts)
             text = text.strip()
-            return remove_stopwords_tfidf(text)
+            return remove_stopwords(text), layer
 
         except Exception as e:
             raise ValueError(f"PDF parsing failed: {e}")
@@ -112,13 +350,88 @@ def extract_text(file):
             if hasattr(file, 'seek'):
                 file.seek(0)
 
-            return remove_stopwords_tfidf(text)
+            return remove_stopwords(text), _text_layer(text) if with_layer else None
         except Exception as e:
             raise ValueError(f"DOCX parsing failed: {e}")
 
     # ✅ Fallback for TXT or others
     try:
         text = file.read().decode("utf-8", errors="ignore")
-        return remove_stopwords_tfidf(text)
+        return remove_stopwords(text), _text_layer(text) if with_layer else None
     except Exception:
-        return ""
+        return "", None
+
+
+def read_text_layer(file):
+    """Only the text layer (see _text_layer): no OCR, no stopword removal"""
+    filename = file.name.lower()
+    if filename.endswith(".pdf"):
+        with _open_pdf(file) as doc:
+            return _text_layer("\n".join(page.get_text("text") for page in doc), len(doc))
+
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    if filename.endswith(".docx"):
+        text = docx2txt.process(file)
+    else:
+        text = file.read().decode("utf-8", errors="ignore")
+    if hasattr(file, 'seek'):
+        file.seek(0)
+    return _text_layer(text)
+
+
+def _lookup_text(content_hash, budget):
+    """
+    Returns:
+        tuple: (cached text or None, key to store a new extraction under)
+    """
+    key = extraction_cache_key(content_hash)
+    text = get_extracted_text(key)
+    if text is not None or budget is None:
+        return text, key
+
+    key = extraction_cache_key(content_hash, variant=f"budget{budget}")
+    return get_extracted_text(key), key
+
+
+def extract_text_cached(file, budget=None):
+    """
+    extract_text, cached by the SHA-256 of the file bytes.
+    Re-uploads of the same resume (and the other code paths analyzing it)
+    skip PyMuPDF and OCR.
+    A budgeted call is also served by a cached full text (a superset of it).
+    """
+    content_hash = getattr(file, 'sha256', None) or file_sha256(file)
+    text, key = _lookup_text(content_hash, budget)
+    if text is not None:
+        return text
+
+    text = extract_text(file, budget=budget)
+    set_extracted_text(key, text)
+    return text
+
+
+def extract_text_and_layer_cached(file, budget=None):
+    """
+    extract_text_cached plus the document's text layer (cached the same way).
+    When neither is cached both come from one pass over the file.
+
+    Returns:
+        tuple: (text, text layer dict or None for a scanned PDF)
+    """
+    content_hash = getattr(file, 'sha256', None) or file_sha256(file)
+    text, key = _lookup_text(content_hash, budget)
+    layer_key = extraction_cache_key(content_hash, variant="layer")
+    raw_layer = get_extracted_text(layer_key)
+
+    layer = None
+    if text is None:
+        text, layer = _extract(file, budget=budget, with_layer=raw_layer is None)
+        set_extracted_text(key, text)
+    elif raw_layer is None:
+        layer = read_text_layer(file)
+
+    if raw_layer is None:
+        set_extracted_text(layer_key, json.dumps(layer, ensure_ascii=False))
+        return text, layer
+    return text, json.loads(raw_layer)
@@ -0,0 +1,70 @@
+import json
+
+
+class JSONSectionParser:
+    """
+    Incremental parser for a streamed JSON object (LLM output).
+
+    feed() takes text chunks as they arrive and returns the top-level
+    (key, value) pairs completed so far, so each section can be sent as soon
+    as its value closes. Text before the first "{" (markdown fences, "Here is
+    the JSON:") and after the closing "}" is ignored.
+    """
+
+    def __init__(self):
+        self.buffer = ""
+        self.pos = 0          # next character to scan
+        self.started = False  # top-level "{" seen
+        self.closed = False   # top-level "}" seen
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.member_start = 0  # start of the current "key": value member
+
+    def feed(self, chunk: str) -> list:
+        """
+        Returns:
+            list: (key, value) pairs completed by this chunk, in order
+        """
+        if self.closed or not chunk:
+            return []
+        self.buffer += chunk
+        sections = []
+        while self.pos < len(self.buffer) and not self.closed:
+            ch = self.buffer[self.pos]
+            if not self.started:
+                if ch == "{":
+                    self.started = True
+                    self.depth = 1
+                    self.member_start = self.pos + 1
+            elif self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+            elif ch == '"':
+                self.in_string = True
+            elif ch in "{[":
+                self.depth += 1
+            elif ch in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    self.closed = True
+                    sections.extend(self._member(self.buffer[self.member_start:self.pos]))
+            elif ch == "," and self.depth == 1:
+                sections.extend(self._member(self.buffer[self.member_start:self.pos]))
+                self.member_start = self.pos + 1
+            self.pos += 1
+        return sections
+
+    @staticmethod
+    def _member(text: str) -> list:
+        if not text.strip():
+            return []
+        try:
+            return list(json.loads("{" + text + "}").items())
+        except ValueError:
+            # Malformed member: left for the full-text fallback at the end
+            return []
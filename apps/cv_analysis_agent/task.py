@@ -1,39 +1,116 @@
 import base64
-import io
-from celery import shared_task
-from .services.extract_text import extract_text
+import logging
+
+from celery import chain, shared_task, signals
+from django.core.files.base import ContentFile
+from .services.extract_text import extract_text_cached
 from .services.analyzer_service import analyze_resume_text
+from .services.ai_checker_resume_service import analyze_cv_vs_jd
+from .utils.blob_store import (
+    UPLOAD_BLOB_DIR,
+    BlobNotFoundError,
+    is_upload_dir_shared,
+    open_blob,
+    purge_expired_blobs,
+    put_upload,
+    release_blob,
+)
 
+logger = logging.getLogger(__name__)
 
-class FileWrapper:
-    """Wrapper class to mimic file object with name attribute"""
-    def __init__(self, content: bytes, name: str):
-        self._buffer = io.BytesIO(content)
-        self.name = name
 
-    def read(self):
-        return self._buffer.read()
+@signals.worker_ready.connect
+def _check_upload_dir(**kwargs):
+    if is_upload_dir_shared() is False:
+        logger.error(
+            f"❌ UPLOAD_BLOB_DIR ({UPLOAD_BLOB_DIR}) is not the API's upload directory: "
+            "resume tasks will fail until it is a shared volume (see DEPLOYMENT_GUIDE.md)"
+        )
 
-    def seek(self, pos):
-        return self._buffer.seek(pos)
 
+def resume_pipeline(blob_key: str, filename: str, uploaded_at: float = None):
+    """Resume pipeline signature: text extraction (ocr queue) then LLM parsing (llm queue)"""
+    return chain(
+        extract_resume_text_task.s(blob_key, filename, uploaded_at),
+        analyze_resume_text_task.s(),
+    )
 
-@shared_task(bind=True, max_retries=2)
+
+def submit_resume_pipeline(blob_key: str, filename: str, uploaded_at: float = None):
+    """
+    Queue the resume pipeline
+
+    Returns:
+        AsyncResult: Result of the last step (failures of the first step propagate to it)
+    """
+    return resume_pipeline(blob_key, filename, uploaded_at).apply_async()
+
+
+@shared_task(bind=True)
 def process_resume_task(self, file_content_b64: str, filename: str) -> dict:
-    try:
-        # Decode base64 content
-        file_content = base64.b64decode(file_content_b64)
+    """
+    Deprecated: kept for one release for callers and queued messages still
+    sending base64 content. Stores the file as a blob and replaces itself with
+    the resume pipeline, so the task ID still resolves to {"result": ...}.
+    """
+    logger.warning("⚠️ process_resume_task is deprecated, use submit_resume_pipeline")
+    blob_key = put_upload(ContentFile(base64.b64decode(file_content_b64), name=filename))
+    return self.replace(resume_pipeline(blob_key, filename))
 
-        # Create file-like object
-        file_obj = FileWrapper(file_content, filename)
 
-        text = extract_text(file_obj)
+@shared_task(bind=True, max_retries=2)
+def extract_resume_text_task(self, blob_key: str, filename: str, uploaded_at: float = None) -> str:
+    try:
+        # Open the uploaded file by reference (no base64 payload through the broker)
+        with open_blob(blob_key, filename) as file_obj:
+            text = extract_text_cached(file_obj)
         print("text extracted:", text)
+    except BlobNotFoundError:
+        # Retrying can't make the file appear
+        raise
+    except Exception as e:
+        if self.request.retries >= self.max_retries:
+            release_blob(blob_key, uploaded_at)
+        raise self.retry(exc=e, countdown=10)
+
+    release_blob(blob_key, uploaded_at)
+    return text
 
+
+@shared_task(bind=True, max_retries=2)
+def analyze_resume_text_task(self, text: str) -> dict:
+    try:
         structured = analyze_resume_text(text)
+    except Exception as e:
+        raise self.retry(exc=e, countdown=10)
+
+    return {
+        "result": structured
+    }
 
-        return {
-            "result": structured
-        }
+
+@shared_task(bind=True, max_retries=1)
+def analyze_ats_task(self, blob_key: str, filename: str, uploaded_at: float, job_description: str,
+                     force_refresh: bool = False) -> dict:
+    """Celery task ATS analysis of an uploaded CV against a JD (result served by the task-status endpoint)"""
+    try:
+        with open_blob(blob_key, filename) as file_obj:
+            result = analyze_cv_vs_jd(file_obj, job_description, force_refresh=force_refresh)
+    except BlobNotFoundError:
+        raise
     except Exception as e:
+        if self.request.retries >= self.max_retries:
+            release_blob(blob_key, uploaded_at)
         raise self.retry(exc=e, countdown=10)
+
+    release_blob(blob_key, uploaded_at)
+    return result
+
+
+@shared_task
+def purge_upload_blobs_task():
+    """Celery task remove uploaded blobs left behind by failed or lost tasks"""
+    removed = purge_expired_blobs()
+    if removed:
+        print(f"🧹 Purged {removed} expired upload blobs")
+    return {"removed": removed}
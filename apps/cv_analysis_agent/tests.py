@@ -1,3 +1,726 @@
-from django.test import TestCase
+import base64
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import fitz  # PyMuPDF
+from django.core.files.base import ContentFile
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import SimpleTestCase
+
+from Careermate.celery_app import TaskRedeliveryLimitExceeded
+from agent_core.utils import single_flight as single_flight_module
+from agent_core.utils.single_flight import single_flight
+from agent_core.utils.testing import FakeRedisMixin
+from apps.cv_analysis_agent import task
+from apps.cv_analysis_agent.services import ai_checker_resume_service, ats_local_checks, extract_text
+from apps.cv_analysis_agent.services.stream_json import JSONSectionParser
+from apps.cv_analysis_agent.utils.result_cache import TieredCache
+from apps.cv_analysis_agent.view import resume_analysis_view
+from apps.cv_analysis_agent.utils import blob_store, extraction_cache
+from apps.cv_analysis_agent.utils.blob_store import BlobNotFoundError, BlobNotSharedError
+from apps.cv_analysis_agent.utils.extraction_cache import LRUFileCache
+from apps.cv_analysis_agent.utils.text_fingerprint import (
+    SimHashIndex,
+    canonical_key_text,
+    simhash64,
+    simhash_similarity,
+)
+
+
+def temp_dir(test):
+    directory = tempfile.TemporaryDirectory()
+    test.addCleanup(directory.cleanup)
+    return directory.name
+
+
+CV_LINES = [
+    "Nguyen Van A",
+    "a.nguyen@example.com | +84 912 345 678",
+    "Summary",
+    "Backend developer building Python and Django APIs.",
+    "Experience",
+    "Backend Developer, Acme (Jan 2021 - Mar 2024)",
+    "• Built REST APIs with Django and PostgreSQL",
+    "• Moved background jobs to Celery and Redis",
+    "• Cut p95 latency by 40% with caching",
+    "Education",
+    "BSc Computer Science, HUST (Sep 2016 - Jun 2020)",
+    "Skills",
+    "Python, Django, PostgreSQL, Redis, Docker",
+]
+JD = "Backend Developer with Python, Django, Docker and Kubernetes experience."
+
+# Every field of the full analysis (a superset of the subjective schema)
+MODEL_OUTPUT = {
+    "summary": {"overall_match": 80, "overview_comment": "Good fit", "strengths": ["APIs"], "improvements": ["K8s"]},
+    "content": {"score": 80, "measurable_results": ["40% latency"], "grammar_issues": [], "tips": []},
+    "skills": {"score": 70, "technical": {"matched": [], "missing": []}, "soft": {"missing": []}, "tips": []},
+    "format": {"score": 100, "checks": {"date_format": "PASS", "length": "PASS", "bullet_points": "PASS"}, "tips": []},
+    "sections": {"score": 100, "missing": [], "tips": []},
+    "style": {"score": 75, "tone": [], "buzzwords": [], "tips": []},
+    "recommendations": {"items": ["Learn Kubernetes"]},
+    "overall_score": 80,
+    "overall_comment": "Solid backend profile",
+}
+
+
+def make_pdf(lines=CV_LINES) -> bytes:
+    with fitz.open() as doc:
+        page = doc.new_page()
+        for i, line in enumerate(lines):
+            page.insert_text((50, 60 + 16 * i), line, fontsize=10)
+        return doc.tobytes()
+
+
+def make_two_page_pdf(first, second) -> bytes:
+    with fitz.open() as doc:
+        for lines in (first, second):
+            page = doc.new_page()
+            for i, line in enumerate(lines):
+                page.insert_text((50, 40 + 16 * i), line, fontsize=10)
+        return doc.tobytes()
+
+
+class FakeModel:
+    """Chat model returning MODEL_OUTPUT, whole or in chunks"""
+
+    def __init__(self, output=MODEL_OUTPUT, chunk_size=40):
+        self.text = json.dumps(output)
+        self.chunk_size = chunk_size
+        self.calls = 0
+
+    def invoke(self, prompt):
+        self.calls += 1
+        return SimpleNamespace(content=self.text)
+
+    def stream(self, prompt):
+        self.calls += 1
+        for i in range(0, len(self.text), self.chunk_size):
+            yield SimpleNamespace(content=self.text[i:i + self.chunk_size])
+
+
+class AtsAnalysisTestCase(FakeRedisMixin, SimpleTestCase):
+    """Fresh Redis-only result caches and upload directory; the model is FakeModel"""
+
+    def setUp(self):
+        super().setUp()
+        self.model = FakeModel()
+        for patcher in (
+            mock.patch.object(ai_checker_resume_service, "_result_cache", TieredCache("ai_cv_analysis", ttl=3600, memory_items=0)),
+            mock.patch.object(ai_checker_resume_service, "_file_index", TieredCache("ai_cv_analysis_file", ttl=3600, memory_items=0)),
+            mock.patch.object(ai_checker_resume_service, "_analysis_model", lambda config, schema: self.model),
+            mock.patch.object(extraction_cache, "_cache", LRUFileCache(temp_dir(self), max_bytes=10_000)),
+            mock.patch.object(blob_store, "UPLOAD_BLOB_DIR", temp_dir(self)),
+            mock.patch.object(blob_store, "_marker_checked", False),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+
+class LRUFileCacheTests(SimpleTestCase):
+    def test_directory_is_scanned_only_when_the_estimate_passes_the_limit(self):
+        cache = LRUFileCache(temp_dir(self), max_bytes=1000)
+        with mock.patch.object(cache, "_scan", wraps=cache._scan) as scan:
+            for i in range(9):
+                cache.set(f"k{i}", "x" * 100)
+            # First write learns the directory size, the next eight only add to it
+            self.assertEqual(scan.call_count, 1)
+
+            cache.set("k9", "x" * 100)
+            cache.set("k10", "x" * 100)
+            self.assertEqual(scan.call_count, 2)
+
+    def test_eviction_removes_least_recently_used_down_to_low_watermark(self):
+        directory = temp_dir(self)
+        cache = LRUFileCache(directory, max_bytes=1000)
+        for i in range(10):
+            cache.set(f"k{i}", "x" * 100)
+            os.utime(cache._path(f"k{i}"), (i, i))
+        cache.get("k0")  # recently used again
+
+        cache.set("k10", "x" * 100)
+
+        remaining = sorted(name[:-4] for name in os.listdir(directory))
+        self.assertEqual(remaining, sorted(["k0", "k10", *[f"k{i}" for i in range(3, 10)]]))
+        self.assertEqual(cache._approx_bytes, 900)
+
+    def test_overwrite_counts_only_the_size_difference(self):
+        cache = LRUFileCache(temp_dir(self), max_bytes=1000)
+        cache.set("k", "x" * 100)
+        cache.set("k", "x" * 300)
+        self.assertEqual(cache._approx_bytes, 300)
+
+    def test_rescan_picks_up_other_processes_writes(self):
+        directory = temp_dir(self)
+        cache = LRUFileCache(directory, max_bytes=10_000)
+        cache.set("mine", "x" * 100)
+        with open(os.path.join(directory, "theirs.txt"), "w") as f:
+            f.write("x" * 500)
+
+        with mock.patch.object(LRUFileCache, "RESCAN_WRITES", 2):
+            cache.set("mine2", "x" * 100)
+            self.assertEqual(cache._approx_bytes, 200)
+            cache.set("mine3", "x" * 100)
+        self.assertEqual(cache._approx_bytes, 800)
+
+
+class ExtractionCacheRedisTierTests(FakeRedisMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.api_host = LRUFileCache(temp_dir(self), max_bytes=10_000)
+        self.worker_host = LRUFileCache(temp_dir(self), max_bytes=10_000)
+
+    def test_text_extracted_on_one_host_is_a_hit_on_another(self):
+        with mock.patch.object(extraction_cache, "_cache", self.api_host):
+            extraction_cache.set_extracted_text("v1-abc", "python django")
+
+        with mock.patch.object(extraction_cache, "_cache", self.worker_host):
+            self.assertEqual(extraction_cache.get_extracted_text("v1-abc"), "python django")
+        # Copied to the worker's disk for the next lookup
+        self.assertEqual(self.worker_host.get("v1-abc"), "python django")
+
+    def test_redis_tier_can_be_disabled(self):
+        with mock.patch.object(extraction_cache, "EXTRACTION_CACHE_REDIS_TTL", 0):
+            with mock.patch.object(extraction_cache, "_cache", self.api_host):
+                extraction_cache.set_extracted_text("v1-abc", "python django")
+            with mock.patch.object(extraction_cache, "_cache", self.worker_host):
+                self.assertIsNone(extraction_cache.get_extracted_text("v1-abc"))
+        self.assertIsNone(self.redis.get("extracted_text:v1-abc"))
+
+
+class BlobStoreTests(FakeRedisMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.directory = temp_dir(self)
+        for patcher in (
+            mock.patch.object(blob_store, "UPLOAD_BLOB_DIR", self.directory),
+            mock.patch.object(blob_store, "_marker_checked", False),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _put(self, content=b"%PDF-1.4 resume"):
+        return blob_store.put_upload(ContentFile(content, name="cv.PDF"))
+
+    def test_identical_uploads_get_separate_blobs(self):
+        first, second = self._put(), self._put()
+
+        self.assertNotEqual(first, second)
+        self.assertEqual(first[:64], second[:64])
+        self.assertTrue(first.endswith(".pdf"))
+
+        # One task finishing doesn't remove the other upload's file
+        blob_store.release_blob(first)
+        with blob_store.open_blob(second, "cv.pdf") as blob:
+            self.assertEqual(blob.read(), b"%PDF-1.4 resume")
+            self.assertEqual(blob.sha256, second[:64])
+
+    def test_released_blob_is_not_found(self):
+        key = self._put()
+        blob_store.release_blob(key)
+        with self.assertRaises(BlobNotFoundError) as ctx:
+            blob_store.open_blob(key)
+        self.assertNotIsInstance(ctx.exception, BlobNotSharedError)
+
+    def test_worker_with_its_own_directory_fails_fast(self):
+        key = self._put()
+        self.assertTrue(blob_store.is_upload_dir_shared())
+
+        with mock.patch.object(blob_store, "UPLOAD_BLOB_DIR", temp_dir(self)):
+            self.assertFalse(blob_store.is_upload_dir_shared())
+            with self.assertRaises(BlobNotSharedError):
+                blob_store.open_blob(key)
+
+    def test_unknown_before_first_upload(self):
+        self.assertIsNone(blob_store.is_upload_dir_shared())
+
+    def test_expired_blobs_are_purged_but_not_the_marker(self):
+        key = self._put()
+        os.utime(os.path.join(self.directory, key), (0, 0))
+
+        self.assertEqual(blob_store.purge_expired_blobs(ttl=60), 1)
+        self.assertTrue(blob_store.is_upload_dir_shared())
+
+    def test_deprecated_task_stores_blob_and_replaces_itself_with_pipeline(self):
+        content = base64.b64encode(b"%PDF-1.4 resume").decode()
+        with mock.patch.object(task.process_resume_task, "replace", side_effect=lambda sig: sig) as replace:
+            signature = task.process_resume_task.run(content, "cv.pdf")
+
+        replace.assert_called_once()
+        blob_key, filename, _ = signature.tasks[0].args
+        self.assertEqual(filename, "cv.pdf")
+        self.assertEqual(signature.tasks[1].name, task.analyze_resume_text_task.name)
+        with blob_store.open_blob(blob_key) as blob:
+            self.assertEqual(blob.read(), b"%PDF-1.4 resume")
+
+
+class TaskDeliveryTests(FakeRedisMixin, SimpleTestCase):
+    def test_only_idempotent_tasks_are_acked_late(self):
+        self.assertTrue(task.analyze_ats_task.acks_late)
+        self.assertTrue(task.analyze_ats_task.reject_on_worker_lost)
+        self.assertFalse(task.extract_resume_text_task.acks_late)
+        self.assertFalse(task.process_resume_task.acks_late)
+
+    def _deliver(self, retries=0):
+        analyze = task.analyze_resume_text_task._get_current_object()
+        analyze.push_request(id="task-1", retries=retries, is_eager=False)
+        try:
+            return analyze("text")
+        finally:
+            analyze.pop_request()
+
+    def test_redeliveries_are_capped(self):
+        with mock.patch.object(task, "analyze_resume_text", return_value={"name": "A"}):
+            for _ in range(3):  # first delivery and two redeliveries
+                self.assertEqual(self._deliver(), {"result": {"name": "A"}})
+            with self.assertRaises(TaskRedeliveryLimitExceeded):
+                self._deliver()
+
+            # A retry is a new message, not a redelivery
+            self.assertEqual(self._deliver(retries=1), {"result": {"name": "A"}})
+
+
+class AtsAnalyzeViewTests(AtsAnalysisTestCase):
+    url = "/api/v1/cv/analyze-ats/"
+
+    def setUp(self):
+        super().setUp()
+        self.pdf = make_pdf()
+        self.rate_limit = mock.Mock(return_value=(True, {"remaining_today": 9}))
+        patcher = mock.patch.object(resume_analysis_view, "enforce_rate_limit", self.rate_limit)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _post(self, **data):
+        return self.client.post(self.url, {
+            "cv_file": SimpleUploadedFile("cv.pdf", self.pdf, content_type="application/pdf"),
+            "job_description": JD,
+            **data,
+        })
+
+    def test_async_mode_queues_blob_and_returns_status_url(self):
+        with mock.patch.object(resume_analysis_view.analyze_ats_task, "delay",
+                               return_value=SimpleNamespace(id="task-1")) as delay:
+            response = self._post(**{"async": "true"})
+
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.json()["status_url"], "/api/v1/cv/task-status/task-1/")
+        self.assertTrue(response.json()["rate_limit"]["quota_used"])
+        blob_key, filename, _, job_description, force_refresh = delay.call_args.args
+        self.assertEqual(blob_key[:64], hashlib.sha256(self.pdf).hexdigest())
+        self.assertEqual((filename, job_description, force_refresh), ("cv.pdf", JD, False))
+        self.rate_limit.assert_called_once()
+
+    def test_file_analyzed_by_a_worker_is_served_without_extraction_or_quota(self):
+        # What analyze_ats_task does with the uploaded blob
+        key = blob_store.put_upload(ContentFile(self.pdf, name="cv.pdf"))
+        with blob_store.open_blob(key, "cv.pdf") as blob:
+            computed = ai_checker_resume_service.analyze_cv_vs_jd(blob, JD)
+
+        with mock.patch.object(extract_text, "_extract") as extract, \
+                mock.patch.object(extract_text, "read_text_layer") as read_layer:
+            response = self._post(**{"async": "true"})
+
+        self.assertEqual(response.status_code, 200)
+        body = response.json()
+        self.assertEqual(body["cache"]["match"], "file")
+        self.assertEqual(body["summary"], computed["summary"])
+        self.assertFalse(body["rate_limit"]["quota_used"])
+        extract.assert_not_called()
+        read_layer.assert_not_called()
+        self.rate_limit.assert_not_called()
+        self.assertEqual(self.model.calls, 1)
+
+    def test_other_job_description_is_not_a_hit(self):
+        ai_checker_resume_service.analyze_cv_vs_jd(ContentFile(self.pdf, name="cv.pdf"), JD)
+
+        self.assertIsNone(ai_checker_resume_service.try_get_cached_result(
+            ContentFile(self.pdf, name="cv.pdf"), "Frontend Developer with React and TypeScript experience."))
+        self.assertIsNotNone(ai_checker_resume_service.try_get_cached_result(
+            ContentFile(self.pdf, name="cv.pdf"), "  backend developer with python, django, docker and kubernetes experience. "))
+
+
+class SingleFlightTests(FakeRedisMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(single_flight_module, "SINGLE_FLIGHT_POLL_SECONDS", 0.01)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def _follow(self, compute, **kwargs):
+        """Run a second caller in a thread once the leader holds the lock"""
+        outcome = {}
+
+        def follower():
+            outcome["value"] = single_flight("test", "key", compute, wait_timeout=5, **kwargs)
+
+        thread = threading.Thread(target=follower)
+        thread.start()
+        return thread, outcome
+
+    def _lead(self, result=None, error=None, follower_compute=None, **kwargs):
+        release = threading.Event()
+        follower_compute = follower_compute or mock.Mock(return_value={"from": "follower"})
+        threads = []
+
+        def compute():
+            threads.append(self._follow(follower_compute, **kwargs))
+            # Follower is subscribed and waiting before the leader finishes
+            release.wait(0.2)
+            if error:
+                raise error
+            return result
+
+        try:
+            leader = single_flight("test", "key", compute, **kwargs)
+        except Exception as e:
+            leader = e
+        thread, outcome = threads[0]
+        thread.join(5)
+        return leader, outcome["value"], follower_compute
+
+    def test_concurrent_callers_share_one_computation(self):
+        leader, follower, follower_compute = self._lead(result={"answer": 42})
+
+        self.assertEqual(leader, ({"answer": 42}, False))
+        self.assertEqual(follower, ({"answer": 42}, True))
+        follower_compute.assert_not_called()
+
+    def test_follower_takes_over_when_leader_fails(self):
+        leader, follower, follower_compute = self._lead(error=RuntimeError("model down"))
+
+        self.assertIsInstance(leader, RuntimeError)
+        self.assertEqual(follower, ({"from": "follower"}, False))
+        follower_compute.assert_called_once()
+
+    def test_unshareable_result_is_not_published(self):
+        shareable = lambda result: "error_details" not in result
+        leader, follower, follower_compute = self._lead(result={"error_details": {}}, shareable=shareable)
+
+        self.assertEqual(leader, ({"error_details": {}}, False))
+        self.assertEqual(follower, ({"from": "follower"}, False))
+        # The slot holds the follower's result, never the leader's
+        self.assertEqual(json.loads(self.redis.get("singleflight:test:key:result")), {"from": "follower"})
+
+    def test_computes_directly_without_redis(self):
+        with mock.patch.object(single_flight_module, "get_shared_redis_client", return_value=None):
+            self.assertEqual(single_flight("test", "key", lambda: 1), (1, False))
+
+
+class AtsApiErrorTests(AtsAnalysisTestCase):
+    def test_api_error_placeholder_is_not_cached(self):
+        self.model.invoke = mock.Mock(side_effect=RuntimeError("rate limited"))
+        cv = ContentFile(make_pdf(), name="cv.pdf")
+
+        failed = ai_checker_resume_service.analyze_cv_vs_jd(cv, JD)
+        self.assertEqual(failed["error_details"]["error_type"], "RuntimeError")
+        self.assertIsNone(ai_checker_resume_service.try_get_cached_result(cv, JD))
+
+        # The next request calls the model again
+        del self.model.invoke
+        result = ai_checker_resume_service.analyze_cv_vs_jd(cv, JD)
+        self.assertNotIn("error_details", result)
+        self.assertEqual(self.model.calls, 1)
+
+
+class GatedModel(FakeModel):
+    """Streams up to the end of the summary, then waits for the gate before the rest"""
+
+    def __init__(self):
+        super().__init__()
+        self.gate = threading.Event()
+
+    def stream(self, prompt):
+        self.calls += 1
+        cut = self.text.index('"content"')
+        yield SimpleNamespace(content=self.text[:cut])
+        self.gate.wait(5)
+        yield SimpleNamespace(content=self.text[cut:])
+
+
+def parse_sse(chunk) -> tuple:
+    event, data = chunk.decode().strip().split("\n", 1)
+    return event.removeprefix("event: "), json.loads(data.removeprefix("data: "))
+
+
+class AtsStreamViewTests(AtsAnalysisTestCase):
+    url = "/api/v1/cv/analyze-ats/stream/"
+
+    def setUp(self):
+        super().setUp()
+        self.model = GatedModel()
+        self.pdf = make_pdf()
+        self.rate_limit = mock.Mock(return_value=(True, {"remaining_today": 9}))
+        patcher = mock.patch.object(resume_analysis_view, "enforce_rate_limit", self.rate_limit)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def _post(self):
+        return await self.async_client.post(self.url, {
+            "cv_file": SimpleUploadedFile("cv.pdf", self.pdf, content_type="application/pdf"),
+            "job_description": JD,
+        })
+
+    async def test_sections_are_sent_before_the_model_finishes(self):
+        response = await self._post()
+        self.assertEqual(response["Content-Type"], "text/event-stream")
+        events = aiter(response.streaming_content)
+
+        received = []
+        while not received or received[-1] != ("section", "summary"):
+            event, data = parse_sse(await anext(events))
+            received.append((event, data["name"]))
+        # Local checks first, then the summary while the model is still streaming
+        self.assertEqual(received, [("section", "format"), ("section", "sections"), ("section", "summary")])
+        self.assertFalse(self.model.gate.is_set())
+
+        self.model.gate.set()
+        rest = [parse_sse(chunk) async for chunk in events]
+        event, done = rest[-1]
+        self.assertEqual(event, "done")
+        self.assertTrue(done["rate_limit"]["quota_used"])
+        self.assertLessEqual({"content", "skills", "style", "recommendations", "overall_score"},
+                             {data["name"] for _, data in rest[:-1]})
+
+    async def test_cached_result_is_replayed_without_quota(self):
+        self.model.gate.set()
+        first = await self._post()
+        [chunk async for chunk in first.streaming_content]
+
+        second = await self._post()
+        events = [parse_sse(chunk) async for chunk in second.streaming_content]
+        event, done = events[-1]
+        self.assertEqual(event, "done")
+        self.assertFalse(done["rate_limit"]["quota_used"])
+        self.assertEqual(done["cache"]["match"], "file")
+        self.assertEqual(self.model.calls, 1)
+        self.rate_limit.assert_called_once()
+
+
+class AtsStreamSingleFlightTests(AtsAnalysisTestCase):
+    def setUp(self):
+        super().setUp()
+        self.model = GatedModel()
+
+    def test_plain_request_shares_the_streamed_analysis(self):
+        cv = ContentFile(make_pdf(), name="cv.pdf")
+        stream = ai_checker_resume_service.stream_cv_vs_jd(cv, JD)
+        # Leader holds the flight once the local sections are out
+        self.assertEqual(next(stream)[1]["name"], "format")
+
+        outcome = {}
+        follower = threading.Thread(target=lambda: outcome.update(
+            result=ai_checker_resume_service.analyze_cv_vs_jd(ContentFile(make_pdf(), name="cv.pdf"), JD)))
+        follower.start()
+        # Open the gate once the follower waits on the flight's channel
+        for _ in range(500):
+            if self.redis.pubsub_channels("singleflight:ai_cv_analysis:*"):
+                break
+            time.sleep(0.01)
+        self.model.gate.set()
+        streamed = list(stream)
+        follower.join(5)
+
+        self.assertEqual(streamed[-1][0], "done")
+        self.assertEqual(outcome["result"]["cache"]["match"], "in_flight")
+        self.assertEqual(self.model.calls, 1)
+
+
+class JSONSectionParserTests(SimpleTestCase):
+    def _feed(self, text, size):
+        parser = JSONSectionParser()
+        sections = []
+        for i in range(0, len(text), size):
+            sections.extend(parser.feed(text[i:i + size]))
+        return parser, sections
+
+    def test_sections_in_any_chunking(self):
+        text = 'Here is the JSON:\n```json\n' + json.dumps(MODEL_OUTPUT) + '\n```'
+        for size in (1, 7, len(text)):
+            parser, sections = self._feed(text, size)
+            self.assertEqual(sections, list(MODEL_OUTPUT.items()))
+            self.assertTrue(parser.closed)
+
+    def test_section_is_emitted_when_its_value_closes(self):
+        parser = JSONSectionParser()
+        self.assertEqual(parser.feed('{"summary": {"a": [1, {"b": 2}]}'), [])
+        self.assertEqual(parser.feed(', "sty'), [("summary", {"a": [1, {"b": 2}]})])
+        self.assertEqual(parser.feed('le": 3}'), [("style", 3)])
+
+    def test_braces_commas_and_escapes_inside_strings(self):
+        value = 'uses "{", "}" and ", " \\ in text'
+        _, sections = self._feed(json.dumps({"comment": value, "n": 1}), 3)
+        self.assertEqual(sections, [("comment", value), ("n", 1)])
+
+    def test_malformed_member_is_skipped_and_trailing_text_ignored(self):
+        parser = JSONSectionParser()
+        sections = parser.feed('{"a": 1, "b": oops, "c": [2]} {"d": 4}')
+        self.assertEqual(sections, [("a", 1), ("c", [2])])
+        self.assertEqual(parser.feed('{"e": 5}'), [])
+
+
+class AtsLocalChecksTests(SimpleTestCase):
+    def test_well_formed_resume(self):
+        checks = ats_local_checks.run_local_checks({"lines": CV_LINES, "pages": 1}, JD)
+
+        self.assertEqual(checks["format"]["checks"], {"date_format": "PASS", "length": "FAIL", "bullet_points": "PASS"})
+        self.assertEqual(checks["format"]["measured"]["date_styles"], ["month_name"])
+        self.assertEqual(checks["format"]["measured"]["bullet_lines"], 3)
+        self.assertEqual(checks["sections"]["missing"], [])
+        self.assertEqual(checks["sections"]["score"], 100)
+        self.assertEqual(checks["skills"]["technical"], {"matched": ["Django", "Docker", "Python"], "missing": ["Kubernetes"]})
+        self.assertEqual(checks["skills"]["score"], 75)
+
+    def test_mixed_date_formats_and_missing_sections(self):
+        lines = ["Work", "Developer 01/2020 - Mar 2022", "Built things", *["word " * 50] * 5]
+        checks = ats_local_checks.run_local_checks({"lines": lines, "pages": None}, JD)
+
+        self.assertEqual(checks["format"]["checks"]["date_format"], "FAIL")
+        self.assertEqual(checks["format"]["checks"]["bullet_points"], "FAIL")
+        self.assertEqual(checks["format"]["checks"]["length"], "PASS")
+        self.assertTrue(checks["format"]["measured"]["pages_estimated"])
+        self.assertEqual(checks["format"]["score"], 100 - 2 * ats_local_checks.FAIL_PENALTY)
+        self.assertEqual(checks["sections"]["missing"], ["contact", "summary", "experience", "education", "skills"])
+
+    def test_year_ranges_are_not_a_phone_number(self):
+        self.assertFalse(ats_local_checks._has_phone("2019 - 2021 2022"))
+        self.assertTrue(ats_local_checks._has_phone("Phone: +84 912 345 678"))
+
+    def test_scanned_document_is_left_to_the_model(self):
+        self.assertIsNone(ats_local_checks.run_local_checks(None, JD))
+
+
+class TextLayerTests(FakeRedisMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        patcher = mock.patch.object(extraction_cache, "_cache", LRUFileCache(temp_dir(self), max_bytes=100_000))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_text_and_layer_come_from_one_pass_then_the_cache(self):
+        cv = ContentFile(make_pdf(), name="cv.pdf")
+        with mock.patch.object(extract_text.fitz, "open", wraps=fitz.open) as pdf_open:
+            text, layer = extract_text.extract_text_and_layer_cached(cv, budget=2000)
+            self.assertEqual(pdf_open.call_count, 1)
+
+            self.assertEqual(extract_text.extract_text_and_layer_cached(cv, budget=2000), (text, layer))
+            self.assertEqual(pdf_open.call_count, 1)
+        self.assertEqual(layer["pages"], 1)
+        # Case, digits and punctuation kept (the base font renders "•" as "·")
+        self.assertEqual(layer["lines"][:6], CV_LINES[:6])
+        self.assertIn("django", text)
+
+    def test_layer_is_read_alone_when_only_the_text_is_cached(self):
+        cv = ContentFile(make_pdf(), name="cv.pdf")
+        text = extract_text.extract_text_cached(cv, budget=2000)
+        with mock.patch.object(extract_text, "_ocr_pages") as ocr:
+            self.assertEqual(extract_text.extract_text_and_layer_cached(cv, budget=2000)[0], text)
+        ocr.assert_not_called()
+
+    def test_pdf_without_text_layer_has_no_layer(self):
+        cv = ContentFile(make_pdf(lines=[]), name="scan.pdf")
+        self.assertIsNone(extract_text.extract_text_and_layer_cached(cv)[1])
+        # Cached as "no layer", not as a miss
+        with mock.patch.object(extract_text, "read_text_layer") as read_layer:
+            self.assertIsNone(extract_text.extract_text_and_layer_cached(cv)[1])
+        read_layer.assert_not_called()
+
+
+class AtsCacheKeyTests(AtsAnalysisTestCase):
+    def test_resumes_differing_after_the_prompt_summary_are_analyzed_separately(self):
+        first_page = [f"Python Django engineer line {i} building reliable backend services" for i in range(45)]
+        with_skills = ContentFile(make_two_page_pdf(first_page, ["Skills", "Kubernetes, Docker"]), name="a.pdf")
+        without = ContentFile(make_two_page_pdf(first_page, ["Hobbies", "Chess"]), name="b.pdf")
+
+        first = ai_checker_resume_service.analyze_cv_vs_jd(with_skills, JD)
+        second = ai_checker_resume_service.analyze_cv_vs_jd(without, JD)
+
+        self.assertEqual(self.model.calls, 2)
+        self.assertNotEqual(first["token_usage"]["cache"]["key"], second["token_usage"]["cache"]["key"])
+        self.assertIn("Kubernetes", first["skills"]["technical"]["matched"])
+        self.assertIn("Kubernetes", second["skills"]["technical"]["missing"])
+
+
+LONG_JD = (
+    "We are hiring a Backend Developer to design, build and operate Python and Django services. "
+    "You will own REST APIs, PostgreSQL schemas, Celery background jobs and Redis caching, "
+    "deploy with Docker and Kubernetes, and work closely with product and frontend teams."
+)
+PROJECT_LINES = [
+    f"• Project {i}: delivered a Django service for billing, search and reporting with Celery workers"
+    for i in range(8)
+]
+
+
+class SimHashTests(FakeRedisMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.cv = "\n".join(CV_LINES + PROJECT_LINES)
+        self.index = SimHashIndex("test", ttl=60)
+
+    def test_key_text_ignores_case_spacing_and_unicode_forms(self):
+        self.assertEqual(canonical_key_text("Python  Developer\r\n\n  ＤＪＡＮＧＯ "), canonical_key_text("python developer django"))
+
+    def test_short_text_has_no_fingerprint(self):
+        self.assertIsNone(simhash64(JD))
+        self.assertIsNotNone(simhash64(LONG_JD))
+
+    def test_one_edited_word_stays_similar(self):
+        edited = simhash64(self.cv.replace("billing", "invoicing", 1))
+        self.assertGreaterEqual(simhash_similarity(simhash64(self.cv), edited), 0.95)
+        self.assertLess(simhash_similarity(simhash64(self.cv), simhash64(LONG_JD)), 0.95)
+
+    def _find_after_add(self):
+        cv_hash, jd_hash = simhash64(self.cv), simhash64(LONG_JD)
+        self.index.add("scope-a", "key-1", cv_hash, jd_hash)
+        edited = simhash64(self.cv.replace("billing", "invoicing", 1))
+        return (
+            self.index.find("scope-a", edited, jd_hash, 0.95),
+            self.index.find("scope-b", edited, jd_hash, 0.95),
+            self.index.find("scope-a", edited, simhash64(self.cv), 0.95),
+        )
+
+    def test_find_matches_within_scope_when_both_texts_are_similar(self):
+        same_scope, other_scope, other_jd = self._find_after_add()
+
+        self.assertEqual([key for key, _, _ in same_scope], ["key-1"])
+        self.assertEqual(other_scope, [])
+        self.assertEqual(other_jd, [])
+        self.assertTrue(self.redis.keys("test:simhash:scope-a:*"))
+
+    def test_local_index_without_redis(self):
+        with mock.patch("apps.cv_analysis_agent.utils.text_fingerprint.get_shared_redis_client", return_value=None):
+            same_scope, other_scope, _ = self._find_after_add()
+
+        self.assertEqual([key for key, _, _ in same_scope], ["key-1"])
+        self.assertEqual(other_scope, [])
+        self.assertEqual(self.redis.keys("test:simhash:*"), [])
+
+
+class NearDuplicateAnalysisTests(AtsAnalysisTestCase):
+    def setUp(self):
+        super().setUp()
+        for patcher in (
+            mock.patch.object(ai_checker_resume_service, "NEAR_DUPLICATE_ENABLED", True),
+            mock.patch.object(ai_checker_resume_service, "_near_duplicates", SimHashIndex("ai_cv_analysis", ttl=60)),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def test_near_duplicate_resume_reuses_the_stored_analysis(self):
+        lines = CV_LINES + PROJECT_LINES
+        edited = [line.replace("billing", "invoicing") if line.startswith("• Project 3") else line for line in lines]
+
+        first = ai_checker_resume_service.analyze_cv_vs_jd(ContentFile(make_pdf(lines), name="a.pdf"), LONG_JD)
+        second = ai_checker_resume_service.analyze_cv_vs_jd(ContentFile(make_pdf(edited), name="b.pdf"), LONG_JD)
+
+        self.assertEqual(self.model.calls, 1)
+        self.assertEqual(second["cache"]["match"], "near_duplicate")
+        self.assertEqual(second["cache"]["matched_key"], first["token_usage"]["cache"]["key"])
+        self.assertNotEqual(second["cache"]["key"], second["cache"]["matched_key"])
@@ -0,0 +1,214 @@
+"""
+Blob store for uploaded resumes.
+
+Uploads are streamed to UPLOAD_BLOB_DIR under `<sha256>-<upload id><ext>` and
+only that key is sent through the Celery broker; the worker opens the file by
+path. The API and the workers must therefore see the same directory: the
+upload_blobs volume in compose.yaml, or one Cloud Storage bucket mounted with
+Cloud Storage FUSE on Cloud Run and on the worker hosts (DEPLOYMENT_GUIDE.md).
+
+Every API process checks that a marker file whose token is published in Redis
+is present in its directory (writing one otherwise). A worker that can't find
+a blob looks for the same marker and raises BlobNotSharedError when its
+directory is not the API's, so the task fails at once instead of retrying.
+
+Every upload gets its own key (identical uploads are separate files), so a
+task deletes its blob when done without racing a re-upload of the same
+content. The key starts with the SHA-256 of the content, which the extraction
+cache uses. Anything left behind (failed tasks, lost messages) is purged after
+UPLOAD_BLOB_TTL seconds.
+"""
+import hashlib
+import logging
+import os
+import re
+import tempfile
+import time
+import uuid
+
+from agent_core.utils.redis_client import get_shared_redis_client
+
+logger = logging.getLogger(__name__)
+
+UPLOAD_BLOB_DIR = os.getenv("UPLOAD_BLOB_DIR", "/tmp/uploads")
+UPLOAD_BLOB_TTL = int(os.getenv("UPLOAD_BLOB_TTL", "3600"))  # 1 hour default
+
+_CHUNK_SIZE = 1024 * 1024
+# `<sha256><ext>` keys were content-addressed only (queued before per-upload keys)
+_KEY_RE = re.compile(r"^[0-9a-f]{64}(-[0-9a-f]{16})?(\.[a-z0-9]{1,8})?$")
+
+SHARED_CHECK_KEY = "upload_blobs:shared_check"
+_MARKER_PREFIX = ".shared-check-"
+_marker_checked = False
+
+
+class BlobNotFoundError(FileNotFoundError):
+    """The blob is gone (purged, released) or was never visible to this process"""
+
+
+class BlobNotSharedError(BlobNotFoundError):
+    """UPLOAD_BLOB_DIR here is not the directory the API writes to"""
+
+
+def _blob_path(key: str) -> str:
+    if not _KEY_RE.match(key):
+        raise ValueError(f"Invalid blob key: {key!r}")
+    return os.path.join(UPLOAD_BLOB_DIR, key)
+
+
+def _marker_path(token: str) -> str:
+    return os.path.join(UPLOAD_BLOB_DIR, f"{_MARKER_PREFIX}{token}")
+
+
+def _ensure_marker():
+    """API side, once per process: make sure the published marker is in our directory"""
+    global _marker_checked
+    if _marker_checked:
+        return
+    r = get_shared_redis_client()
+    if r is None:
+        return
+    try:
+        token = r.get(SHARED_CHECK_KEY)
+        if not token or not os.path.exists(_marker_path(token)):
+            # First API process, or the directory was recreated (new container, wiped /tmp)
+            token = uuid.uuid4().hex
+            with open(_marker_path(token), "w") as f:
+                f.write(str(time.time()))
+            r.set(SHARED_CHECK_KEY, token)
+        _marker_checked = True
+    except Exception as e:
+        logger.warning(f"Upload directory marker failed: {e}")
+
+
+def is_upload_dir_shared():
+    """
+    Whether this process sees the API's UPLOAD_BLOB_DIR
+
+    Returns:
+        bool or None: None when it can't be told (no Redis, or no API upload yet)
+    """
+    r = get_shared_redis_client()
+    if r is None:
+        return None
+    try:
+        token = r.get(SHARED_CHECK_KEY)
+    except Exception as e:
+        logger.warning(f"Upload directory check failed: {e}")
+        return None
+    if not token:
+        return None
+    return os.path.exists(_marker_path(token))
+
+
+def put_upload(file) -> str:
+    """
+    Stream an uploaded file into the store
+
+    Returns:
+        str: Blob key (`<sha256>-<upload id><ext>`, the extension taken from the file name)
+    """
+    os.makedirs(UPLOAD_BLOB_DIR, exist_ok=True)
+    _ensure_marker()
+    ext = os.path.splitext(file.name or "")[1].lower()
+    ext = ext if re.fullmatch(r"\.[a-z0-9]{1,8}", ext) else ""
+
+    if hasattr(file, "seek"):
+        file.seek(0)
+    digest = hashlib.sha256()
+    fd, tmp = tempfile.mkstemp(dir=UPLOAD_BLOB_DIR, suffix=".part")
+    try:
+        with os.fdopen(fd, "wb") as out:
+            chunks = file.chunks(_CHUNK_SIZE) if hasattr(file, "chunks") else iter(lambda: file.read(_CHUNK_SIZE), b"")
+            for chunk in chunks:
+                digest.update(chunk)
+                out.write(chunk)
+
+        key = f"{digest.hexdigest()}-{uuid.uuid4().hex[:16]}{ext}"
+        os.replace(tmp, _blob_path(key))
+        return key
+    except Exception:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+        raise
+
+
+class BlobFile:
+    """Read-only file object for a stored blob (what extract_text expects)"""
+
+    def __init__(self, key: str, name: str = None):
+        self.key = key
+        self.path = _blob_path(key)
+        self.name = name or key
+        # Key starts with the SHA-256 of the content, so the extraction cache need not rehash
+        self.sha256 = key[:64]
+        try:
+            self._file = open(self.path, "rb")
+        except FileNotFoundError:
+            if is_upload_dir_shared() is False:
+                raise BlobNotSharedError(
+                    f"Blob {key} not found: UPLOAD_BLOB_DIR ({UPLOAD_BLOB_DIR}) is not shared with the API"
+                ) from None
+            raise BlobNotFoundError(f"Blob {key} not found (expired or already released)") from None
+
+    def read(self, size=-1):
+        return self._file.read(size)
+
+    def seek(self, pos, whence=0):
+        return self._file.seek(pos, whence)
+
+    def chunks(self, chunk_size=_CHUNK_SIZE):
+        self._file.seek(0)
+        yield from iter(lambda: self._file.read(chunk_size), b"")
+
+    def close(self):
+        self._file.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_blob(key: str, name: str = None) -> BlobFile:
+    return BlobFile(key, name)
+
+
+def release_blob(key: str, uploaded_at: float = None):
+    """
+    Delete a blob after its task finished
+
+    Args:
+        uploaded_at: only used for content-addressed keys queued before
+                     per-upload keys, which are kept when uploaded again later
+    """
+    try:
+        path = _blob_path(key)
+        if "-" in key or uploaded_at is None or os.path.getmtime(path) <= uploaded_at:
+            os.remove(path)
+    except FileNotFoundError:
+        pass
+    except Exception as e:
+        logger.warning(f"Blob release failed for {key}: {e}")
+
+
+def purge_expired_blobs(ttl: int = UPLOAD_BLOB_TTL) -> int:
+    """Remove blobs (and stale partial uploads) older than ttl seconds; returns the count"""
+    if not os.path.isdir(UPLOAD_BLOB_DIR):
+        return 0
+    cutoff = time.time() - ttl
+    removed = 0
+    with os.scandir(UPLOAD_BLOB_DIR) as it:
+        for entry in it:
+            if not entry.is_file():
+                continue
+            if not (_KEY_RE.match(entry.name) or entry.name.endswith(".part")):
+                continue
+            try:
+                if entry.stat().st_mtime < cutoff:
+                    os.remove(entry.path)
+                    removed += 1
+            except FileNotFoundError:
+                pass
+    return removed
@@ -0,0 +1,191 @@
+"""
+Content-addressed cache of extracted resume text.
+
+Entries are keyed by the SHA-256 of the raw uploaded bytes, so the same file
+uploaded again (or analyzed by several code paths) skips PyMuPDF and OCR.
+Texts are stored as files under EXTRACTION_CACHE_DIR; the directory is kept
+under EXTRACTION_CACHE_MAX_BYTES by evicting the least recently used entries
+(hits refresh the file mtime).
+
+The directory is local to one host, so texts are also kept in Redis for
+EXTRACTION_CACHE_REDIS_TTL seconds: a file extracted by the API (sync path)
+is a hit for the Celery worker that analyzes it, and the other way round.
+"""
+import hashlib
+import logging
+import os
+import threading
+from typing import Optional
+
+from agent_core.utils.metrics import record_cache
+from agent_core.utils.redis_client import get_shared_redis_client
+
+logger = logging.getLogger(__name__)
+
+EXTRACTION_CACHE_DIR = os.getenv(
+    "EXTRACTION_CACHE_DIR",
+    os.path.join(os.path.dirname(__file__), "../../../.cache/extracted_text"),
+)
+EXTRACTION_CACHE_MAX_BYTES = int(os.getenv("EXTRACTION_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))  # 256 MB
+# Bump when extraction logic changes so old texts are not served
+EXTRACTION_CACHE_VERSION = os.getenv("EXTRACTION_CACHE_VERSION", "v1")
+EXTRACTION_CACHE_REDIS_TTL = int(os.getenv("EXTRACTION_CACHE_REDIS_TTL", str(24 * 3600)))  # 0 = local disk only
+
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+
+def file_sha256(file) -> str:
+    """SHA-256 of an uploaded file's bytes; the file position is reset to 0"""
+    digest = hashlib.sha256()
+    if hasattr(file, "seek"):
+        file.seek(0)
+    if hasattr(file, "chunks"):
+        for chunk in file.chunks(_HASH_CHUNK_SIZE):
+            digest.update(chunk)
+    else:
+        for chunk in iter(lambda: file.read(_HASH_CHUNK_SIZE), b""):
+            digest.update(chunk)
+    if hasattr(file, "seek"):
+        file.seek(0)
+    return digest.hexdigest()
+
+
+class LRUFileCache:
+    """
+    Size-bounded text cache on disk, evicting least recently used files
+
+    The directory size is tracked incrementally from this process's writes;
+    it is only scanned (and evicted down to LOW_WATERMARK of max_bytes) when
+    the estimate passes max_bytes, or every RESCAN_WRITES writes to account
+    for other processes writing to the same directory.
+    """
+
+    LOW_WATERMARK = 0.9
+    RESCAN_WRITES = 256
+
+    def __init__(self, directory: str, max_bytes: int, suffix: str = ".txt"):
+        self.directory = os.path.abspath(directory)
+        self.max_bytes = max_bytes
+        self.suffix = suffix
+        self._lock = threading.Lock()
+        self._approx_bytes = None  # unknown until the first scan
+        self._writes_since_scan = 0
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}{self.suffix}")
+
+    def get(self, key: str) -> Optional[str]:
+        path = self._path(key)
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                value = f.read()
+            os.utime(path)  # mark as recently used
+            return value
+        except FileNotFoundError:
+            return None
+        except Exception as e:
+            logger.warning(f"Extraction cache read failed: {e}")
+            return None
+
+    def set(self, key: str, value: str):
+        if self.max_bytes <= 0:
+            return
+        try:
+            os.makedirs(self.directory, exist_ok=True)
+            path = self._path(key)
+            try:
+                replaced = os.stat(path).st_size
+            except FileNotFoundError:
+                replaced = 0
+            tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                f.write(value)
+            os.replace(tmp, path)
+            self._account(os.stat(path).st_size - replaced)
+        except Exception as e:
+            logger.warning(f"Extraction cache write failed: {e}")
+
+    def _account(self, delta: int):
+        with self._lock:
+            self._writes_since_scan += 1
+            if self._approx_bytes is not None:
+                self._approx_bytes += delta
+            if (
+                self._approx_bytes is None
+                or self._approx_bytes > self.max_bytes
+                or self._writes_since_scan >= self.RESCAN_WRITES
+            ):
+                self._evict()
+
+    def _scan(self):
+        entries, total = [], 0
+        with os.scandir(self.directory) as it:
+            for entry in it:
+                if entry.name.endswith(self.suffix) and entry.is_file():
+                    stat = entry.stat()
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+                    total += stat.st_size
+        return entries, total
+
+    def _evict(self):
+        """Scan the directory and evict down to the low watermark when over max_bytes (lock held)"""
+        entries, total = self._scan()
+        if total > self.max_bytes:
+            target = self.max_bytes * self.LOW_WATERMARK
+            for _, size, path in sorted(entries):
+                try:
+                    os.remove(path)
+                except FileNotFoundError:
+                    pass
+                total -= size
+                if total <= target:
+                    break
+        self._approx_bytes = total
+        self._writes_since_scan = 0
+
+
+_cache = LRUFileCache(EXTRACTION_CACHE_DIR, EXTRACTION_CACHE_MAX_BYTES)
+
+
+def extraction_cache_key(content_hash: str, variant: str = None) -> str:
+    """Cache key of a file's text; `variant` separates partial (budgeted) extractions"""
+    key = f"{EXTRACTION_CACHE_VERSION}-{content_hash}"
+    return f"{key}-{variant}" if variant else key
+
+
+def _redis_key(key: str) -> str:
+    return f"extracted_text:{key}"
+
+
+def get_extracted_text(key: str) -> Optional[str]:
+    """Local disk first, then Redis (a hit there is copied to disk)"""
+    text = _cache.get(key)
+    record_cache("extracted_text_file", text is not None)
+    if text is not None or EXTRACTION_CACHE_REDIS_TTL <= 0:
+        return text
+
+    r = get_shared_redis_client()
+    if r is None:
+        return None
+    try:
+        text = r.get(_redis_key(key))
+    except Exception as e:
+        logger.warning(f"Extraction cache read failed (redis): {e}")
+        return None
+    record_cache("extracted_text_redis", text is not None)
+    if text is not None:
+        _cache.set(key, text)
+    return text
+
+
+def set_extracted_text(key: str, text: str):
+    _cache.set(key, text)
+    if EXTRACTION_CACHE_REDIS_TTL <= 0:
+        return
+    r = get_shared_redis_client()
+    if r is None:
+        return
+    try:
+        r.set(_redis_key(key), text, ex=EXTRACTION_CACHE_REDIS_TTL)
+    except Exception as e:
+        logger.warning(f"Extraction cache write failed (redis): {e}")
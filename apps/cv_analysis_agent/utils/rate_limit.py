@@ -11,24 +11,9 @@ except Exception:  # pragma: no cover
 from django.conf import settings
 from django.utils import timezone
 
-logger = logging.getLogger(__name__)
-
-
-def _get_redis_url() -> str:
-    """Get Redis URL, prioritizing REDIS_URL for production."""
-    redis_url = os.getenv("REDIS_URL")
-    if redis_url:
-        return redis_url
+from agent_core.utils.redis_client import get_redis_url as _get_redis_url
 
-    # Fallback to constructing URL from individual vars (local dev)
-    host = os.getenv("REDIS_HOST", "localhost")
-    port = os.getenv("REDIS_PORT", "6379")
-    db = os.getenv("REDIS_DB", "0")
-    password = os.getenv("REDIS_PASSWORD", "")
-
-    if password:
-        return f"redis://:{password}@{host}:{port}/{db}"
-    return f"redis://{host}:{port}/{db}"
+logger = logging.getLogger(__name__)
 
 
 def get_redis_client():
@@ -0,0 +1,144 @@
+"""
+Tiered cache for JSON results (ATS analysis and other LLM outputs).
+
+Lookups go through three tiers, faster first:
+
+    memory  per-process LRU (cachetools.TTLCache), bounded by item count
+    redis   shared by every replica, expires with the TTL
+    file    optional local directory, size-capped with LRU eviction
+
+A hit in a slower tier is copied into the faster ones. Values are stored as
+JSON, so callers always get their own copy. Hit/miss counts per tier and the
+bytes read and written are exported as Prometheus metrics.
+"""
+import json
+import logging
+import threading
+import time
+from typing import Optional, Tuple
+
+from cachetools import LRUCache, TTLCache
+
+from agent_core.utils.metrics import record_cache, record_cache_bytes
+from agent_core.utils.redis_client import get_shared_redis_client
+from apps.cv_analysis_agent.utils.extraction_cache import LRUFileCache
+
+logger = logging.getLogger(__name__)
+
+
+def _size(raw: str) -> int:
+    return len(raw.encode("utf-8"))
+
+
+class TieredCache:
+    """memory LRU -> Redis -> optional file cache, all with the same TTL"""
+
+    def __init__(
+        self,
+        name: str,
+        ttl: int,
+        memory_items: int = 256,
+        file_dir: str = None,
+        file_max_bytes: int = 0,
+    ):
+        self.name = name
+        self.ttl = ttl
+        if memory_items <= 0:
+            self._memory = None
+        elif ttl > 0:
+            self._memory = TTLCache(maxsize=memory_items, ttl=ttl)
+        else:
+            self._memory = LRUCache(maxsize=memory_items)
+        self._memory_lock = threading.Lock()
+        self._files = LRUFileCache(file_dir, file_max_bytes, suffix=".json") if file_dir and file_max_bytes > 0 else None
+
+    def _redis_key(self, key: str) -> str:
+        return f"{self.name}:{key}"
+
+    def _decode(self, raw: str):
+        entry = json.loads(raw)
+        if isinstance(entry, dict) and "result" in entry and "stored_at" in entry:
+            return entry["result"], entry["stored_at"]
+        # Files written before the tiered cache: the bare result with its metadata
+        stored_at = entry.get("cache", {}).get("stored_at", 0) if isinstance(entry, dict) else 0
+        return entry, stored_at
+
+    def _expired(self, stored_at: float) -> bool:
+        return self.ttl > 0 and time.time() - stored_at > self.ttl
+
+    def _get_memory(self, key: str) -> Optional[str]:
+        if self._memory is None:
+            return None
+        with self._memory_lock:
+            return self._memory.get(key)
+
+    def _set_memory(self, key: str, raw: str):
+        if self._memory is not None:
+            with self._memory_lock:
+                self._memory[key] = raw
+
+    def _get_redis(self, key: str) -> Optional[str]:
+        r = get_shared_redis_client()
+        if r is None:
+            return None
+        try:
+            return r.get(self._redis_key(key))
+        except Exception as e:
+            logger.warning(f"{self.name} cache read failed (redis): {e}")
+            return None
+
+    def _set_redis(self, key: str, raw: str, ttl: Optional[int]):
+        r = get_shared_redis_client()
+        if r is None:
+            return
+        try:
+            r.set(self._redis_key(key), raw, ex=ttl)
+            record_cache_bytes(f"{self.name}_redis", "write", _size(raw))
+        except Exception as e:
+            logger.warning(f"{self.name} cache write failed (redis): {e}")
+
+    def get(self, key: str) -> Tuple[Optional[dict], Optional[str], Optional[float]]:
+        """
+        Look a key up tier by tier
+
+        Returns:
+            tuple: (result, tier name, age in seconds), or (None, None, None) on a miss
+        """
+        tiers = [("memory", self._get_memory), ("redis", self._get_redis)]
+        if self._files is not None:
+            tiers.append(("file", self._files.get))
+
+        for i, (tier, lookup) in enumerate(tiers):
+            raw = lookup(key)
+            if raw is None:
+                record_cache(f"{self.name}_{tier}", False)
+                continue
+            try:
+                result, stored_at = self._decode(raw)
+            except ValueError as e:
+                logger.warning(f"{self.name} cache entry unreadable ({tier}): {e}")
+                record_cache(f"{self.name}_{tier}", False)
+                continue
+            if self._expired(stored_at):
+                record_cache(f"{self.name}_{tier}", False)
+                continue
+
+            record_cache(f"{self.name}_{tier}", True)
+            record_cache_bytes(f"{self.name}_{tier}", "read", _size(raw))
+            # Promote into the faster tiers
+            if i >= 1:
+                self._set_memory(key, raw)
+            if i >= 2:
+                remaining = max(int(self.ttl - (time.time() - stored_at)), 1) if self.ttl > 0 else None
+                self._set_redis(key, raw, remaining)
+            return result, tier, time.time() - stored_at
+
+        return None, None, None
+
+    def set(self, key: str, result: dict):
+        raw = json.dumps({"stored_at": time.time(), "result": result}, ensure_ascii=False)
+        self._set_memory(key, raw)
+        self._set_redis(key, raw, self.ttl if self.ttl > 0 else None)
+        if self._files is not None:
+            self._files.set(key, raw)
+            record_cache_bytes(f"{self.name}_file", "write", _size(raw))
@@ -0,0 +1,154 @@
+"""
+Text canonicalization and SimHash near-duplicate lookup for analysis caches.
+
+Cache keys are built from canonical text (NFKC, case-folded, whitespace
+collapsed), so a resume re-exported with different spacing or a JD pasted with
+extra line breaks hits the same entry.
+
+SimHashIndex additionally finds stored (CV, JD) pairs whose 64-bit SimHash
+fingerprints are both within a similarity threshold (1 - hamming / 64). The
+fingerprint is split into SIMHASH_BANDS bands and each band value is indexed,
+so by the pigeonhole principle any fingerprint within SIMHASH_BANDS - 1 bits
+(similarity >= 0.95) shares at least one band with the query; lower thresholds
+may miss some matches. The index lives in Redis (shared by all replicas) with
+a per-process fallback.
+"""
+import hashlib
+import logging
+import re
+import threading
+import unicodedata
+from typing import Optional
+
+from cachetools import LRUCache
+
+from agent_core.utils.redis_client import get_shared_redis_client
+
+logger = logging.getLogger(__name__)
+
+SIMHASH_BITS = 64
+SIMHASH_BANDS = 4
+_BAND_BITS = SIMHASH_BITS // SIMHASH_BANDS
+_BAND_MASK = (1 << _BAND_BITS) - 1
+SIMHASH_SHINGLE = 1  # single words: shingles of 2-3 words make one edited word move short texts too far
+SIMHASH_MIN_TOKENS = 20  # shorter texts give unstable fingerprints and are not indexed
+_LOCAL_INDEX_SIZE = 10000
+
+_TOKEN_RE = re.compile(r"\w+")
+
+
+def normalize_text(text: str) -> str:
+    """NFKC, whitespace runs collapsed to one space per line, blank lines dropped"""
+    text = unicodedata.normalize("NFKC", text or "")
+    lines = (" ".join(line.split()) for line in text.splitlines())
+    return "\n".join(line for line in lines if line)
+
+
+def canonical_key_text(text: str) -> str:
+    """Form used for cache keys: normalized, case-folded, single spaces only"""
+    return " ".join(normalize_text(text).casefold().split())
+
+
+def _feature_hash(feature: str) -> int:
+    return int.from_bytes(hashlib.blake2b(feature.encode("utf-8"), digest_size=8).digest(), "big")
+
+
+def simhash64(text: str) -> Optional[int]:
+    """
+    SimHash of the word shingles (SIMHASH_SHINGLE words) of the canonical text
+
+    Returns:
+        int or None: 64-bit fingerprint, None when the text is too short
+    """
+    tokens = _TOKEN_RE.findall(canonical_key_text(text))
+    if len(tokens) < SIMHASH_MIN_TOKENS:
+        return None
+    weights = [0] * SIMHASH_BITS
+    for i in range(len(tokens) - SIMHASH_SHINGLE + 1):
+        h = _feature_hash(" ".join(tokens[i:i + SIMHASH_SHINGLE]))
+        for bit in range(SIMHASH_BITS):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit, weight in enumerate(weights) if weight > 0)
+
+
+def simhash_similarity(a: int, b: int) -> float:
+    return 1.0 - bin(a ^ b).count("1") / SIMHASH_BITS
+
+
+def _bands(fingerprint: int):
+    return [(band, fingerprint >> (band * _BAND_BITS) & _BAND_MASK) for band in range(SIMHASH_BANDS)]
+
+
+class SimHashIndex:
+    """(CV, JD) fingerprint pairs -> cache key, searchable by similarity"""
+
+    def __init__(self, namespace: str, ttl: int):
+        self.namespace = namespace
+        self.ttl = ttl
+        self._local = LRUCache(maxsize=_LOCAL_INDEX_SIZE)
+        self._lock = threading.Lock()
+
+    def _band_key(self, scope: str, band: int, value: int) -> str:
+        return f"{self.namespace}:simhash:{scope}:{band}:{value:04x}"
+
+    def add(self, scope: str, key: str, cv_hash: int, jd_hash: int):
+        """Index a stored result; `scope` separates prompt/model configurations"""
+        with self._lock:
+            self._local[(scope, key)] = (cv_hash, jd_hash)
+
+        r = get_shared_redis_client()
+        if r is None:
+            return
+        member = f"{key}:{cv_hash:016x}:{jd_hash:016x}"
+        try:
+            pipe = r.pipeline(transaction=False)
+            for band, value in _bands(cv_hash):
+                band_key = self._band_key(scope, band, value)
+                pipe.sadd(band_key, member)
+                if self.ttl > 0:
+                    pipe.expire(band_key, self.ttl)
+            pipe.execute()
+        except Exception as e:
+            logger.warning(f"SimHash index write failed: {e}")
+
+    def _candidates(self, scope: str, cv_hash: int) -> list:
+        r = get_shared_redis_client()
+        if r is not None:
+            try:
+                pipe = r.pipeline(transaction=False)
+                for band, value in _bands(cv_hash):
+                    pipe.smembers(self._band_key(scope, band, value))
+                candidates = []
+                for member in set().union(*pipe.execute()):
+                    key, cv_hex, jd_hex = member.rsplit(":", 2)
+                    candidates.append((key, int(cv_hex, 16), int(jd_hex, 16)))
+                return candidates
+            except Exception as e:
+                logger.warning(f"SimHash index read failed: {e}")
+        with self._lock:
+            return [
+                (key, cand_cv, cand_jd)
+                for (entry_scope, key), (cand_cv, cand_jd) in self._local.items()
+                if entry_scope == scope
+            ]
+
+    def find(self, scope: str, cv_hash: int, jd_hash: int, threshold: float) -> list:
+        """
+        Stored keys whose CV and JD are both at least `threshold` similar
+
+        Returns:
+            list: (key, cv_similarity, jd_similarity), most similar first
+        """
+        matches = []
+        for key, cand_cv, cand_jd in self._candidates(scope, cv_hash):
+            cv_similarity = simhash_similarity(cv_hash, cand_cv)
+            jd_similarity = simhash_similarity(jd_hash, cand_jd)
+            if cv_similarity >= threshold and jd_similarity >= threshold:
+                matches.append((key, cv_similarity, jd_similarity))
+        matches.sort(key=lambda match: match[1] + match[2], reverse=True)
+        return matches
+
+
+def scope_hash(*parts: str) -> str:
+    """Short stable hash of configuration parts (used as a SimHashIndex scope)"""
+    return hashlib.sha256("\x1f".join(parts).encode("utf-8")).hexdigest()[:16]
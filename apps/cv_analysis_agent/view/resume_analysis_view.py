@@ -1,22 +1,56 @@
+import json
+import os
+import time
+
+from adrf.views import APIView as AsyncAPIView
+from asgiref.sync import sync_to_async
+from django.http import StreamingHttpResponse
+from django.urls import reverse
 from drf_spectacular.utils import extend_schema, OpenApiResponse, OpenApiExample
 from rest_framework.permissions import AllowAny
 from rest_framework.views import APIView
 from rest_framework.parsers import MultiPartParser
+from rest_framework.renderers import BaseRenderer, JSONRenderer
 from rest_framework.response import Response
 from rest_framework import status
 from django.utils import timezone
 
 from ..serializers import ResumeAnalysisSerializer
 from ..services import ai_checker_resume_service
+from ..task import analyze_ats_task
+from ..utils.blob_store import put_upload
 from ..utils.rate_limit import enforce_rate_limit
 
+# Default for the `async` form field / query param
+ATS_ASYNC_DEFAULT = os.getenv("AI_CV_ANALYSIS_ASYNC", "false")
+
+_END = object()
+
+
+class AtsUserIdentityMixin:
+    def _get_user_identity_and_plan(self, request):
+        # Identify user: prefer authenticated JWT subject, else IP-based fallback
+        if getattr(request, 'user', None) and getattr(request.user, 'is_authenticated', False):
+            user_id = str(getattr(request.user, 'identifier', 'anonymous'))
+        else:
+            # Basic IP fallback (not perfect behind proxies)
+            user_id = request.META.get('HTTP_X_FORWARDED_FOR', request.META.get('REMOTE_ADDR', 'anonymous'))
+        plan = (request.headers.get('X-Plan') or request.query_params.get('plan') or 'free').lower()
+        return user_id, plan
+
+
 @extend_schema(
     tags=["CV Analysis"],
     summary="Analyze CV/Resume (Async)",
-    description="Upload a CV/Resume file and description for asynchronous analysis. Returns a task_id to check status "
-                "later.",
+    description="Upload a CV/Resume file and description for ATS analysis. Cached results are returned immediately "
+                "(200). Otherwise, with `async=true` (form field or query param) the analysis is queued and a task_id "
+                "is returned (202) to poll at task-status/<task_id>/; without it the analysis runs inline (200).",
     request=ResumeAnalysisSerializer,
     responses={
+        200: OpenApiResponse(
+            response={"type": "object"},
+            description="Analysis result (cached, or computed inline when async is off)",
+        ),
         202: OpenApiResponse(
             response={"type": "object"},
             description="Task created successfully",
@@ -25,32 +59,25 @@ from ..utils.rate_limit import enforce_rate_limit
                     "Success",
                     value={
                         "task_id": "a1b2c3d4-5678-90ef-ghij-klmnopqrstuv",
-                        "status": "processing"
+                        "status": "processing",
+                        "status_url": "/api/v1/cv/task-status/a1b2c3d4-5678-90ef-ghij-klmnopqrstuv/"
                     }
                 )
             ]
         ),
     }
 )
-class ResumeAtsAnalyzeView(APIView):
+class ResumeAtsAnalyzeView(AtsUserIdentityMixin, APIView):
     permission_classes = [AllowAny]
     parser_classes = [MultiPartParser]
 
-    def _get_user_identity_and_plan(self, request):
-        # Identify user: prefer authenticated JWT subject, else IP-based fallback
-        if getattr(request, 'user', None) and getattr(request.user, 'is_authenticated', False):
-            user_id = str(getattr(request.user, 'identifier', 'anonymous'))
-        else:
-            # Basic IP fallback (not perfect behind proxies)
-            user_id = request.META.get('HTTP_X_FORWARDED_FOR', request.META.get('REMOTE_ADDR', 'anonymous'))
-        plan = (request.headers.get('X-Plan') or request.query_params.get('plan') or 'free').lower()
-        return user_id, plan
-
     def post(self, request):
         user_id, plan = self._get_user_identity_and_plan(request)
 
         # Check if force_refresh is requested (bypass cache)
         force_refresh = request.data.get('force_refresh', 'false').lower() == 'true'
+        # async=true: queue the analysis on the llm queue instead of holding this worker thread
+        async_mode = str(request.data.get('async', request.query_params.get('async', ATS_ASYNC_DEFAULT))).lower() == 'true'
 
         # Parse request early
         s = ResumeAnalysisSerializer(data=request.data)
@@ -58,8 +85,18 @@ class ResumeAtsAnalyzeView(APIView):
         jd = s.validated_data.get("job_description", "")
         cv = s.validated_data["cv_file"]
 
-        # Note: We skip early cache check here to avoid reading file twice
-        # The analyze_cv_vs_jd function will handle caching internally
+        # Fast path: cached results are answered right away and don't use quota
+        # (looked up by the file's SHA-256 only; extraction happens in the analysis)
+        if not force_refresh:
+            cached = ai_checker_resume_service.try_get_cached_result(cv, jd)
+            if cached:
+                cached.setdefault("rate_limit", {}).update({
+                    "plan": plan,
+                    "user": user_id,
+                    "cached": True,
+                    "quota_used": False,
+                })
+                return Response(cached)
 
         # Enforce rate limit before processing
         allowed, info = enforce_rate_limit(user_id=user_id, plan=plan)
@@ -73,6 +110,23 @@ class ResumeAtsAnalyzeView(APIView):
                 "tip": "Results are cached for 7 days. Same CV+JD will be instant on subsequent calls."
             }, status=status.HTTP_429_TOO_MANY_REQUESTS)
 
+        if async_mode:
+            # Only the blob key goes through the broker; the worker extracts and analyzes
+            blob_key = put_upload(cv)
+            task = analyze_ats_task.delay(blob_key, cv.name, time.time(), jd, force_refresh)
+            return Response({
+                "task_id": task.id,
+                "status": "processing",
+                "status_url": reverse("task_status", args=[task.id]),
+                "rate_limit": {
+                    "plan": plan,
+                    "user": user_id,
+                    "cached": False,
+                    "quota_used": True,
+                    **({k: v for k, v in info.items() if k in ("remaining_today", "interval_lock")}),
+                },
+            }, status=status.HTTP_202_ACCEPTED)
+
         # Process with caching handled internally
         result = ai_checker_resume_service.analyze_cv_vs_jd(cv, jd, force_refresh=force_refresh)
 
@@ -86,3 +140,111 @@ class ResumeAtsAnalyzeView(APIView):
             **({k: v for k, v in info.items() if k in ("remaining_today", "interval_lock")}),
         })
         return Response(result)
+
+
+def _sse(event: str, data) -> str:
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+
+async def _aiter_events(events):
+    """
+    Pull a blocking event generator (model stream, Redis waits) one event at a
+    time in a worker thread, so the event loop keeps serving other requests
+    """
+    pull = sync_to_async(next, thread_sensitive=False)
+    try:
+        while True:
+            item = await pull(events, _END)
+            if item is _END:
+                return
+            yield item
+    finally:
+        # Client gone: stop the model stream and release the single-flight lock
+        try:
+            await sync_to_async(events.close, thread_sensitive=False)()
+        except ValueError:
+            # Cancelled while a pull was still running: the lock expires with its TTL
+            pass
+
+
+class EventStreamRenderer(BaseRenderer):
+    """Lets clients send Accept: text/event-stream; non-streamed responses (400/429) become one error event"""
+    media_type = "text/event-stream"
+    format = "sse"
+    charset = "utf-8"
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        return _sse("error", data).encode(self.charset)
+
+
+@extend_schema(
+    tags=["CV Analysis"],
+    summary="Analyze CV/Resume (Streaming)",
+    description="Same input as analyze-ats/, but the result is streamed as server-sent events: one `section` event "
+                "({name, data}) per top-level field as soon as the model finishes it, then `done` with token usage "
+                "and cache info, or `error`. Cached results are replayed immediately without using quota.",
+    request=ResumeAnalysisSerializer,
+    responses={
+        200: OpenApiResponse(
+            response={"type": "string"},
+            description="text/event-stream",
+            examples=[
+                OpenApiExample(
+                    "Stream",
+                    value='event: section\ndata: {"name": "summary", "data": {"overall_match": 78}}\n\n'
+                          'event: done\ndata: {"cache": {"hit": false}}\n\n',
+                )
+            ]
+        ),
+        429: OpenApiResponse(response={"type": "object"}, description="Rate limit exceeded"),
+    }
+)
+class ResumeAtsStreamView(AtsUserIdentityMixin, AsyncAPIView):
+    permission_classes = [AllowAny]
+    parser_classes = [MultiPartParser]
+    renderer_classes = [JSONRenderer, EventStreamRenderer]
+
+    async def post(self, request):
+        user_id, plan = self._get_user_identity_and_plan(request)
+        force_refresh = request.data.get('force_refresh', 'false').lower() == 'true'
+
+        s = ResumeAnalysisSerializer(data=request.data)
+        s.is_valid(raise_exception=True)
+        jd = s.validated_data.get("job_description", "")
+        cv = s.validated_data["cv_file"]
+
+        # Cached results are replayed without using quota
+        cached = None if force_refresh else await sync_to_async(ai_checker_resume_service.try_get_cached_result)(cv, jd)
+        if cached:
+            events = ai_checker_resume_service.iter_result_events(cached)
+            rate_limit = {"plan": plan, "user": user_id, "cached": True, "quota_used": False}
+        else:
+            allowed, info = await sync_to_async(enforce_rate_limit)(user_id=user_id, plan=plan)
+            if not allowed:
+                return Response({
+                    "detail": info.get("message") or "Rate limit exceeded",
+                    "reason": info.get("reason"),
+                    "retry_after": info.get("retry_after"),
+                    "plan": plan,
+                    "user": user_id,
+                }, status=status.HTTP_429_TOO_MANY_REQUESTS)
+            events = ai_checker_resume_service.stream_cv_vs_jd(cv, jd, force_refresh=force_refresh)
+            rate_limit = {
+                "plan": plan,
+                "user": user_id,
+                "cached": False,
+                "quota_used": True,
+                **({k: v for k, v in info.items() if k in ("remaining_today", "interval_lock")}),
+            }
+
+        async def stream():
+            async for event, data in _aiter_events(events):
+                if event == "done":
+                    data["rate_limit"] = rate_limit
+                yield _sse(event, data)
+
+        response = StreamingHttpResponse(stream(), content_type="text/event-stream")
+        response["Cache-Control"] = "no-cache"
+        # Don't let nginx buffer the stream
+        response["X-Accel-Buffering"] = "no"
+        return response
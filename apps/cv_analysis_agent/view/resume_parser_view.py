@@ -1,5 +1,4 @@
-import base64
-import os
+import time
 
 from celery.result import AsyncResult
 from rest_framework.permissions import AllowAny
@@ -11,12 +10,10 @@ from rest_framework.parsers import MultiPartParser, FormParser
 from Careermate import celery_app
 from ..services.analyzer_service import analyze_resume_sync
 from ..serializers import ResumeUploadSerializer
-from ..task import process_resume_task
+from ..task import submit_resume_pipeline
+from ..utils.blob_store import put_upload
 from drf_spectacular.utils import extend_schema, OpenApiExample, OpenApiResponse
 
-TMP_DIR = "/tmp/uploads"
-os.makedirs(TMP_DIR, exist_ok=True)
-
 @extend_schema(
     tags=["CV Parser"],
     summary="Analyze CV/Resume (Async)",
@@ -60,12 +57,11 @@ class CVAnalyzeView(APIView):
 
         file = serializer.validated_data['file']
 
-        # Read file content and encode to base64
-        file_content = file.read()
-        file_content_b64 = base64.b64encode(file_content).decode('utf-8')
-        filename = file.name
+        # Stream the upload to the blob store; only its key goes through the broker
+        blob_key = put_upload(file)
+        uploaded_at = time.time()
 
-        task = process_resume_task.delay(file_content_b64, filename)
+        task = submit_resume_pipeline(blob_key, file.name, uploaded_at)
         return Response({
             "task_id": task.id,
             "status": "processing"
@@ -6,4 +6,5 @@ class RecommendationAgentConfig(AppConfig):
     name = "apps.recommendation_agent"
 
     def ready(self):
-        """Import signals when Django starts"""
\ No newline at end of file
+        """Import signals when Django starts"""
+        from . import signals  # noqa: F401
\ No newline at end of file
@@ -0,0 +1,166 @@
+# Generated by Django 5.2.7 on 2026-10-19 07:01
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Account',
+            fields=[
+                ('account_id', models.AutoField(db_column='id', primary_key=True, serialize=False)),
+                ('email', models.EmailField(max_length=255, unique=True)),
+                ('full_name', models.CharField(blank=True, db_column='username', max_length=255, null=True)),
+                ('password', models.CharField(max_length=255)),
+                ('status', models.CharField(blank=True, default='ACTIVE', max_length=50, null=True)),
+            ],
+            options={
+                'db_table': 'account',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Candidate',
+            fields=[
+                ('candidate_id', models.AutoField(db_column='candidate_id', primary_key=True, serialize=False)),
+                ('dob', models.DateField(blank=True, null=True)),
+                ('phone', models.CharField(blank=True, max_length=20, null=True)),
+                ('title', models.CharField(blank=True, max_length=255, null=True)),
+                ('address', models.CharField(blank=True, max_length=255, null=True)),
+                ('job_level', models.CharField(blank=True, max_length=100, null=True)),
+                ('exp_year', models.IntegerField(blank=True, db_column='experience', null=True)),
+                ('fullname', models.CharField(blank=True, db_column='full_name', max_length=255, null=True)),
+                ('gender', models.CharField(blank=True, max_length=20, null=True)),
+                ('link', models.CharField(blank=True, max_length=255, null=True)),
+                ('image', models.CharField(blank=True, max_length=255, null=True)),
+            ],
+            options={
+                'db_table': 'candidate',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='JDSkill',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('name', models.CharField(max_length=255)),
+            ],
+            options={
+                'db_table': 'jd_skill',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='JobApply',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('status', models.CharField(blank=True, max_length=50, null=True)),
+                ('created_at', models.DateTimeField(blank=True, db_column='create_at', null=True)),
+            ],
+            options={
+                'db_table': 'job_apply',
+                'ordering': ['-created_at'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='JobDescription',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('must_have', models.BooleanField(db_column='must_to_have', default=False)),
+                ('experience_year', models.IntegerField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'job_description',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='JobFeedback',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('feedback_type', models.CharField(choices=[('apply', 'Apply'), ('like', 'Like')], default='apply', max_length=10)),
+                ('score', models.FloatField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'job_feedback',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='JobPostings',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('title', models.CharField(max_length=255)),
+                ('description', models.TextField(blank=True, null=True)),
+                ('address', models.CharField(blank=True, max_length=255, null=True)),
+                ('status', models.CharField(blank=True, max_length=50, null=True)),
+                ('expiration_date', models.DateField(blank=True, db_column='expiration_date', null=True)),
+                ('created_at', models.DateField(blank=True, db_column='create_at', null=True)),
+            ],
+            options={
+                'db_table': 'job_posting',
+                'ordering': ['-created_at'],
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Recruiter',
+            fields=[
+                ('id', models.AutoField(primary_key=True, serialize=False)),
+                ('company_name', models.CharField(max_length=255)),
+                ('website', models.CharField(blank=True, max_length=255, null=True)),
+                ('logo_url', models.CharField(blank=True, max_length=255, null=True)),
+                ('about', models.TextField(blank=True, null=True)),
+                ('rating', models.DecimalField(blank=True, decimal_places=2, max_digits=3, null=True)),
+            ],
+            options={
+                'db_table': 'recruiters',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Resume',
+            fields=[
+                ('resume_id', models.AutoField(primary_key=True, serialize=False)),
+                ('about_me', models.TextField(blank=True, null=True)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+            ],
+            options={
+                'db_table': 'resume',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='Skill',
+            fields=[
+                ('skill_id', models.AutoField(primary_key=True, serialize=False)),
+                ('skill_type', models.CharField(blank=True, max_length=100, null=True)),
+                ('skill_name', models.CharField(max_length=100)),
+                ('year_of_experience', models.IntegerField(blank=True, null=True)),
+            ],
+            options={
+                'db_table': 'skill',
+                'managed': False,
+            },
+        ),
+        migrations.CreateModel(
+            name='RecommendationSnapshot',
+            fields=[
+                ('candidate', models.OneToOneField(db_column='candidate_id', on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='recommendation_snapshot', serialize=False, to='recommendation_agent.candidate')),
+                ('results', models.JSONField()),
+                ('top_n', models.IntegerField()),
+                ('generated_at', models.DateTimeField(db_index=True)),
+            ],
+            options={
+                'db_table': 'recommendation_snapshot',
+            },
+        ),
+    ]
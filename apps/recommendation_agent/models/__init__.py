@@ -8,6 +8,7 @@ from .job_posting import JobPostings
 from .job_description import JobDescription
 from .job_apply import JobApply
 from .job_feedback import JobFeedback
+from .recommendation_snapshot import RecommendationSnapshot
 __all__ = [
     'Account',
     'JDSkill',
@@ -19,5 +20,6 @@ __all__ = [
     'JobDescription',
     'JobApply',
     'JobFeedback',
+    'RecommendationSnapshot',
 
 ]
\ No newline at end of file
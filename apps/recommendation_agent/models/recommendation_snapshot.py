@@ -0,0 +1,25 @@
+from django.db import models
+from .candidate import Candidate
+
+
+# =====================================================
+#  RECOMMENDATION SNAPSHOT
+# =====================================================
+class RecommendationSnapshot(models.Model):
+    """Precomputed hybrid recommendations of one candidate (refreshed nightly)"""
+    candidate = models.OneToOneField(
+        Candidate,
+        related_name='recommendation_snapshot',
+        on_delete=models.CASCADE,
+        db_column='candidate_id',
+        primary_key=True
+    )
+    results = models.JSONField()
+    top_n = models.IntegerField()
+    generated_at = models.DateTimeField(db_index=True)
+
+    class Meta:
+        db_table = 'recommendation_snapshot'
+
+    def __str__(self):
+        return f"Snapshot {self.candidate_id} @ {self.generated_at:%Y-%m-%d %H:%M}"
@@ -18,6 +18,7 @@ class Resume(models.Model):
 
     class Meta:
         db_table = 'resume'
+        managed = False
 
     def __str__(self):
         return f"Resume {self.resume_id} - {self.candidate.fullname}"
@@ -19,6 +19,7 @@ class Skill(models.Model):
 
     class Meta:
         db_table = 'skill'
+        managed = False
 
     def __str__(self):
         return f"{self.skill_name} ({self.year_of_experience} yrs)"
\ No newline at end of file
@@ -1,6 +1,6 @@
 from rest_framework import serializers
 
-from apps.recommendation_agent.models import Resume, Skill, Candidate
+from apps.recommendation_agent.models import Resume, Skill, Candidate, JobFeedback
 
 
 class IndexJobSerializer(serializers.Serializer):
@@ -70,11 +70,64 @@ class JobRecommendationRequestSerializer(serializers.Serializer):
         help_text="Job description or candidate profile description to match"
     )
     top_n = serializers.IntegerField(required=False, default=5, help_text="Number of top recommendations to return")
+    force_refresh = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Bypass the recommendation cache and recompute"
+    )
+    mode = serializers.ChoiceField(
+        choices=["live", "snapshot"],
+        required=False,
+        default="live",
+        help_text="'snapshot' serves the nightly precomputed recommendations (falls back to live if missing or stale)"
+    )
+    explain = serializers.BooleanField(
+        required=False,
+        default=False,
+        help_text="Return a per-job score breakdown (semantic, skill overlap, title boost, CF contribution, penalties); bypasses caches"
+    )
 
 class JobRecommendationResponseSerializer(serializers.Serializer):
     ok = serializers.BooleanField()
     candidate_id = serializers.IntegerField()
     results = serializers.ListField(child=serializers.DictField())
+    cache = serializers.DictField(required=False)
+    snapshot = serializers.DictField(required=False)
+    explain = serializers.BooleanField(required=False)
+
+class BatchJobRecommendationRequestSerializer(serializers.Serializer):
+    candidate_ids = serializers.ListField(
+        child=serializers.IntegerField(),
+        allow_empty=False,
+        max_length=500,
+        help_text="IDs of the candidates to get recommendations for (max 500 per call)"
+    )
+    top_n = serializers.IntegerField(required=False, default=5, min_value=1, max_value=50, help_text="Number of top recommendations per candidate")
+
+class BatchJobRecommendationResponseSerializer(serializers.Serializer):
+    ok = serializers.BooleanField()
+    results = serializers.DictField(child=serializers.DictField(), help_text="candidate_id -> recommendations")
+    missing = serializers.ListField(child=serializers.IntegerField(), help_text="Candidates not found or without resume data")
+
+class FeedbackEventSerializer(serializers.Serializer):
+    candidate_id = serializers.IntegerField()
+    job_id = serializers.IntegerField()
+    feedback_type = serializers.ChoiceField(choices=JobFeedback.FeedbackType.choices)
+    score = serializers.FloatField(required=False, allow_null=True, default=None, min_value=0)
+
+class FeedbackIngestRequestSerializer(serializers.Serializer):
+    events = serializers.ListField(
+        child=FeedbackEventSerializer(),
+        min_length=1,
+        max_length=1000,
+        help_text="Feedback events (like/apply) to record"
+    )
+
+class FeedbackIngestResponseSerializer(serializers.Serializer):
+    ok = serializers.BooleanField()
+    accepted = serializers.IntegerField()
+    rejected = serializers.IntegerField(help_text="Events dropped because the candidate or job does not exist")
+    buffered = serializers.BooleanField(help_text="True if queued for a bulk write, False if written synchronously")
 
 class SkillSerializer(serializers.ModelSerializer):
     class Meta:
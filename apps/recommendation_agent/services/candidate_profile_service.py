@@ -0,0 +1,296 @@
+"""
+Candidate Profile Service - Denormalized candidate profile documents
+
+The Candidate -> resumes -> skills fan-out is flattened into one JSON document
+per candidate and cached in Redis under `cand:profile:<version>:<id>`. The
+recommendation endpoints and the candidate listing read profiles with a single
+MGET; only misses go to the database (one aggregated query for all of them on
+PostgreSQL, a prefetch elsewhere).
+
+Documents are dropped by signals when Candidate/Resume/Skill change through
+this service; rows written by the Spring Boot backend are picked up after
+CANDIDATE_PROFILE_CACHE_TTL.
+"""
+import hashlib
+import json
+import logging
+import os
+
+from django.contrib.postgres.aggregates import JSONBAgg
+from django.db import connection
+from django.db.models import F, OuterRef, Prefetch, Q, Subquery
+from django.db.models.functions import JSONObject
+
+from agent_core.utils.metrics import record_cache
+from agent_core.utils.redis_client import get_async_redis_client, get_shared_redis_client
+from apps.recommendation_agent.models import Candidate, Resume
+
+logger = logging.getLogger(__name__)
+
+CANDIDATE_PROFILE_CACHE_TTL = int(os.getenv("CANDIDATE_PROFILE_CACHE_TTL", "900"))  # 15 minutes default
+CANDIDATE_PROFILE_CACHE_VERSION = os.getenv("CANDIDATE_PROFILE_CACHE_VERSION", "v1")
+
+
+def _profile_key(candidate_id: int) -> str:
+    return f"cand:profile:{CANDIDATE_PROFILE_CACHE_VERSION}:{candidate_id}"
+
+
+def _candidates_with_profile():
+    return Candidate.objects.select_related('account').prefetch_related(
+        Prefetch('resumes', queryset=Resume.objects.order_by('-resume_id').prefetch_related('skills'))
+    )
+
+
+def _aggregated_profiles(candidate_ids):
+    """
+    One query per batch of profiles (PostgreSQL): candidate columns, the latest
+    resume through subqueries and the skills of all resumes as one JSONB array
+    """
+    latest_resume = Resume.objects.filter(candidate_id=OuterRef('candidate_id')).order_by('-resume_id')
+    return Candidate.objects.filter(candidate_id__in=candidate_ids).values(
+        'candidate_id', 'title', 'fullname', 'exp_year', email=F('account__email')
+    ).annotate(
+        latest_resume_id=Subquery(latest_resume.values('resume_id')[:1]),
+        about_me=Subquery(latest_resume.values('about_me')[:1]),
+        skills=JSONBAgg(
+            JSONObject(
+                skill_id='resumes__skills__skill_id',
+                skill_name='resumes__skills__skill_name',
+                skill_type='resumes__skills__skill_type',
+                year_of_experience='resumes__skills__year_of_experience',
+                resume_id='resumes__resume_id',
+            ),
+            filter=Q(resumes__skills__isnull=False),
+            order_by=('-resumes__resume_id', 'resumes__skills__skill_id'),
+        ),
+    )
+
+
+def _assemble_profile_doc(candidate_id, title, fullname, email, exp_year, latest_resume_id, about_me, skills) -> dict:
+    skills = [
+        {
+            'skill_id': skill['skill_id'],
+            'skill_name': skill['skill_name'],
+            'skill_type': skill['skill_type'] or '',
+            'year_of_experience': skill['year_of_experience'] or 0,
+            'resume_id': skill['resume_id'],
+        }
+        for skill in skills
+    ]
+    latest_skills = [s for s in skills if latest_resume_id is not None and s['resume_id'] == latest_resume_id]
+
+    doc = {
+        'candidate_id': candidate_id,
+        'title': title or '',
+        'fullname': fullname or '',
+        'email': email or '',
+        'exp_year': exp_year,
+        'about_me': about_me or '',
+        'skill_ids': sorted(s['skill_id'] for s in latest_skills),
+        'latest_skills': [s['skill_name'] for s in latest_skills],
+        'skills': skills,
+    }
+    basis = json.dumps(
+        [doc['title'], doc['about_me'], doc['latest_skills'], doc['exp_year']],
+        ensure_ascii=False
+    )
+    doc['profile_hash'] = hashlib.sha256(basis.encode('utf-8')).hexdigest()[:16]
+    return doc
+
+
+def build_candidate_profile_doc(candidate) -> dict:
+    """
+    Flatten a candidate (account, resumes and skills prefetched) into a profile document
+
+    Returns:
+        dict: title, fullname, email, exp_year, latest resume about_me and skill IDs,
+              skills of all resumes and a profile_hash of the matching fields
+    """
+    resumes = list(candidate.resumes.all())
+    latest_resume = resumes[0] if resumes else None
+
+    return _assemble_profile_doc(
+        candidate.candidate_id,
+        candidate.title,
+        candidate.fullname,
+        candidate.account.email if candidate.account_id else '',
+        candidate.exp_year,
+        latest_resume.resume_id if latest_resume else None,
+        latest_resume.about_me if latest_resume else '',
+        [
+            {
+                'skill_id': skill.skill_id,
+                'skill_name': skill.skill_name,
+                'skill_type': skill.skill_type,
+                'year_of_experience': skill.year_of_experience,
+                'resume_id': resume.resume_id,
+            }
+            for resume in resumes
+            for skill in resume.skills.all()
+        ]
+    )
+
+
+def _profile_doc_from_row(row: dict) -> dict:
+    return _assemble_profile_doc(
+        row['candidate_id'], row['title'], row['fullname'], row['email'], row['exp_year'],
+        row['latest_resume_id'], row['about_me'], row['skills'] or []
+    )
+
+
+def _build_profile_docs(candidate_ids: list) -> dict:
+    """Build profile documents from the DB (aggregated on PostgreSQL, prefetch elsewhere)"""
+    if connection.vendor == 'postgresql':
+        return {row['candidate_id']: _profile_doc_from_row(row) for row in _aggregated_profiles(candidate_ids)}
+    return {
+        candidate.candidate_id: build_candidate_profile_doc(candidate)
+        for candidate in _candidates_with_profile().filter(candidate_id__in=candidate_ids)
+    }
+
+
+async def _abuild_profile_docs(candidate_ids: list) -> dict:
+    """Async variant of _build_profile_docs"""
+    if connection.vendor == 'postgresql':
+        return {
+            row['candidate_id']: _profile_doc_from_row(row)
+            async for row in _aggregated_profiles(candidate_ids)
+        }
+    return {
+        candidate.candidate_id: build_candidate_profile_doc(candidate)
+        async for candidate in _candidates_with_profile().filter(candidate_id__in=candidate_ids)
+    }
+
+
+def query_item_from_profile_doc(doc: dict) -> dict:
+    """
+    Build query_item (title, skills, description) from a profile document
+
+    Returns:
+        dict: Query item; empty if the candidate has no usable profile data
+    """
+    query_item = {}
+    if doc.get('title'):
+        query_item["title"] = doc['title']
+    if doc.get('latest_skills'):
+        query_item["skills"] = doc['latest_skills']
+    if doc.get('about_me'):
+        query_item["description"] = doc['about_me']
+    return query_item
+
+
+def build_query_item_from_candidate(candidate) -> dict:
+    """Build query_item from a candidate with resumes and their skills prefetched"""
+    return query_item_from_profile_doc(build_candidate_profile_doc(candidate))
+
+
+def _decode_docs(candidate_ids, raw_values) -> dict:
+    docs = {}
+    for candidate_id, raw in zip(candidate_ids, raw_values):
+        if raw is None:
+            continue
+        try:
+            docs[candidate_id] = json.loads(raw)
+        except json.JSONDecodeError:
+            continue
+    return docs
+
+
+def _encode_docs(docs: dict) -> dict:
+    return {_profile_key(cid): json.dumps(doc, ensure_ascii=False) for cid, doc in docs.items()}
+
+
+def get_candidate_profile_docs(candidate_ids: list) -> dict:
+    """
+    Read profile documents (cache first, rebuild misses from the DB)
+
+    Returns:
+        dict: candidate_id -> profile document, for candidates that exist
+    """
+    candidate_ids = list(dict.fromkeys(candidate_ids))
+    if not candidate_ids:
+        return {}
+
+    r = get_shared_redis_client()
+    docs = {}
+    if r is not None:
+        try:
+            docs = _decode_docs(candidate_ids, r.mget([_profile_key(cid) for cid in candidate_ids]))
+        except Exception as e:
+            logger.warning(f"Candidate profile cache read failed: {e}")
+
+    misses = [cid for cid in candidate_ids if cid not in docs]
+    record_cache("candidate_profile", True, len(docs))
+    record_cache("candidate_profile", False, len(misses))
+    if misses:
+        built = _build_profile_docs(misses)
+        docs.update(built)
+        if r is not None and built and CANDIDATE_PROFILE_CACHE_TTL > 0:
+            try:
+                pipe = r.pipeline(transaction=False)
+                for key, value in _encode_docs(built).items():
+                    pipe.set(key, value, ex=CANDIDATE_PROFILE_CACHE_TTL)
+                pipe.execute()
+            except Exception as e:
+                logger.warning(f"Candidate profile cache write failed: {e}")
+
+    return docs
+
+
+async def aget_candidate_profile_docs(candidate_ids: list) -> dict:
+    """Async variant of get_candidate_profile_docs"""
+    candidate_ids = list(dict.fromkeys(candidate_ids))
+    if not candidate_ids:
+        return {}
+
+    r = await get_async_redis_client()
+    docs = {}
+    if r is not None:
+        try:
+            docs = _decode_docs(candidate_ids, await r.mget([_profile_key(cid) for cid in candidate_ids]))
+        except Exception as e:
+            logger.warning(f"Candidate profile cache read failed: {e}")
+
+    misses = [cid for cid in candidate_ids if cid not in docs]
+    record_cache("candidate_profile", True, len(docs))
+    record_cache("candidate_profile", False, len(misses))
+    if misses:
+        built = await _abuild_profile_docs(misses)
+        docs.update(built)
+        if r is not None and built and CANDIDATE_PROFILE_CACHE_TTL > 0:
+            try:
+                pipe = r.pipeline(transaction=False)
+                for key, value in _encode_docs(built).items():
+                    pipe.set(key, value, ex=CANDIDATE_PROFILE_CACHE_TTL)
+                await pipe.execute()
+            except Exception as e:
+                logger.warning(f"Candidate profile cache write failed: {e}")
+
+    return docs
+
+
+async def aget_candidate_query_item(candidate_id: int) -> dict:
+    """Build one candidate's query_item from the profile document"""
+    doc = (await aget_candidate_profile_docs([candidate_id])).get(candidate_id)
+    return query_item_from_profile_doc(doc) if doc else {}
+
+
+async def aget_candidate_query_items(candidate_ids: list) -> dict:
+    """
+    Build query_items for many candidates from their profile documents
+
+    Returns:
+        dict: candidate_id -> query_item, for candidates that exist
+    """
+    docs = await aget_candidate_profile_docs(candidate_ids)
+    return {cid: query_item_from_profile_doc(doc) for cid, doc in docs.items()}
+
+
+def invalidate_candidate_profiles(*candidate_ids: int):
+    """Drop cached profile documents (sync, for signals)"""
+    r = get_shared_redis_client()
+    if r is None or not candidate_ids:
+        return
+    try:
+        r.delete(*[_profile_key(cid) for cid in set(candidate_ids)])
+    except Exception as e:
+        logger.warning(f"Candidate profile cache invalidation failed: {e}")
@@ -1,12 +1,23 @@
 """
 Collaborative Filtering Recommender - User-based collaborative filtering with feedback weighting
 """
+import logging
 import os
+import numpy as np
 import pandas as pd
-from collections import defaultdict
+from scipy import sparse
 from asgiref.sync import sync_to_async
 from django.conf import settings
 
+from agent_core.utils.metrics import record_candidates, stage_timer
+from apps.recommendation_agent.services.interaction_store import FEEDBACK_WEIGHTS, get_interaction_store  # noqa: F401
+
+logger = logging.getLogger(__name__)
+
+# Scores are compared at this precision when ranking: the per-candidate and
+# batch paths sum in different orders, so equal scores can differ in the last bits
+CF_SCORE_DECIMALS = 9
+
 def _ensure_id_index(df: pd.DataFrame) -> pd.DataFrame:
     """Normalize id column to int and set as index for fast lookups."""
     if df is None or df.empty:
@@ -45,96 +56,60 @@ def _load_job_postings_csv():
 
 data_jp = _load_job_postings_csv()
 
-# Feedback type weights
-FEEDBACK_WEIGHTS = {
-    'apply': 1.0,   # Strongest signal
-    'like': 0.7,    # Medium signal
-    'save': 0.5,    # Neutral signal
-    'view': 0.3,    # Weak signal
-    'dislike': 0.0  # Negative signal
-}
-
-
-def _collaborative_filtering_sync(candidate_id: int, job_ids: list, n: int = 5):
-    from apps.recommendation_agent.models import JobFeedback, JobPostings
-
-    print(f"\n🔍 CF Recommendation for Candidate {candidate_id}")
 
+def _collaborative_filtering_sync(candidate_id: int, job_ids, n: int = 5):
     # 1. Build user-job interaction matrix
-    interaction_data = _build_interaction_matrix()
-    user_jobs, job_users, user_job_weights = interaction_data
+    with stage_timer("cf_matrix_build"):
+        user_jobs, job_users, user_job_weights = get_interaction_store().get()
 
-    # Debug: Print interaction matrix stats
-    print(f"  Total users with interactions: {len(user_jobs)}")
-    print(f"  Total jobs with interactions: {len(job_users)}")
+    logger.debug(
+        "CF candidate %s: %d users / %d jobs with interactions",
+        candidate_id, len(user_jobs), len(job_users)
+    )
 
     # 2. Get target user's interactions
     target_user_jobs = user_jobs.get(candidate_id, set())
     if not target_user_jobs:
-        print(f"  ⚠️  Candidate {candidate_id} has no interaction history")
+        logger.debug("CF candidate %s has no interaction history", candidate_id)
         return []
 
-    print(f"  Target user interacted with {len(target_user_jobs)} jobs")
-
     # 3. Calculate user similarities
-    user_similarities = _calculate_user_similarities(
-        candidate_id, target_user_jobs, user_jobs, user_job_weights
-    )
+    with stage_timer("cf_similarity"):
+        user_similarities = _calculate_user_similarities(
+            candidate_id, target_user_jobs, user_jobs, user_job_weights
+        )
 
     if not user_similarities:
-        print(f"  ⚠️  No similar users found")
+        logger.debug("CF candidate %s: no similar users found", candidate_id)
         return []
 
-    # 4. Filter candidate jobs (not yet interacted)
-    candidate_jobs = [job_id for job_id in job_ids if job_id not in target_user_jobs]
-    if not candidate_jobs:
-        print(f"  ⚠️  User has interacted with all available jobs")
-        return []
+    with stage_timer("cf_scoring"):
+        # 4. Filter candidate jobs: active, interacted by someone, not yet by the target user
+        candidate_jobs = _filter_candidate_jobs(job_users, target_user_jobs, job_ids)
 
-    print(f"  Candidate jobs (not interacted): {len(candidate_jobs)}")
+        # 5. Calculate scores for candidate jobs
+        job_scores = _calculate_job_scores(candidate_jobs, job_users, user_similarities)
 
-    # 5. Calculate scores for candidate jobs
-    job_scores = _calculate_job_scores(candidate_jobs, job_users, user_similarities)
+        # 6. Sort and get top N (ties by job ID, same order as the batch path)
+        sorted_jobs = sorted(job_scores.items(), key=lambda x: (-round(x[1], CF_SCORE_DECIMALS), x[0]))[:n]
 
-    if not job_scores:
-        print(f"  ⚠️  No recommendations found")
+    if not sorted_jobs:
+        logger.debug("CF candidate %s: no recommendations found", candidate_id)
         return []
 
-    # 6. Sort and get top N
-    sorted_jobs = sorted(job_scores.items(), key=lambda x: x[1], reverse=True)[:n]
-
     # 7. Format results with job details
-    return _format_cf_results(sorted_jobs)
-
-
-def _build_interaction_matrix():
-    """Build user-job interaction matrices with weights"""
-    from apps.recommendation_agent.models import JobFeedback
+    with stage_timer("cf_format"):
+        results = _format_cf_results(sorted_jobs)
+    record_candidates("cf", fetched=len(sorted_jobs), filtered=len(sorted_jobs) - len(results))
+    return results
 
-    all_feedbacks = JobFeedback.objects.all()
-    user_jobs = defaultdict(set)
-    job_users = defaultdict(dict)
-    user_job_weights = defaultdict(dict)
-
-    print(f"  Processing {all_feedbacks.count()} feedback records...")
-
-    for fb in all_feedbacks:
-        # Convert feedback_type to lowercase for case-insensitive matching
-        feedback_type_lower = fb.feedback_type.lower() if fb.feedback_type else ''
-        feedback_weight = FEEDBACK_WEIGHTS.get(feedback_type_lower, 0.5)
-
-        if fb.score is not None and fb.score > 0:
-            weighted_score = fb.score * feedback_weight
-        else:
-            weighted_score = feedback_weight
 
-        # Skip negative feedback (dislike) from building positive interactions
-        if feedback_weight > 0:
-            user_jobs[fb.candidate_id].add(fb.job_id)
-            job_users[fb.job_id][fb.candidate_id] = weighted_score
-            user_job_weights[fb.candidate_id][fb.job_id] = weighted_score
-
-    return user_jobs, job_users, user_job_weights
+def _filter_candidate_jobs(job_users, target_user_jobs, job_ids):
+    """Vectorized set filter; only jobs with at least one interaction can score"""
+    interacted = np.fromiter(job_users.keys(), dtype=np.int64, count=len(job_users))
+    target = np.fromiter(target_user_jobs, dtype=np.int64, count=len(target_user_jobs))
+    active = interacted[np.isin(interacted, np.asarray(job_ids, dtype=np.int64))]
+    return np.setdiff1d(active, target, assume_unique=True).tolist()
 
 
 def _calculate_user_similarities(candidate_id, target_user_jobs, user_jobs, user_job_weights):
@@ -170,7 +145,6 @@ def _calculate_user_similarities(candidate_id, target_user_jobs, user_jobs, user
         if all_weight_sum > 0:
             similarity = common_weight_sum / all_weight_sum
             user_similarities[other_user_id] = similarity
-            print(f"  Similarity with User {other_user_id}: {similarity:.4f}")
 
     return user_similarities
 
@@ -194,23 +168,27 @@ def _calculate_job_scores(candidate_jobs, job_users, user_similarities):
     return job_scores
 
 
-def _format_cf_results(sorted_jobs):
-    """Format CF results with job details and normalized scores"""
+def _fetch_cf_job_details(job_ids):
+    """Fetch details of active, non-expired jobs keyed by job ID"""
     from apps.recommendation_agent.models import JobPostings
     from datetime import date
 
-    predicted_job_ids = [job_id for job_id, _ in sorted_jobs]
-
-    # Only get active, non-expired jobs
     today = date.today()
     jobs = JobPostings.objects.filter(
-        id__in=predicted_job_ids,
+        id__in=list(job_ids),
         status="ACTIVE",
         expiration_date__gte=today
     ).values(
         'id', 'title', 'description', 'address'
     )
-    job_details_map = {job['id']: job for job in jobs}
+    return {job['id']: job for job in jobs}
+
+
+def _format_cf_results(sorted_jobs, job_details_map=None):
+    """Format CF results with job details and normalized scores"""
+    if job_details_map is None:
+        # Only get active, non-expired jobs
+        job_details_map = _fetch_cf_job_details(job_id for job_id, _ in sorted_jobs)
 
     # Normalize scores
     max_raw_score = sorted_jobs[0][1] if sorted_jobs else 1.0
@@ -253,3 +231,136 @@ def _format_cf_results(sorted_jobs):
 async def get_collaborative_filtering_recommendations(candidate_id: int, job_ids: list, model=None, n: int = 5):
     """Async wrapper for collaborative filtering"""
     return await sync_to_async(_collaborative_filtering_sync)(candidate_id, job_ids, n)
+
+
+# Batch users expanded at once when computing similarities; bounds peak memory
+CF_BATCH_CHUNK_SIZE = 64
+
+
+def _build_sparse_interactions(user_job_weights):
+    """
+    Convert the user -> job weight dicts into a CSR matrix
+
+    Returns:
+        tuple: (weights users x jobs, user ID per row, job ID per column, row index by user ID)
+    """
+    user_ids = np.array(sorted(user_job_weights), dtype=np.int64)
+    job_ids = np.array(sorted({job_id for weights in user_job_weights.values() for job_id in weights}), dtype=np.int64)
+    row_of = {user_id: row for row, user_id in enumerate(user_ids.tolist())}
+    col_of = {job_id: col for col, job_id in enumerate(job_ids.tolist())}
+
+    rows, cols, data = [], [], []
+    for user_id, weights in user_job_weights.items():
+        row = row_of[user_id]
+        for job_id, weight in weights.items():
+            rows.append(row)
+            cols.append(col_of[job_id])
+            data.append(weight)
+
+    weights = sparse.csr_matrix(
+        (np.asarray(data, dtype=np.float64), (rows, cols)),
+        shape=(len(user_ids), len(job_ids))
+    )
+    return weights, user_ids, job_ids, row_of
+
+
+def _batch_user_similarities(weights, weights_by_job, row_sums, rows):
+    """
+    Weighted Jaccard similarity between the given users and every user
+
+    sum(min) over common jobs is accumulated by expanding each (user, job)
+    entry of the batch against the job's column in one vectorized pass;
+    sum(max) follows as row_sum(u) + row_sum(v) - sum(min).
+
+    Returns:
+        csr_matrix: len(rows) x n_users similarities (self excluded)
+    """
+    batch = weights[rows].tocoo()
+    starts = weights_by_job.indptr[batch.col]
+    counts = weights_by_job.indptr[batch.col + 1] - starts
+    offsets = np.repeat(starts - (np.cumsum(counts) - counts), counts) + np.arange(counts.sum())
+
+    others = weights_by_job.indices[offsets]
+    mins = np.minimum(np.repeat(batch.data, counts), weights_by_job.data[offsets])
+    common = sparse.coo_matrix(
+        (mins, (np.repeat(batch.row, counts), others)),
+        shape=(len(rows), weights.shape[0])
+    ).tocsr().tocoo()  # duplicates summed -> sum(min) per user pair
+
+    union = row_sums[rows][common.row] + row_sums[common.col] - common.data
+    similarity = np.divide(common.data, union, out=np.zeros_like(common.data), where=union > 0)
+    similarity[common.col == rows[common.row]] = 0.0
+
+    result = sparse.csr_matrix((similarity, (common.row, common.col)), shape=common.shape)
+    result.eliminate_zeros()
+    return result
+
+
+def _rank_cf_batch(user_job_weights, candidate_ids, job_ids, n):
+    """Top-n (job_id, raw score) per candidate, scored chunk by chunk"""
+    weights, user_ids, matrix_job_ids, row_of = _build_sparse_interactions(user_job_weights)
+    weights_by_job = weights.tocsc()
+    row_sums = np.asarray(weights.sum(axis=1)).ravel()
+    active_columns = np.isin(matrix_job_ids, np.asarray(job_ids, dtype=np.int64))
+
+    known = [candidate_id for candidate_id in candidate_ids if candidate_id in row_of]
+    ranked = {}
+    for start in range(0, len(known), CF_BATCH_CHUNK_SIZE):
+        chunk = known[start:start + CF_BATCH_CHUNK_SIZE]
+        rows = np.array([row_of[candidate_id] for candidate_id in chunk], dtype=np.int64)
+
+        similarities = _batch_user_similarities(weights, weights_by_job, row_sums, rows)
+        scores = (similarities @ weights).toarray()
+
+        # Only recommend active jobs the candidate has not interacted with yet
+        scores[weights[rows].toarray() > 0] = 0.0
+        scores[:, ~active_columns] = 0.0
+
+        for candidate_id, row_scores in zip(chunk, scores):
+            candidate_columns = np.flatnonzero(row_scores > 0)
+            # Columns are in job ID order, so the stable sort breaks ties by job ID
+            rounded = np.round(row_scores[candidate_columns], CF_SCORE_DECIMALS)
+            top = candidate_columns[np.argsort(-rounded, kind="stable")[:n]]
+            ranked[candidate_id] = [(int(matrix_job_ids[col]), float(row_scores[col])) for col in top]
+    return ranked
+
+
+def _collaborative_filtering_batch_sync(candidate_ids: list, job_ids, n: int = 5):
+    """
+    User-based CF for many candidates with one interaction load
+
+    Same scoring as _collaborative_filtering_sync: similarities are weighted
+    Jaccard, and job scores for the whole chunk are one sparse product
+    similarities (batch x users) @ weights (users x jobs).
+
+    Args:
+        candidate_ids: Target user IDs
+        job_ids: Active job IDs (list or array) shared by the batch
+        n: Number of recommendations per candidate
+
+    Returns:
+        dict: candidate_id -> formatted CF results
+    """
+    with stage_timer("cf_batch_matrix_build"):
+        _, _, user_job_weights = get_interaction_store().get()
+
+    results = {candidate_id: [] for candidate_id in candidate_ids}
+    if not user_job_weights:
+        return results
+
+    with stage_timer("cf_batch_scoring"):
+        ranked = _rank_cf_batch(user_job_weights, candidate_ids, job_ids, n)
+
+    with stage_timer("cf_batch_format"):
+        job_details_map = _fetch_cf_job_details(
+            {job_id for sorted_jobs in ranked.values() for job_id, _ in sorted_jobs}
+        )
+        for candidate_id, sorted_jobs in ranked.items():
+            if sorted_jobs:
+                results[candidate_id] = _format_cf_results(sorted_jobs, job_details_map)
+    return results
+
+
+async def get_collaborative_filtering_recommendations_batch(candidate_ids: list, job_ids, n: int = 5):
+    """Async wrapper for batch collaborative filtering"""
+    return await sync_to_async(_collaborative_filtering_batch_sync)(candidate_ids, job_ids, n)
@@ -1,9 +1,18 @@
 """
 Content-Based Recommender - Semantic similarity with skill overlap weighting
 """
-from apps.recommendation_agent.services.embedding_service import get_gemini_embedding, combine_weighted_text
+from agent_core.utils.metrics import record_candidates, stage_timer
+from apps.recommendation_agent.services.embedding_service import (
+    get_gemini_embedding_async,
+    get_gemini_embeddings_batch_async,
+    combine_weighted_text,
+)
 from apps.recommendation_agent.services.overlap_skill import calculate_skill_overlap_for_job_recommendation
-from apps.recommendation_agent.services.weaviate_service import query_weaviate_async
+from apps.recommendation_agent.services.weaviate_service import query_weaviate_async, query_weaviate_batch_async
+
+
+DEFAULT_FIELD_WEIGHTS = {"skills": 0.5, "title": 0.3, "description": 0.2}  # weights must sum to 1.0
+NO_SKILL_MATCH_PENALTY = 0.5  # 50% penalty for no skill match
 
 
 async def get_content_based_recommendations(
@@ -11,7 +20,8 @@ async def get_content_based_recommendations(
     top_n: int = 5,
     weights: dict = None,
     skill_weight: float = 0.5,  # Increase skill importance to 50%
-    min_threshold: float = 0.15
+    min_threshold: float = 0.15,
+    explain: bool = False
 ):
     """
     Content-based recommendation with balanced scoring
@@ -22,37 +32,104 @@ async def get_content_based_recommendations(
         weights: Field weights for embedding (skills, title, description)
         skill_weight: Weight for skill overlap (default 0.5)
         min_threshold: Minimum similarity score to include (default 0.15)
+        explain: Attach a per-job score breakdown under "explain"
 
     Returns:
         list: Ranked job recommendations with similarity scores
     """
     if weights is None:
-        # Fixed: weights must sum to 1.0
-        weights = {"skills": 0.5, "title": 0.3, "description": 0.2}
+        weights = DEFAULT_FIELD_WEIGHTS
 
     # 1. Combine fields into weighted text and create embedding
     combined_text = combine_weighted_text(query_item, weights)
-    vector = get_gemini_embedding(combined_text)
+    with stage_timer("embedding"):
+        vector = await get_gemini_embedding_async(combined_text)
 
     # 2. Query Weaviate with more results for filtering
-    results = await query_weaviate_async(vector, limit=top_n * 5)
+    with stage_timer("vector_search"):
+        results = await query_weaviate_async(vector, limit=top_n * 5)
+
+    with stage_timer("content_scoring"):
+        return score_content_results(
+            query_item, results, top_n,
+            skill_weight=skill_weight, min_threshold=min_threshold, explain=explain
+        )
+
+
+async def get_content_based_recommendations_batch(
+    query_items: list,
+    top_n: int = 5,
+    weights: dict = None,
+    skill_weight: float = 0.5,
+    min_threshold: float = 0.15,
+    valid_job_ids=None
+):
+    """
+    Content-based recommendations for many queries at once
 
-    # 3. Parse query data
+    All profiles are embedded with one batched call and searched with
+    concurrent Weaviate near_vector requests (one per profile); scoring is
+    identical to the single-query path.
+
+    Args:
+        query_items: One query dict (skills, title, description) per candidate
+        top_n: Number of recommendations per query
+        weights: Field weights for embedding (skills, title, description)
+        skill_weight: Weight for skill overlap (default 0.5)
+        min_threshold: Minimum similarity score to include (default 0.15)
+        valid_job_ids: Active job IDs shared by the whole batch
+
+    Returns:
+        list: One ranked recommendation list per query, in input order
+    """
+    if weights is None:
+        weights = DEFAULT_FIELD_WEIGHTS
+
+    texts = [combine_weighted_text(query_item, weights) for query_item in query_items]
+    with stage_timer("embedding_batch"):
+        vectors = await get_gemini_embeddings_batch_async(texts)
+    with stage_timer("vector_search_batch"):
+        batch_results = await query_weaviate_batch_async(vectors, limit=top_n * 5, valid_job_ids=valid_job_ids)
+
+    with stage_timer("content_scoring_batch"):
+        return [
+            score_content_results(
+                query_item, results, top_n,
+                skill_weight=skill_weight, min_threshold=min_threshold
+            )
+            for query_item, results in zip(query_items, batch_results)
+        ]
+
+
+def score_content_results(
+    query_item: dict,
+    results: list,
+    top_n: int = 5,
+    skill_weight: float = 0.5,
+    min_threshold: float = 0.15,
+    explain: bool = False
+):
+    """
+    Score vector search results against a query (semantic + skill overlap + title boost)
+
+    Args:
+        query_item: Dict with skills, title, description
+        results: Weaviate results with job_id, title, skills, distance
+        top_n: Number of recommendations to return
+        skill_weight: Weight for skill overlap
+        min_threshold: Minimum similarity score to include
+        explain: Attach a per-job score breakdown under "explain"
+
+    Returns:
+        list: Ranked job recommendations with similarity scores
+    """
+    # 1. Parse query data
     query_skills = _parse_skills(query_item.get("skills", []))
     query_title = query_item.get("title", "").lower()
 
-    # Debug logging
-    print(f"\n{'='*80}")
-    print(f"🔍 CONTENT-BASED RECOMMENDATION DEBUG")
-    print(f"{'='*80}")
-    print(f"Query Title: {query_title}")
-    print(f"Query Skills: {query_skills}")
-    print(f"Skill Weight: {skill_weight} (50% semantic + 50% skill)")
-    print(f"{'='*80}\n")
-
-    # 4. Calculate scores for each job
+    # 2. Calculate scores for each job
     formatted_results = []
-    for idx, job in enumerate(results):
+    for job in results:
         job_skills = _parse_skills(job["skills"])
 
         # Calculate semantic similarity (normalize to [0, 1])
@@ -78,23 +155,11 @@ async def get_content_based_recommendations(
             hybrid_score = base_score + title_context_boost
         else:
             # Penalize jobs with 0 skill match even if title matches
-            hybrid_score = base_score * 0.5  # 50% penalty for no skill match
-
-        # Debug first 3 jobs
-        if idx < 3:
-            print(f"Job #{idx + 1}: {job['title'][:50]}")
-            print(f"  Job Skills: {job_skills[:5]}...")  # Show first 5 skills
-            print(f"  Distance: {distance:.4f}")
-            print(f"  Semantic: {semantic_similarity:.4f} ({semantic_similarity*100:.1f}%)")
-            print(f"  Skill Overlap: {skill_overlap_score:.4f} ({skill_overlap_score*100:.1f}%)")
-            print(f"  Title Boost: {title_context_boost:.4f} ({title_context_boost*100:.1f}%)")
-            print(f"  Base Score: {base_score:.4f}")
-            print(f"  Final Score: {hybrid_score:.4f} ({hybrid_score*100:.1f}%)")
-            print(f"  {'⚠️  PENALIZED (no skill match)' if skill_overlap_score == 0 else '✓'}\n")
+            hybrid_score = base_score * NO_SKILL_MATCH_PENALTY
 
         # Only include jobs above threshold
         if hybrid_score >= min_threshold:
-            formatted_results.append({
+            item = {
                 "job_id": job["job_id"],
                 "title": job["title"],
                 "skills": job["skills"],
@@ -103,9 +168,27 @@ async def get_content_based_recommendations(
                 "skill_overlap": round(skill_overlap_score, 4),
                 "title_boost": round(title_context_boost, 4),
                 "similarity": round(hybrid_score, 4)
-            })
-
-    # 5. Sort by score and return top N
+            }
+            if explain:
+                item["explain"] = {
+                    "distance": round(distance, 4),
+                    "semantic_similarity": round(semantic_similarity, 4),
+                    "semantic_weight": round(1 - skill_weight, 4),
+                    "skill_overlap": round(skill_overlap_score, 4),
+                    "skill_weight": skill_weight,
+                    "base_score": round(base_score, 4),
+                    "title_boost": round(title_context_boost, 4) if skill_overlap_score > 0 else 0.0,
+                    "penalty": None if skill_overlap_score > 0 else {
+                        "reason": "no_skill_match",
+                        "factor": NO_SKILL_MATCH_PENALTY,
+                    },
+                    "content_score": round(hybrid_score, 4),
+                }
+            formatted_results.append(item)
+
+    record_candidates("content", fetched=len(results), filtered=len(results) - len(formatted_results))
+
+    # 3. Sort by score and return top N
     formatted_results.sort(key=lambda x: x["similarity"], reverse=True)
     return formatted_results[:top_n]
 
@@ -1,16 +1,72 @@
 """
 Embedding Service - Handles text embedding generation using Gemini API
+
+When EMBEDDING_SERVICE_URL is set, embeddings are requested from that HTTP
+endpoint instead (POST {"texts": [...]} -> {"embeddings": [[...], ...]}); the
+load-testing harness points it at a local fake with controllable latency.
 """
+import asyncio
 import os
+import weakref
+
+import httpx
 import numpy as np
 from dotenv import load_dotenv
 import google.generativeai as genai
+from google.ai import generativelanguage as glm
 
 load_dotenv()
 
 # Initialize Gemini API
 genai.configure(api_key=os.getenv("GOOGLE_API_KEY"))
 
+EMBEDDING_SERVICE_URL = os.getenv("EMBEDDING_SERVICE_URL")
+EMBEDDING_SERVICE_TIMEOUT = float(os.getenv("EMBEDDING_SERVICE_TIMEOUT", "30"))
+
+# One HTTP client (connection pool) per event loop, like the Redis/Weaviate clients
+_http_clients = weakref.WeakKeyDictionary()
+# Same for Gemini: genai's default async client is process-global and its gRPC
+# channel stays bound to the first loop that used it
+_gemini_clients = weakref.WeakKeyDictionary()
+
+
+def _service_embeddings(texts: list) -> list:
+    response = httpx.post(EMBEDDING_SERVICE_URL, json={"texts": texts}, timeout=EMBEDDING_SERVICE_TIMEOUT)
+    response.raise_for_status()
+    return response.json()["embeddings"]
+
+
+async def _service_embeddings_async(texts: list) -> list:
+    loop = asyncio.get_running_loop()
+    client = _http_clients.get(loop)
+    if client is None:
+        client = httpx.AsyncClient(timeout=EMBEDDING_SERVICE_TIMEOUT)
+        _http_clients[loop] = client
+    response = await client.post(EMBEDDING_SERVICE_URL, json={"texts": texts})
+    response.raise_for_status()
+    return response.json()["embeddings"]
+
+
+def _gemini_async_client() -> glm.GenerativeServiceAsyncClient:
+    """Gemini async client bound to the running event loop"""
+    loop = asyncio.get_running_loop()
+    client = _gemini_clients.get(loop)
+    if client is None:
+        client = glm.GenerativeServiceAsyncClient(client_options={"api_key": os.getenv("GOOGLE_API_KEY")})
+        _gemini_clients[loop] = client
+    return client
+
+
+async def close_embedding_clients():
+    """Close the running loop's embedding clients (the loop is about to be discarded)"""
+    loop = asyncio.get_running_loop()
+    client = _http_clients.pop(loop, None)
+    if client is not None:
+        await client.aclose()
+    gemini_client = _gemini_clients.pop(loop, None)
+    if gemini_client is not None:
+        await gemini_client.transport.close()
+
 
 def get_gemini_embedding(text: str):
     """
@@ -26,6 +82,9 @@ def get_gemini_embedding(text: str):
     if not text:
         return None
 
+    if EMBEDDING_SERVICE_URL:
+        return np.array(_service_embeddings([text])[0], dtype=np.float32).tolist()
+
     response = genai.embed_content(
         model="models/text-embedding-004",
         content=text
@@ -34,6 +93,70 @@ def get_gemini_embedding(text: str):
     return np.array(response['embedding'], dtype=np.float32).tolist()
 
 
+async def get_gemini_embedding_async(text: str):
+    """
+    Generate vector embedding using Gemini's async client
+
+    The gRPC client is created on first use and reused by every later call
+    on the same event loop (one per ASGI worker).
+
+    Args:
+        text: Input text to embed
+
+    Returns:
+        list[float]: Vector embedding or None if text is empty
+    """
+    text = (text or "").strip()
+    if not text:
+        return None
+
+    if EMBEDDING_SERVICE_URL:
+        return np.array((await _service_embeddings_async([text]))[0], dtype=np.float32).tolist()
+
+    response = await genai.embed_content_async(
+        model="models/text-embedding-004",
+        content=text,
+        client=_gemini_async_client(),
+    )
+
+    return np.array(response['embedding'], dtype=np.float32).tolist()
+
+
+async def get_gemini_embeddings_batch_async(texts: list):
+    """
+    Generate embeddings for many texts with one batched Gemini call
+
+    The SDK splits the list into batchEmbedContents requests of at most
+    100 items, so hundreds of profiles cost a handful of round trips.
+
+    Args:
+        texts: Input texts to embed
+
+    Returns:
+        list: One vector (list[float]) per input, None for empty inputs
+    """
+    cleaned = [(text or "").strip() for text in texts]
+    non_empty = [i for i, text in enumerate(cleaned) if text]
+
+    vectors = [None] * len(cleaned)
+    if not non_empty:
+        return vectors
+
+    if EMBEDDING_SERVICE_URL:
+        embeddings = np.asarray(await _service_embeddings_async([cleaned[i] for i in non_empty]), dtype=np.float32)
+    else:
+        response = await genai.embed_content_async(
+            model="models/text-embedding-004",
+            content=[cleaned[i] for i in non_empty],
+            client=_gemini_async_client(),
+        )
+        embeddings = np.asarray(response['embedding'], dtype=np.float32)
+
+    for i, embedding in zip(non_empty, embeddings):
+        vectors[i] = embedding.tolist()
+    return vectors
+
+
 def combine_weighted_text(query_item: dict, weights: dict = None) -> str:
     """
     Combine query fields into weighted text for embedding
@@ -0,0 +1,200 @@
+"""
+Feedback Ingest Service - Write-behind ingestion of JobFeedback events
+
+The ingestion endpoint drops events for unknown candidates or jobs, appends
+the rest to the Redis stream FEEDBACK_STREAM_KEY and returns immediately.
+From there:
+
+    * every process applies them to its in-memory CF interactions on the next
+      recommendation (InteractionStore tails the stream)
+    * the submitting candidates' cached recommendations are invalidated
+    * a Celery task drains the stream through a consumer group and writes the
+      rows with bulk_create(ignore_conflicts=True), so duplicates of the
+      (candidate, job, feedback_type) unique key are dropped by the DB; it
+      then records the last written ID (FEEDBACK_FLUSHED_ID_KEY, where
+      InteractionStore rebuilds resume their replay) and trims the entries
+      that are both written and older than CF_INTERACTIONS_TTL
+
+Without Redis the events are written synchronously and applied to this
+process's interactions only.
+"""
+import logging
+import os
+
+from asgiref.sync import sync_to_async
+
+from agent_core.utils.redis_client import get_async_redis_client, get_shared_redis_client
+from apps.recommendation_agent.models import Candidate, JobFeedback, JobPostings
+from apps.recommendation_agent.services.interaction_store import (
+    CF_INTERACTIONS_TTL,
+    FEEDBACK_FLUSHED_ID_KEY,
+    FEEDBACK_STREAM_KEY,
+    FEEDBACK_STREAM_MAXLEN,
+    decode_feedback_event,
+    encode_feedback_event,
+    get_interaction_store,
+)
+from apps.recommendation_agent.services.recommendation_cache import ainvalidate_candidate_recommendations
+
+logger = logging.getLogger(__name__)
+
+FEEDBACK_FLUSH_BATCH_SIZE = int(os.getenv("FEEDBACK_FLUSH_BATCH_SIZE", "1000"))
+FEEDBACK_FLUSH_GROUP = "feedback-writers"
+FEEDBACK_FLUSH_CONSUMER = "flusher"
+
+
+def known_feedback_events(events: list) -> list:
+    """Events whose candidate and job both exist (the rest can never be written)"""
+    candidate_ids = {event["candidate_id"] for event in events}
+    job_ids = {event["job_id"] for event in events}
+    known_candidates = set(
+        Candidate.objects.filter(candidate_id__in=candidate_ids).values_list("candidate_id", flat=True)
+    )
+    known_jobs = set(JobPostings.objects.filter(id__in=job_ids).values_list("id", flat=True))
+
+    known = [
+        event for event in events
+        if event["candidate_id"] in known_candidates and event["job_id"] in known_jobs
+    ]
+    skipped = len(events) - len(known)
+    if skipped:
+        logger.warning(f"Dropped {skipped} feedback events for unknown candidates or jobs")
+    return known
+
+
+def write_feedback(events: list) -> int:
+    """
+    Bulk insert feedback rows, skipping duplicates and unknown candidates/jobs
+
+    Returns:
+        int: Number of events sent to the DB (duplicates included)
+    """
+    # Checked again: a candidate or job may be deleted between ingestion and the flush
+    rows = [
+        JobFeedback(
+            candidate_id=event["candidate_id"],
+            job_id=event["job_id"],
+            feedback_type=event["feedback_type"],
+            score=event.get("score"),
+        )
+        for event in known_feedback_events(events)
+    ]
+
+    JobFeedback.objects.bulk_create(rows, batch_size=FEEDBACK_FLUSH_BATCH_SIZE, ignore_conflicts=True)
+    return len(rows)
+
+
+async def ingest_feedback(events: list) -> dict:
+    """
+    Accept feedback events (candidate_id, job_id, feedback_type, score)
+
+    Returns:
+        dict: accepted and rejected (unknown candidate or job) counts, and
+              whether the events were buffered in Redis (False means they
+              were written synchronously)
+    """
+    # Validated before any process applies them to its CF interactions
+    known = await sync_to_async(known_feedback_events)(events) if events else []
+    rejected = len(events) - len(known)
+    events = known
+    if not events:
+        return {"accepted": 0, "rejected": rejected, "buffered": False}
+
+    buffered = False
+    r = await get_async_redis_client()
+    if r is not None:
+        try:
+            pipe = r.pipeline(transaction=False)
+            for event in events:
+                pipe.xadd(
+                    FEEDBACK_STREAM_KEY,
+                    encode_feedback_event(event),
+                    maxlen=FEEDBACK_STREAM_MAXLEN,
+                    approximate=True,
+                )
+            await pipe.execute()
+            buffered = True
+        except Exception as e:
+            logger.warning(f"Feedback stream unavailable, writing directly: {e}")
+
+    if not buffered:
+        await sync_to_async(write_feedback)(events)
+        get_interaction_store().apply_local(events)
+
+    await ainvalidate_candidate_recommendations(*{event["candidate_id"] for event in events})
+    return {"accepted": len(events), "rejected": rejected, "buffered": buffered}
+
+
+def _ensure_flush_group(r):
+    try:
+        r.xgroup_create(FEEDBACK_STREAM_KEY, FEEDBACK_FLUSH_GROUP, id="0", mkstream=True)
+    except Exception as e:
+        if "BUSYGROUP" not in str(e):
+            raise
+
+
+def flush_feedback_stream(max_batches: int = 100) -> dict:
+    """
+    Drain the feedback stream into JobFeedback (sync, for Celery)
+
+    Entries delivered to a previous run but never acknowledged (crash between
+    read and write) are retried first; inserts are idempotent.
+
+    Returns:
+        dict: Counts of flushed events and batches
+    """
+    r = get_shared_redis_client()
+    if r is None:
+        return {"flushed": 0, "batches": 0}
+
+    _ensure_flush_group(r)
+    flushed = batches = 0
+    # "0" re-reads our pending entries, ">" reads new ones
+    for start_id in ("0", ">"):
+        while batches < max_batches:
+            response = r.xreadgroup(
+                FEEDBACK_FLUSH_GROUP, FEEDBACK_FLUSH_CONSUMER,
+                {FEEDBACK_STREAM_KEY: start_id}, count=FEEDBACK_FLUSH_BATCH_SIZE,
+            )
+            entries = response[0][1] if response else []
+            if not entries:
+                break
+
+            events = [decode_feedback_event(fields) for _, fields in entries]
+            write_feedback(events)
+            r.xack(FEEDBACK_STREAM_KEY, FEEDBACK_FLUSH_GROUP, *[entry_id for entry_id, _ in entries])
+            last_written = entries[-1][0]
+
+            flushed += len(entries)
+            batches += 1
+            if len(entries) < FEEDBACK_FLUSH_BATCH_SIZE:
+                break
+
+    if flushed:
+        # Entries are delivered in ID order, so everything up to the last one is written
+        _mark_flushed(r, last_written)
+    return {"flushed": flushed, "batches": batches}
+
+
+def _stream_id_key(entry_id: str) -> tuple:
+    ms, _, seq = entry_id.partition("-")
+    return int(ms), int(seq or 0)
+
+
+def _mark_flushed(r, entry_id: str):
+    """
+    Record that every entry up to entry_id is in job_feedback, and trim the
+    entries that are also older than CF_INTERACTIONS_TTL
+
+    A process reads the stream at least once per CF_INTERACTIONS_TTL (its
+    rebuild), so older entries were already applied or are covered by its
+    next rebuild from the DB.
+    """
+    previous = r.get(FEEDBACK_FLUSHED_ID_KEY)
+    if previous is None or _stream_id_key(entry_id) > _stream_id_key(previous):
+        r.set(FEEDBACK_FLUSHED_ID_KEY, entry_id)
+
+    seconds, microseconds = r.time()
+    horizon_ms = seconds * 1000 + microseconds // 1000 - int(CF_INTERACTIONS_TTL * 1000)
+    min_id = min(_stream_id_key(entry_id), (horizon_ms, 0))
+    r.xtrim(FEEDBACK_STREAM_KEY, minid=f"{min_id[0]}-{min_id[1]}", approximate=False)
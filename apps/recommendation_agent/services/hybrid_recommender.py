@@ -1,15 +1,27 @@
 """
 Hybrid Recommender - Combines content-based and collaborative filtering
 """
-from apps.recommendation_agent.services.content_based_recommender import get_content_based_recommendations
-from apps.recommendation_agent.services.collaborative_recommender import get_collaborative_filtering_recommendations
+import logging
+
+from agent_core.utils.metrics import stage_timer
+from apps.recommendation_agent.services.content_based_recommender import (
+    get_content_based_recommendations,
+    get_content_based_recommendations_batch,
+)
+from apps.recommendation_agent.services.collaborative_recommender import (
+    get_collaborative_filtering_recommendations,
+    get_collaborative_filtering_recommendations_batch,
+)
+
+logger = logging.getLogger(__name__)
 
 
 async def get_hybrid_job_recommendations(
     candidate_id: int,
     query_item: dict,
     job_ids: list,
-    top_n: int = 5
+    top_n: int = 5,
+    explain: bool = False
 ):
     """
     Hybrid recommendation combining content-based and collaborative filtering
@@ -19,27 +31,76 @@ async def get_hybrid_job_recommendations(
         query_item: Query with skills, title, description
         job_ids: Available job IDs
         top_n: Number of recommendations
+        explain: Attach a per-job score breakdown (content, CF contribution, penalties)
 
     Returns:
         dict: Content-based, collaborative, and hybrid top recommendations
     """
     # 1. Get Content-Based recommendations
-    content_results = await get_content_based_recommendations(query_item, top_n=top_n * 2)
-    content_scores = {r["job_id"]: r["similarity"] for r in content_results}
+    content_results = await get_content_based_recommendations(query_item, top_n=top_n * 2, explain=explain)
 
     # 2. Try Collaborative Filtering (fallback if insufficient data)
     try:
         cf_results = await get_collaborative_filtering_recommendations(
             candidate_id, job_ids, model=None, n=top_n * 2
         )
-        cf_scores = {job["job_id"]: job["similarity"] for job in cf_results}
         has_cf_data = True
     except Exception as e:
-        print(f"[⚠️ CF skipped: {e}]")
+        logger.warning(f"CF skipped: {e}")
         cf_results = []
-        cf_scores = {}
         has_cf_data = False
 
+    with stage_timer("hybrid_combine"):
+        return _combine_hybrid(content_results, cf_results, has_cf_data, top_n, explain=explain)
+
+
+async def get_hybrid_job_recommendations_batch(
+    candidate_ids: list,
+    query_items: list,
+    job_ids,
+    top_n: int = 5
+):
+    """
+    Hybrid recommendations for many candidates in one pass
+
+    Content-based results come from one batched embedding call and concurrent
+    Weaviate near_vector requests; CF loads the interaction matrix once and scores
+    every candidate with a sparse matrix product.
+
+    Args:
+        candidate_ids: Target user IDs
+        query_items: One query (skills, title, description) per candidate
+        job_ids: Active job IDs shared by the batch
+        top_n: Number of recommendations per candidate
+
+    Returns:
+        dict: candidate_id -> same shape as get_hybrid_job_recommendations
+    """
+    # 1. Content-Based for the whole batch
+    content_batch = await get_content_based_recommendations_batch(query_items, top_n=top_n * 2)
+
+    # 2. Collaborative Filtering for the whole batch
+    try:
+        cf_batch = await get_collaborative_filtering_recommendations_batch(
+            candidate_ids, job_ids, n=top_n * 2
+        )
+        has_cf_data = True
+    except Exception as e:
+        logger.warning(f"CF skipped: {e}")
+        cf_batch = {}
+        has_cf_data = False
+
+    return {
+        candidate_id: _combine_hybrid(content_results, cf_batch.get(candidate_id, []), has_cf_data, top_n)
+        for candidate_id, content_results in zip(candidate_ids, content_batch)
+    }
+
+
+def _combine_hybrid(content_results: list, cf_results: list, has_cf_data: bool, top_n: int, explain: bool = False):
+    """Blend content-based and CF scores into the hybrid response"""
+    content_scores = {r["job_id"]: r["similarity"] for r in content_results}
+    cf_scores = {job["job_id"]: job["similarity"] for job in cf_results}
+
     # 3. Set dynamic weights based on data availability
     if not has_cf_data:
         content_weight = 1.0
@@ -67,6 +128,22 @@ async def get_hybrid_job_recommendations(
         r["final_score"] = hybrid_combined.get(r["job_id"], r["similarity"])
         r["source_weight"] = {"content": content_weight, "cf": cf_weight}
 
+    # 7. Explain mode: add each source's contribution to the content breakdown
+    if explain:
+        cf_raw_scores = {job["job_id"]: job.get("raw_cf_score") for job in cf_results}
+        for r in content_results:
+            cf_score = cf_scores.get(r["job_id"], 0)
+            r.setdefault("explain", {}).update({
+                "content_weight": content_weight,
+                "content_contribution": round(content_weight * r["similarity"], 4),
+                "cf_available": has_cf_data,
+                "cf_score": cf_score,
+                "cf_raw_score": cf_raw_scores.get(r["job_id"]),
+                "cf_weight": cf_weight,
+                "cf_contribution": round(cf_weight * cf_score, 4),
+                "final_score": hybrid_combined.get(r["job_id"], r["similarity"]),
+            })
+
     return {
         "content_based": content_results[:top_n],
         "collaborative": cf_results[:top_n],
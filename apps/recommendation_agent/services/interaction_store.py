@@ -0,0 +1,203 @@
+"""
+Interaction Store - In-memory user/job interaction structures for collaborative filtering
+
+The JobFeedback table is loaded once per process and kept current with
+deltas instead of being re-read on every recommendation:
+
+    * events posted to the feedback ingestion endpoint are appended to the
+      Redis stream FEEDBACK_STREAM_KEY; every process tails the stream before
+      serving CF and applies the new events to its structures
+    * the structures are rebuilt from the DB every CF_INTERACTIONS_TTL seconds
+      to pick up rows written directly by the Spring Boot backend; the stream
+      is replayed on top from the last entry the flush task wrote to the DB
+      (FEEDBACK_FLUSHED_ID_KEY), so unflushed events are not lost
+
+Applying an event is idempotent (a (candidate, job) pair keeps its strongest
+weight), so replays and duplicate deliveries are harmless.
+
+get() returns a snapshot: published structures are never mutated. Deltas are
+applied copy-on-write (new outer dicts, copies of the touched inner
+containers only) and swapped in under a lock, so a reader never sees a
+partial update, even one that still holds an older snapshot.
+"""
+import logging
+import os
+import threading
+import time
+
+from agent_core.utils.metrics import record_cache, stage_timer
+from agent_core.utils.redis_client import get_shared_redis_client
+
+logger = logging.getLogger(__name__)
+
+CF_INTERACTIONS_TTL = float(os.getenv("CF_INTERACTIONS_TTL", "300"))  # 0 = rebuild on every call
+FEEDBACK_STREAM_KEY = os.getenv("FEEDBACK_STREAM_KEY", "feedback:events")
+FEEDBACK_STREAM_MAXLEN = int(os.getenv("FEEDBACK_STREAM_MAXLEN", "100000"))
+# Stream ID of the newest event known to be in job_feedback (set by the flush task)
+FEEDBACK_FLUSHED_ID_KEY = f"{FEEDBACK_STREAM_KEY}:flushed"
+_STREAM_READ_COUNT = 5000
+
+# Feedback type weights
+FEEDBACK_WEIGHTS = {
+    'apply': 1.0,   # Strongest signal
+    'like': 0.7,    # Medium signal
+    'save': 0.5,    # Neutral signal
+    'view': 0.3,    # Weak signal
+    'dislike': 0.0  # Negative signal
+}
+
+
+def feedback_weight(feedback_type, score) -> float:
+    """Interaction weight of one feedback (type weight, scaled by a positive score)"""
+    # Convert feedback_type to lowercase for case-insensitive matching
+    type_weight = FEEDBACK_WEIGHTS.get((feedback_type or '').lower(), 0.5)
+    if score is not None and score > 0:
+        return score * type_weight
+    return type_weight
+
+
+def encode_feedback_event(event: dict) -> dict:
+    """Stream fields of a feedback event"""
+    score = event.get("score")
+    return {
+        "candidate_id": event["candidate_id"],
+        "job_id": event["job_id"],
+        "feedback_type": event["feedback_type"],
+        "score": "" if score is None else score,
+    }
+
+
+def decode_feedback_event(fields: dict) -> dict:
+    """Inverse of encode_feedback_event"""
+    return {
+        "candidate_id": int(fields["candidate_id"]),
+        "job_id": int(fields["job_id"]),
+        "feedback_type": fields["feedback_type"],
+        "score": float(fields["score"]) if fields.get("score") not in (None, "") else None,
+    }
+
+
+class InteractionStore:
+    """user -> jobs, job -> {user: weight} and user -> {job: weight}, kept current with deltas"""
+
+    def __init__(self, ttl: float = CF_INTERACTIONS_TTL):
+        self.ttl = ttl
+        self.user_jobs = {}
+        self.job_users = {}
+        self.user_job_weights = {}
+        self._loaded_at = None
+        self._stream_id = "0"
+        self._pending = []
+        self._lock = threading.Lock()
+
+    def _apply(self, events: list):
+        """Copy-on-write: only the outer dicts and the touched inner containers are copied"""
+        user_jobs, job_users, user_job_weights = dict(self.user_jobs), dict(self.job_users), dict(self.user_job_weights)
+        copied_users, copied_jobs = set(), set()
+        for event in events:
+            candidate_id, job_id = event["candidate_id"], event["job_id"]
+            weighted_score = feedback_weight(event["feedback_type"], event.get("score"))
+            # Skip negative feedback (dislike) from building positive interactions
+            if weighted_score <= 0:
+                continue
+            if candidate_id not in copied_users:
+                user_jobs[candidate_id] = set(user_jobs.get(candidate_id, ()))
+                user_job_weights[candidate_id] = dict(user_job_weights.get(candidate_id, {}))
+                copied_users.add(candidate_id)
+            if job_id not in copied_jobs:
+                job_users[job_id] = dict(job_users.get(job_id, {}))
+                copied_jobs.add(job_id)
+            weighted_score = max(weighted_score, user_job_weights[candidate_id].get(job_id, 0.0))
+            user_jobs[candidate_id].add(job_id)
+            job_users[job_id][candidate_id] = weighted_score
+            user_job_weights[candidate_id][job_id] = weighted_score
+        self.user_jobs, self.job_users, self.user_job_weights = user_jobs, job_users, user_job_weights
+
+    def _rebuild(self):
+        from apps.recommendation_agent.models import JobFeedback
+
+        # Read before the DB: every event up to this ID is already in job_feedback
+        stream_id = self._flushed_stream_id()
+        user_jobs, job_users, user_job_weights = {}, {}, {}
+        rows = JobFeedback.objects.values_list("candidate_id", "job_id", "feedback_type", "score")
+        for candidate_id, job_id, feedback_type, score in rows.iterator(chunk_size=10000):
+            weighted_score = feedback_weight(feedback_type, score)
+            if weighted_score <= 0:
+                continue
+            weighted_score = max(weighted_score, user_job_weights.get(candidate_id, {}).get(job_id, 0.0))
+            user_jobs.setdefault(candidate_id, set()).add(job_id)
+            job_users.setdefault(job_id, {})[candidate_id] = weighted_score
+            user_job_weights.setdefault(candidate_id, {})[job_id] = weighted_score
+        self.user_jobs, self.job_users, self.user_job_weights = user_jobs, job_users, user_job_weights
+        self._loaded_at = time.monotonic()
+        # Replay only what the flush task hasn't written yet
+        self._stream_id = stream_id
+
+    @staticmethod
+    def _flushed_stream_id() -> str:
+        r = get_shared_redis_client()
+        if r is None:
+            return "0"
+        try:
+            return r.get(FEEDBACK_FLUSHED_ID_KEY) or "0"
+        except Exception as e:
+            logger.warning(f"Feedback stream read failed: {e}")
+            return "0"
+
+    def _tail_stream(self) -> list:
+        """Stream events newer than the last one seen"""
+        r = get_shared_redis_client()
+        if r is None:
+            return []
+        events = []
+        try:
+            while True:
+                response = r.xread({FEEDBACK_STREAM_KEY: self._stream_id}, count=_STREAM_READ_COUNT)
+                entries = response[0][1] if response else []
+                for entry_id, fields in entries:
+                    events.append(decode_feedback_event(fields))
+                    self._stream_id = entry_id
+                if len(entries) < _STREAM_READ_COUNT:
+                    break
+        except Exception as e:
+            logger.warning(f"Feedback stream read failed: {e}")
+        return events
+
+    def apply_local(self, events: list):
+        """Queue events for this process only (used when Redis is unavailable)"""
+        with self._lock:
+            self._pending.extend(events)
+
+    def invalidate(self):
+        """Force a rebuild from the DB on the next get()"""
+        with self._lock:
+            self._loaded_at = None
+
+    def get(self):
+        """
+        Current interaction structures (rebuilt when stale, otherwise delta-updated)
+
+        Returns:
+            tuple: (user_jobs, job_users, user_job_weights) - a read-only snapshot,
+            never modified by later updates
+        """
+        with self._lock:
+            fresh = self._loaded_at is not None and time.monotonic() - self._loaded_at < self.ttl
+            record_cache("cf_interactions", fresh)
+            if not fresh:
+                with stage_timer("cf_interactions_rebuild"):
+                    self._rebuild()
+            with stage_timer("cf_interactions_delta"):
+                events = self._tail_stream() + self._pending
+                self._pending = []
+                if events:
+                    self._apply(events)
+            return self.user_jobs, self.job_users, self.user_job_weights
+
+
+_store = InteractionStore()
+
+
+def get_interaction_store() -> InteractionStore:
+    """Process-wide interaction store"""
+    return _store
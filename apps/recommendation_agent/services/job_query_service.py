@@ -1,10 +1,22 @@
 """
 Job Query Service - Handles database queries for job postings
 """
+import os
+import time
 from datetime import date
-from asgiref.sync import sync_to_async
+
+import numpy as np
+
+from agent_core.utils.metrics import record_cache, stage_timer
 from apps.recommendation_agent.models import JobPostings
 
+# The active job universe (IDs only) is shared by CF, Weaviate filtering and
+# the response cache; it is reloaded at most once per TTL per process. A reload
+# that finds a different set (jobs written by the Spring Boot backend, expired
+# jobs) bumps the response cache's jobs generation.
+ACTIVE_JOB_IDS_TTL = float(os.getenv("ACTIVE_JOB_IDS_TTL", "60"))
+_active_job_ids = None  # (loaded_at, sorted read-only id array, id frozenset)
+
 
 def _query_all_jobs_sync():
     """
@@ -45,9 +57,108 @@ def query_all_jobs():
 
 async def query_all_jobs_async():
     """
-    Get active and non-expired jobs (async wrapper)
+    Get active and non-expired jobs using the async ORM
 
     Returns:
         list: List of active job postings that haven't expired
     """
-    return await sync_to_async(_query_all_jobs_sync)()
+    today = date.today()
+    jobs = JobPostings.objects.filter(
+        status="ACTIVE",
+        expiration_date__gte=today
+    ).values(
+        "id", "title", "description", "address"
+    )
+
+    return [
+        {
+            "job_id": job["id"],
+            "title": job["title"],
+            "description": job["description"],
+            "address": job["address"]
+        }
+        async for job in jobs
+    ]
+
+
+def _active_jobs_queryset():
+    return JobPostings.objects.filter(
+        status="ACTIVE",
+        expiration_date__gte=date.today()
+    ).order_by().values_list("id", flat=True)
+
+
+def _store_active_job_ids(ids):
+    """
+    Returns:
+        tuple: (entry, changed) - changed is True when a previously loaded set differs
+    """
+    global _active_job_ids
+    previous = _active_job_ids
+    id_array = np.array(sorted(ids), dtype=np.int64)
+    id_array.setflags(write=False)
+    _active_job_ids = (time.monotonic(), id_array, frozenset(id_array.tolist()))
+    changed = previous is not None and previous[2] != _active_job_ids[2]
+    return _active_job_ids, changed
+
+
+def _cached_active_job_ids():
+    entry = _active_job_ids
+    hit = entry is not None and time.monotonic() - entry[0] < ACTIVE_JOB_IDS_TTL
+    record_cache("active_job_ids", hit)
+    return entry if hit else None
+
+
+def _active_job_ids_entry():
+    entry = _cached_active_job_ids()
+    if entry is None:
+        with stage_timer("active_job_ids_load"):
+            entry, changed = _store_active_job_ids(list(_active_jobs_queryset()))
+        if changed:
+            from apps.recommendation_agent.services.recommendation_cache import invalidate_all_recommendations
+            invalidate_all_recommendations()
+    return entry
+
+
+async def _active_job_ids_entry_async():
+    entry = _cached_active_job_ids()
+    if entry is None:
+        with stage_timer("active_job_ids_load"):
+            entry, changed = _store_active_job_ids([job_id async for job_id in _active_jobs_queryset()])
+        if changed:
+            from apps.recommendation_agent.services.recommendation_cache import ainvalidate_all_recommendations
+            await ainvalidate_all_recommendations()
+    return entry
+
+
+def get_active_job_ids() -> np.ndarray:
+    """
+    IDs of active, non-expired jobs (cached for ACTIVE_JOB_IDS_TTL seconds)
+
+    Returns:
+        np.ndarray: Sorted, read-only int64 array
+    """
+    return _active_job_ids_entry()[1]
+
+
+async def get_active_job_ids_async() -> np.ndarray:
+    """Async variant of get_active_job_ids"""
+    return (await _active_job_ids_entry_async())[1]
+
+
+def get_active_job_id_set() -> frozenset:
+    """Same job universe as get_active_job_ids, as a set for membership checks"""
+    return _active_job_ids_entry()[2]
+
+
+async def get_active_job_id_set_async() -> frozenset:
+    """Async variant of get_active_job_id_set"""
+    return (await _active_job_ids_entry_async())[2]
+
+
+def invalidate_active_job_ids():
+    """Expire the cached job universe (a job posting changed in this process)"""
+    global _active_job_ids
+    if _active_job_ids is not None:
+        # Kept as the baseline the next reload is compared against
+        _active_job_ids = (float("-inf"), *_active_job_ids[1:])
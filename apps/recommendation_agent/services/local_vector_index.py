@@ -0,0 +1,117 @@
+"""
+Local Vector Index - In-process stand-in for the Weaviate JobPosting collection
+
+Loads a Weaviate backup export (list of {properties, vector: {default: [...]}})
+into a normalized numpy matrix and answers near_vector queries with cosine
+distance, returning objects shaped like Weaviate's (``.properties`` and
+``.metadata.distance``). Used by load tests and offline runs via
+WEAVIATE_BACKEND=local; never by production.
+
+Backups do not always carry usable job IDs (exports can have jobId=0 for every
+object), so objects are numbered 1..N when the IDs are not unique. The index can
+be grown to LOCAL_VECTOR_INDEX_SIZE objects by replicating the export with small
+seeded noise, to approximate the search cost of a larger collection.
+"""
+import json
+import os
+from types import SimpleNamespace
+
+import numpy as np
+
+LOCAL_VECTOR_INDEX_PATH = os.getenv("LOCAL_VECTOR_INDEX_PATH", "weaviate_jobposting_backup_20251029_222626.json")
+LOCAL_VECTOR_INDEX_SIZE = int(os.getenv("LOCAL_VECTOR_INDEX_SIZE", "0"))  # 0 = size of the export
+
+_index = None
+
+
+def load_backup_objects(path: str, size: int = 0) -> list:
+    """
+    Read a Weaviate backup export as (properties, vector) pairs
+
+    Args:
+        path: Backup JSON file
+        size: Target number of objects (replicated with noise); 0 keeps the export as is
+
+    Returns:
+        list: (properties dict with a unique int jobId, np.ndarray vector) tuples
+    """
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+
+    objects = [
+        (dict(obj.get("properties") or {}), np.asarray(obj["vector"]["default"], dtype=np.float32))
+        for obj in raw
+        if (obj.get("vector") or {}).get("default")
+    ]
+    if not objects:
+        return []
+
+    job_ids = [props.get("jobId") for props, _ in objects]
+    if len(set(job_ids)) != len(job_ids) or not all(job_ids):
+        for i, (props, _) in enumerate(objects):
+            props["jobId"] = i + 1
+
+    rng = np.random.default_rng(0)
+    base_count = len(objects)
+    next_id = max(props["jobId"] for props, _ in objects) + 1
+    while len(objects) < size:
+        props, vector = objects[len(objects) % base_count]
+        noise = rng.normal(0, 0.01, size=vector.shape).astype(np.float32)
+        objects.append(({**props, "jobId": next_id}, vector + noise))
+        next_id += 1
+
+    return objects
+
+
+class LocalVectorIndex:
+    """Brute-force cosine index over a Weaviate backup export"""
+
+    def __init__(self, path: str, size: int = 0):
+        objects = load_backup_objects(path, size)
+        if not objects:
+            raise ValueError(f"No vectors found in {path}")
+
+        self.properties = [props for props, _ in objects]
+        vectors = np.stack([vector for _, vector in objects])
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        self.vectors = vectors / np.where(norms == 0, 1, norms)
+
+    @property
+    def job_ids(self) -> list:
+        return [props["jobId"] for props in self.properties]
+
+    def search(self, vector, limit: int = 10) -> list:
+        """
+        Nearest objects by cosine distance (0 = identical, 2 = opposite)
+
+        Returns:
+            list: Weaviate-like objects with .properties and .metadata.distance
+        """
+        if limit <= 0:
+            return []
+
+        query = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(query)
+        if norm == 0:
+            return []
+
+        distances = 1.0 - self.vectors @ (query / norm)
+        limit = min(limit, len(distances))
+        top = np.argpartition(distances, limit - 1)[:limit]
+        top = top[np.argsort(distances[top], kind="stable")]
+
+        return [
+            SimpleNamespace(
+                properties=self.properties[i],
+                metadata=SimpleNamespace(distance=float(distances[i])),
+            )
+            for i in top
+        ]
+
+
+def get_local_vector_index() -> LocalVectorIndex:
+    """Process-wide index, loaded on first use"""
+    global _index
+    if _index is None:
+        _index = LocalVectorIndex(LOCAL_VECTOR_INDEX_PATH, LOCAL_VECTOR_INDEX_SIZE)
+    return _index
@@ -0,0 +1,189 @@
+"""
+Recommendation Cache - Short-lived Redis cache for hybrid recommendation responses
+
+Key layout (all keys share the RECOMMENDATION_CACHE_VERSION prefix):
+    rec:v1:gen:jobs               -> generation of the active job set
+    rec:v1:gen:cand:<id>          -> generation of a candidate's feedback
+    rec:v1:res:<id>:<...>:<hash>  -> cached response for one request shape
+
+Invalidation bumps a generation counter, so stale entries are never read again
+and simply expire with their TTL. The jobs generation is bumped by the
+JobPostings signal and by any process whose periodic reload of the active job
+ID set (every ACTIVE_JOB_IDS_TTL seconds) finds it changed, which covers jobs
+written by the Spring Boot backend and jobs that expire. Because JobFeedback
+rows are also written directly by that backend (no Django signals fire), the
+key also embeds a cheap DB fingerprint of the candidate's feedback.
+"""
+import hashlib
+import json
+import logging
+import os
+
+from django.db.models import Count, Max
+
+from agent_core.utils.metrics import record_cache
+from agent_core.utils.redis_client import get_async_redis_client, get_shared_redis_client
+from apps.recommendation_agent.services.job_query_service import get_active_job_id_set_async
+
+logger = logging.getLogger(__name__)
+
+RECOMMENDATION_CACHE_TTL = int(os.getenv("RECOMMENDATION_CACHE_TTL", "300"))  # 5 minutes default
+RECOMMENDATION_CACHE_VERSION = os.getenv("RECOMMENDATION_CACHE_VERSION", "v1")
+
+_PREFIX = f"rec:{RECOMMENDATION_CACHE_VERSION}"
+JOBS_GENERATION_KEY = f"{_PREFIX}:gen:jobs"
+
+
+def _candidate_generation_key(candidate_id: int) -> str:
+    return f"{_PREFIX}:gen:cand:{candidate_id}"
+
+
+def _query_hash(query_item: dict, top_n: int) -> str:
+    """Stable hash of the request shape (query fields + top_n)"""
+    basis = json.dumps({"query": query_item, "top_n": top_n}, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha256(basis.encode("utf-8")).hexdigest()[:32]
+
+
+async def _feedback_fingerprint(candidate_id: int) -> str:
+    """Changes whenever the candidate gains or loses a JobFeedback row"""
+    from apps.recommendation_agent.models import JobFeedback
+
+    agg = await JobFeedback.objects.filter(candidate_id=candidate_id).aaggregate(
+        n=Count("id"), last=Max("id")
+    )
+    return f"{agg['n']}.{agg['last'] or 0}"
+
+
+async def build_recommendation_cache_key(candidate_id: int, query_item: dict, top_n: int):
+    """
+    Build the cache key for a recommendation request
+
+    Returns:
+        str or None: Cache key, or None if Redis is unavailable
+    """
+    r = await get_async_redis_client()
+    if r is None:
+        return None
+
+    try:
+        cand_gen, jobs_gen = await r.mget(_candidate_generation_key(candidate_id), JOBS_GENERATION_KEY)
+    except Exception as e:
+        logger.warning(f"Recommendation cache unavailable: {e}")
+        return None
+
+    feedback_fp = await _feedback_fingerprint(candidate_id)
+
+    return (
+        f"{_PREFIX}:res:{candidate_id}:{cand_gen or 0}.{jobs_gen or 0}:"
+        f"{feedback_fp}:{_query_hash(query_item, top_n)}"
+    )
+
+
+async def drop_inactive_jobs(results: dict) -> dict:
+    """Remove jobs that were closed or expired after the response was cached"""
+    cached_ids = {
+        job["job_id"]
+        for section in results.values() if isinstance(section, list)
+        for job in section
+    }
+    if not cached_ids:
+        return results
+
+    active_ids = cached_ids & await get_active_job_id_set_async()
+    if active_ids == cached_ids:
+        return results
+
+    return {
+        name: [job for job in section if job["job_id"] in active_ids] if isinstance(section, list) else section
+        for name, section in results.items()
+    }
+
+
+async def get_cached_recommendations(cache_key: str):
+    """
+    Read a cached recommendation response
+
+    Returns:
+        dict or None: Cached results (expired jobs removed) or None on miss
+    """
+    if not cache_key:
+        return None
+
+    r = await get_async_redis_client()
+    try:
+        raw = await r.get(cache_key)
+    except Exception as e:
+        logger.warning(f"Recommendation cache read failed: {e}")
+        return None
+
+    record_cache("response", raw is not None)
+    if raw is None:
+        return None
+
+    try:
+        results = json.loads(raw)
+    except json.JSONDecodeError:
+        return None
+    return await drop_inactive_jobs(results)
+
+
+async def set_cached_recommendations(cache_key: str, results: dict):
+    """Store a recommendation response with the short TTL"""
+    if not cache_key or RECOMMENDATION_CACHE_TTL <= 0:
+        return
+
+    r = await get_async_redis_client()
+    try:
+        await r.set(cache_key, json.dumps(results, ensure_ascii=False, default=str), ex=RECOMMENDATION_CACHE_TTL)
+    except Exception as e:
+        logger.warning(f"Recommendation cache write failed: {e}")
+
+
+def invalidate_candidate_recommendations(*candidate_ids: int):
+    """Invalidate every cached response of the given candidates (sync, for signals and tasks)"""
+    r = get_shared_redis_client()
+    if r is None or not candidate_ids:
+        return
+    try:
+        pipe = r.pipeline(transaction=False)
+        for candidate_id in set(candidate_ids):
+            pipe.incr(_candidate_generation_key(candidate_id))
+        pipe.execute()
+    except Exception as e:
+        logger.warning(f"Recommendation cache invalidation failed: {e}")
+
+
+async def ainvalidate_candidate_recommendations(*candidate_ids: int):
+    """Async variant of invalidate_candidate_recommendations"""
+    r = await get_async_redis_client()
+    if r is None or not candidate_ids:
+        return
+    try:
+        pipe = r.pipeline(transaction=False)
+        for candidate_id in set(candidate_ids):
+            pipe.incr(_candidate_generation_key(candidate_id))
+        await pipe.execute()
+    except Exception as e:
+        logger.warning(f"Recommendation cache invalidation failed: {e}")
+
+
+def invalidate_all_recommendations():
+    """Invalidate every cached response (the active job set changed)"""
+    r = get_shared_redis_client()
+    if r is None:
+        return
+    try:
+        r.incr(JOBS_GENERATION_KEY)
+    except Exception as e:
+        logger.warning(f"Recommendation cache invalidation failed: {e}")
+
+
+async def ainvalidate_all_recommendations():
+    """Async variant of invalidate_all_recommendations"""
+    r = await get_async_redis_client()
+    if r is None:
+        return
+    try:
+        await r.incr(JOBS_GENERATION_KEY)
+    except Exception as e:
+        logger.warning(f"Recommendation cache invalidation failed: {e}")
@@ -0,0 +1,127 @@
+"""
+Recommendation Snapshot Service - Materialized top-N recommendations per candidate
+
+A nightly Celery job recomputes the hybrid recommendations of every active
+candidate with the batch pipeline and stores them in `recommendation_snapshot`.
+The endpoint's snapshot mode serves them directly and only recomputes live when
+the snapshot is missing or older than RECOMMENDATION_SNAPSHOT_MAX_AGE.
+"""
+import logging
+import os
+from datetime import timedelta
+
+from asgiref.sync import sync_to_async
+from django.utils import timezone
+
+from agent_core.utils.metrics import record_cache
+from agent_core.utils.redis_client import close_async_redis_clients
+
+from apps.recommendation_agent.models import Candidate, RecommendationSnapshot
+from apps.recommendation_agent.services.candidate_profile_service import aget_candidate_query_items
+from apps.recommendation_agent.services.embedding_service import close_embedding_clients
+from apps.recommendation_agent.services.hybrid_recommender import get_hybrid_job_recommendations_batch
+from apps.recommendation_agent.services.job_query_service import get_active_job_ids_async
+from apps.recommendation_agent.services.recommendation_cache import drop_inactive_jobs
+from apps.recommendation_agent.services.weaviate_service import close_async_weaviate_client
+
+logger = logging.getLogger(__name__)
+
+RECOMMENDATION_SNAPSHOT_TOP_N = int(os.getenv("RECOMMENDATION_SNAPSHOT_TOP_N", "10"))
+RECOMMENDATION_SNAPSHOT_MAX_AGE = int(os.getenv("RECOMMENDATION_SNAPSHOT_MAX_AGE", "93600"))  # 26h: nightly run + slack
+RECOMMENDATION_SNAPSHOT_CHUNK_SIZE = int(os.getenv("RECOMMENDATION_SNAPSHOT_CHUNK_SIZE", "200"))
+
+
+def get_active_candidate_ids() -> list:
+    """IDs of candidates whose account is active"""
+    return list(
+        Candidate.objects.filter(account__status="ACTIVE")
+        .order_by("candidate_id")
+        .values_list("candidate_id", flat=True)
+    )
+
+
+def _save_snapshots(results: dict, top_n: int):
+    now = timezone.now()
+    snapshots = [
+        RecommendationSnapshot(candidate_id=candidate_id, results=recs, top_n=top_n, generated_at=now)
+        for candidate_id, recs in results.items()
+    ]
+    RecommendationSnapshot.objects.bulk_create(
+        snapshots,
+        update_conflicts=True,
+        unique_fields=["candidate"],
+        update_fields=["results", "top_n", "generated_at"],
+    )
+
+
+async def save_recommendation_snapshots(results: dict, top_n: int):
+    """Upsert snapshots (candidate_id -> hybrid recommendations)"""
+    if results:
+        await sync_to_async(_save_snapshots)(results, top_n)
+
+
+async def build_recommendation_snapshots(candidate_ids: list, top_n: int = RECOMMENDATION_SNAPSHOT_TOP_N) -> dict:
+    """
+    Compute and store snapshots for one chunk of candidates
+
+    Returns:
+        dict: Counts of stored and skipped (no profile data) candidates
+    """
+    query_items = await aget_candidate_query_items(candidate_ids)
+    found_ids = [cid for cid in candidate_ids if query_items.get(cid)]
+
+    if found_ids:
+        job_ids = await get_active_job_ids_async()
+        results = await get_hybrid_job_recommendations_batch(
+            candidate_ids=found_ids,
+            query_items=[query_items[cid] for cid in found_ids],
+            job_ids=job_ids,
+            top_n=top_n
+        )
+        await save_recommendation_snapshots(results, top_n)
+
+    return {"stored": len(found_ids), "skipped": len(candidate_ids) - len(found_ids)}
+
+
+async def run_snapshot_chunk(candidate_ids: list, top_n: int = RECOMMENDATION_SNAPSHOT_TOP_N) -> dict:
+    """
+    build_recommendation_snapshots on a short-lived event loop (one async_to_sync
+    call per Celery task): the loop's Weaviate, embedding and Redis clients are
+    closed before it is discarded instead of leaking one set per chunk
+    """
+    try:
+        return await build_recommendation_snapshots(candidate_ids, top_n)
+    finally:
+        for close in (close_async_weaviate_client, close_embedding_clients, close_async_redis_clients):
+            try:
+                await close()
+            except Exception as e:
+                logger.warning(f"Snapshot chunk client close failed: {e}")
+
+
+def _truncate(results: dict, top_n: int) -> dict:
+    return {
+        name: section[:top_n] if isinstance(section, list) else section
+        for name, section in results.items()
+    }
+
+
+async def get_fresh_snapshot(candidate_id: int, top_n: int, max_age: int = RECOMMENDATION_SNAPSHOT_MAX_AGE):
+    """
+    Read a candidate's snapshot if it is recent enough and deep enough
+
+    Returns:
+        tuple or None: (results with expired jobs removed, generated_at), or None
+    """
+    snapshot = await RecommendationSnapshot.objects.filter(candidate_id=candidate_id).afirst()
+    fresh = (
+        snapshot is not None
+        and snapshot.top_n >= top_n
+        and timezone.now() - snapshot.generated_at <= timedelta(seconds=max_age)
+    )
+    record_cache("snapshot", fresh)
+    if not fresh:
+        return None
+
+    results = await drop_inactive_jobs(snapshot.results)
+    return _truncate(results, top_n), snapshot.generated_at
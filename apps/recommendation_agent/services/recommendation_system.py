@@ -22,9 +22,17 @@ from django.conf import settings
 # Import recommendation services
 from apps.recommendation_agent.services.content_based_recommender import get_content_based_recommendations
 from apps.recommendation_agent.services.collaborative_recommender import get_collaborative_filtering_recommendations
-from apps.recommendation_agent.services.hybrid_recommender import get_hybrid_job_recommendations
-from apps.recommendation_agent.services.job_query_service import query_all_jobs, query_all_jobs_async
-from apps.recommendation_agent.services.embedding_service import get_gemini_embedding
+from apps.recommendation_agent.services.hybrid_recommender import (
+    get_hybrid_job_recommendations,
+    get_hybrid_job_recommendations_batch,
+)
+from apps.recommendation_agent.services.job_query_service import (
+    query_all_jobs,
+    query_all_jobs_async,
+    get_active_job_ids,
+    get_active_job_ids_async,
+)
+from apps.recommendation_agent.services.embedding_service import get_gemini_embedding, get_gemini_embedding_async
 
 
 def get_sqlalchemy_engine():
@@ -53,8 +61,12 @@ __all__ = [
     'get_content_based_recommendations',
     'get_collaborative_filtering_recommendations',
     'get_hybrid_job_recommendations',
+    'get_hybrid_job_recommendations_batch',
     'query_all_jobs',
     'query_all_jobs_async',
+    'get_active_job_ids',
+    'get_active_job_ids_async',
     'get_gemini_embedding',
+    'get_gemini_embedding_async',
     'get_sqlalchemy_engine'
 ]
@@ -1,12 +1,26 @@
 import asyncio
-from datetime import date
+import os
+import weakref
 
-from agent_core.weaviate_config import WeaviateClientManager
+from agent_core.utils.metrics import record_candidates, stage_timer
+from agent_core.weaviate_config import WeaviateClientManager, AsyncWeaviateClientManager
+from apps.recommendation_agent.services.job_query_service import (
+    get_active_job_id_set,
+    get_active_job_id_set_async,
+)
+from apps.recommendation_agent.services.local_vector_index import get_local_vector_index
+
+# "local" serves near_vector from the in-process index (load tests / offline runs)
+WEAVIATE_BACKEND = os.getenv("WEAVIATE_BACKEND", "weaviate").lower()
 
 # Lazy initialization - don't connect on import
 _manager = None
 _client = None
 
+# One async client (and lock guarding its connect) per event loop
+_async_managers = weakref.WeakKeyDictionary()
+_async_locks = weakref.WeakKeyDictionary()
+
 def get_weaviate_client():
     """Get Weaviate client with lazy initialization"""
     global _manager, _client
@@ -15,35 +29,30 @@ def get_weaviate_client():
         _client = _manager.get_client()
     return _client
 
-def _query_weaviate_sync(vector, limit):
-    """Synchronous function to query Weaviate using v4 API with default vector"""
-    from apps.recommendation_agent.models import JobPostings
-
-    # Get client lazily
-    client = get_weaviate_client()
-
-    # Get the collection
-    job_collection = client.collections.get("JobPosting")
+async def get_async_weaviate_client():
+    """Get the async Weaviate client bound to the running event loop"""
+    loop = asyncio.get_running_loop()
+    lock = _async_locks.setdefault(loop, asyncio.Lock())
+    async with lock:
+        manager = _async_managers.get(loop)
+        if manager is None:
+            manager = AsyncWeaviateClientManager()
+            _async_managers[loop] = manager
+        return await manager.get_client()
 
-    # Query using v4 API with default vector (no target_vector needed)
-    response = job_collection.query.near_vector(
-        near_vector=vector,
-        limit=limit,
-        return_metadata=['distance'],
-        include_vector=True
-    )
+async def close_async_weaviate_client():
+    """Close the running loop's async Weaviate client (the loop is about to be discarded)"""
+    loop = asyncio.get_running_loop()
+    _async_locks.pop(loop, None)
+    manager = _async_managers.pop(loop, None)
+    if manager is not None:
+        await manager.close()
 
-    # Get valid job IDs (not expired) from database
-    today = date.today()
-    valid_job_ids = set(
-        JobPostings.objects.filter(
-            status="ACTIVE",
-            expiration_date__gte=today
-        ).values_list('id', flat=True)
-    )
 
+def _format_weaviate_objects(objects, valid_job_ids, limit):
+    """Convert Weaviate objects to recommendation items, skipping expired jobs"""
     items = []
-    for obj in response.objects:
+    for obj in objects:
         job_id = obj.properties.get("jobId")
 
         # Skip expired jobs
@@ -70,7 +79,101 @@ def _query_weaviate_sync(vector, limit):
         })
     return items
 
+
+def _query_weaviate_sync(vector, limit):
+    """Synchronous function to query Weaviate using v4 API with default vector"""
+    if WEAVIATE_BACKEND == "local":
+        objects = get_local_vector_index().search(vector, limit)
+        return _format_weaviate_objects(objects, get_active_job_id_set(), limit)
+
+    # Get client lazily
+    client = get_weaviate_client()
+
+    # Get the collection
+    job_collection = client.collections.get("JobPosting")
+
+    # Query using v4 API with default vector (no target_vector needed)
+    response = job_collection.query.near_vector(
+        near_vector=vector,
+        limit=limit,
+        return_metadata=['distance'],
+        include_vector=True
+    )
+
+    # Get valid job IDs (not expired) from the shared job universe
+    valid_job_ids = get_active_job_id_set()
+
+    return _format_weaviate_objects(response.objects, valid_job_ids, limit)
+
+
+async def _get_job_collection_async():
+    """JobPosting collection of the loop-bound client (None means the local index)"""
+    if WEAVIATE_BACKEND == "local":
+        return None
+    client = await get_async_weaviate_client()
+    return client.collections.get("JobPosting")
+
+
+async def _near_vector_async(job_collection, vector, limit):
+    if job_collection is None:
+        return get_local_vector_index().search(vector, limit)
+
+    # Vectors are not used downstream, so don't ship them back over the wire
+    response = await job_collection.query.near_vector(
+        near_vector=vector,
+        limit=limit,
+        return_metadata=['distance'],
+    )
+    return response.objects
+
+
 async def query_weaviate_async(vector: list, limit: int = 10):
-    """Async wrapper to query Weaviate"""
-    loop = asyncio.get_running_loop()
-    return await loop.run_in_executor(None, _query_weaviate_sync, vector, limit)
+    """Query Weaviate with the loop-bound async client, filtered by the shared active job set"""
+    job_collection = await _get_job_collection_async()
+
+    with stage_timer("weaviate_query"):
+        objects = await _near_vector_async(job_collection, vector, limit)
+    with stage_timer("active_job_filter"):
+        valid_job_ids = await get_active_job_id_set_async()
+        items = _format_weaviate_objects(objects, valid_job_ids, limit)
+
+    record_candidates("weaviate", fetched=len(objects), filtered=len(objects) - len(items))
+    return items
+
+
+# Upper bound on concurrent near_vector searches issued by one batch
+WEAVIATE_BATCH_CONCURRENCY = 16
+
+
+async def query_weaviate_batch_async(vectors: list, limit: int = 10, valid_job_ids=None):
+    """
+    Run one near_vector search per query vector, concurrently
+
+    Each vector is a separate near_vector request on the loop-bound client;
+    at most WEAVIATE_BATCH_CONCURRENCY of them are in flight at once. The
+    active job set is loaded once for the whole batch.
+
+    Args:
+        vectors: Query vectors (None entries yield empty results)
+        limit: Results per query
+        valid_job_ids: Active job IDs; the shared job universe when omitted
+
+    Returns:
+        list: One result list per query vector, in input order
+    """
+    job_collection = await _get_job_collection_async()
+    if valid_job_ids is None:
+        valid_job_ids = await get_active_job_id_set_async()
+
+    semaphore = asyncio.Semaphore(WEAVIATE_BATCH_CONCURRENCY)
+
+    async def search(vector):
+        if vector is None:
+            return []
+        async with semaphore:
+            objects = await _near_vector_async(job_collection, vector, limit)
+        items = _format_weaviate_objects(objects, valid_job_ids, limit)
+        record_candidates("weaviate", fetched=len(objects), filtered=len(objects) - len(items))
+        return items
+
+    return await asyncio.gather(*(search(vector) for vector in vectors))
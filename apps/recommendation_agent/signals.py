@@ -0,0 +1,68 @@
+"""
+Signal handlers that keep the recommendation and candidate profile caches
+consistent with writes made through this service. Writes made directly by other services are caught by the
+DB fingerprints embedded in the cache key.
+
+Services are imported inside the handlers: the services package runs
+django.setup() on import, which must not happen while apps are loading.
+"""
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from apps.recommendation_agent.models import Candidate, JobFeedback, JobPostings, Resume, Skill
+
+
+@receiver([post_save, post_delete], sender=JobFeedback)
+def job_feedback_changed(sender, instance, signal, **kwargs):
+    """New or removed feedback changes the candidate's CF neighbourhood"""
+    from apps.recommendation_agent.services.interaction_store import get_interaction_store
+    from apps.recommendation_agent.services.recommendation_cache import invalidate_candidate_recommendations
+
+    # Saves are applied as a delta; removals need a rebuild of this process's interactions
+    store = get_interaction_store()
+    if signal is post_save:
+        store.apply_local([{
+            "candidate_id": instance.candidate_id,
+            "job_id": instance.job_id,
+            "feedback_type": instance.feedback_type,
+            "score": instance.score,
+        }])
+    else:
+        store.invalidate()
+    invalidate_candidate_recommendations(instance.candidate_id)
+
+
+@receiver([post_save, post_delete], sender=JobPostings)
+def job_posting_changed(sender, instance, **kwargs):
+    """Any change to a job posting may change the active job set"""
+    from apps.recommendation_agent.services.job_query_service import invalidate_active_job_ids
+    from apps.recommendation_agent.services.recommendation_cache import invalidate_all_recommendations
+
+    invalidate_active_job_ids()
+    invalidate_all_recommendations()
+
+
+@receiver([post_save, post_delete], sender=Candidate)
+def candidate_changed(sender, instance, **kwargs):
+    """Title, name or experience changed"""
+    from apps.recommendation_agent.services.candidate_profile_service import invalidate_candidate_profiles
+
+    invalidate_candidate_profiles(instance.candidate_id)
+
+
+@receiver([post_save, post_delete], sender=Resume)
+def resume_changed(sender, instance, **kwargs):
+    """about_me or the latest resume changed"""
+    from apps.recommendation_agent.services.candidate_profile_service import invalidate_candidate_profiles
+
+    invalidate_candidate_profiles(instance.candidate_id)
+
+
+@receiver([post_save, post_delete], sender=Skill)
+def skill_changed(sender, instance, **kwargs):
+    """Skills only point at their resume; resolve the owning candidate"""
+    from apps.recommendation_agent.services.candidate_profile_service import invalidate_candidate_profiles
+
+    candidate_id = Resume.objects.filter(resume_id=instance.resume_id).values_list('candidate_id', flat=True).first()
+    if candidate_id is not None:
+        invalidate_candidate_profiles(candidate_id)
@@ -1,5 +1,6 @@
 # apps/recommendations/tasks.py
-from celery import shared_task
+from asgiref.sync import async_to_sync
+from celery import group, shared_task
 from apps.recommendation_agent.services.train_cf_model import train_cf_model
 
 @shared_task
@@ -13,6 +14,38 @@ def train_cf_model_task():
         print("⚠️ CF model not updated (insufficient data).")
 
 
+@shared_task
+def refresh_recommendation_snapshots_task(top_n=None, chunk_size=None):
+    """Celery task fan out snapshot computation for all active candidates in parallel chunks"""
+    from apps.recommendation_agent.services.recommendation_snapshot_service import (
+        RECOMMENDATION_SNAPSHOT_CHUNK_SIZE,
+        RECOMMENDATION_SNAPSHOT_TOP_N,
+        get_active_candidate_ids,
+    )
+
+    top_n = top_n or RECOMMENDATION_SNAPSHOT_TOP_N
+    chunk_size = chunk_size or RECOMMENDATION_SNAPSHOT_CHUNK_SIZE
+
+    candidate_ids = get_active_candidate_ids()
+    chunks = [candidate_ids[i:i + chunk_size] for i in range(0, len(candidate_ids), chunk_size)]
+    print(f"📸 Refreshing recommendation snapshots: {len(candidate_ids)} candidates in {len(chunks)} chunks")
 
+    if chunks:
+        group(build_recommendation_snapshot_chunk_task.s(chunk, top_n) for chunk in chunks).apply_async()
+    return {"candidates": len(candidate_ids), "chunks": len(chunks)}
 
 
+@shared_task
+def build_recommendation_snapshot_chunk_task(candidate_ids, top_n):
+    """Celery task compute and store snapshots for one chunk of candidates"""
+    from apps.recommendation_agent.services.recommendation_snapshot_service import run_snapshot_chunk
+
+    return async_to_sync(run_snapshot_chunk)(candidate_ids, top_n)
+
+
+@shared_task
+def flush_feedback_stream_task():
+    """Celery task write buffered feedback events to job_feedback in bulk"""
+    from apps.recommendation_agent.services.feedback_ingest_service import flush_feedback_stream
+
+    return flush_feedback_stream()
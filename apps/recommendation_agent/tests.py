@@ -1,3 +1,552 @@
-from django.test import TestCase
+import asyncio
+import datetime
+import json
+from types import SimpleNamespace
+from unittest import mock
 
-# Create your tests here.
+import numpy as np
+from asgiref.sync import async_to_sync
+
+from django.test import SimpleTestCase, TestCase
+from django.utils import timezone
+from google.ai import generativelanguage as glm
+from prometheus_client import REGISTRY
+
+from agent_core.utils import metrics, redis_client
+from agent_core.utils.testing import FakeRedisMixin, UnmanagedTablesMixin
+from apps.recommendation_agent.models import (
+    Account,
+    Candidate,
+    JobFeedback,
+    JobPostings,
+    RecommendationSnapshot,
+    Recruiter,
+    Resume,
+    Skill,
+)
+from apps.recommendation_agent import views
+from apps.recommendation_agent.services import (
+    collaborative_recommender,
+    content_based_recommender,
+    embedding_service,
+    feedback_ingest_service,
+    hybrid_recommender,
+    job_query_service,
+    recommendation_snapshot_service,
+)
+from apps.recommendation_agent.services.feedback_ingest_service import flush_feedback_stream, ingest_feedback
+from apps.recommendation_agent.services.interaction_store import (
+    FEEDBACK_FLUSHED_ID_KEY,
+    FEEDBACK_STREAM_KEY,
+    InteractionStore,
+)
+from apps.recommendation_agent.services.recommendation_cache import (
+    JOBS_GENERATION_KEY,
+    build_recommendation_cache_key,
+)
+
+
+def make_recruiter():
+    account = Account.objects.create(email="recruiter@example.com", password="x")
+    return Recruiter.objects.create(account=account, company_name="Acme")
+
+
+def make_job(recruiter, job_id, days_left=5):
+    return JobPostings.objects.create(
+        id=job_id,
+        recruiter=recruiter,
+        title=f"Developer {job_id}",
+        description="Python developer",
+        address="Ha Noi",
+        status="ACTIVE",
+        expiration_date=datetime.date.today() + datetime.timedelta(days=days_left),
+    )
+
+
+def make_candidate(candidate_id, title="Backend Developer", skills=()):
+    account = Account.objects.create(email=f"c{candidate_id}@example.com", password="x", status="ACTIVE")
+    candidate = Candidate.objects.create(candidate_id=candidate_id, account=account, title=title, fullname=f"Candidate {candidate_id}")
+    if skills:
+        resume = Resume.objects.create(candidate=candidate, about_me="I build APIs")
+        for name in skills:
+            Skill.objects.create(resume=resume, skill_name=name, skill_type="tech", year_of_experience=2)
+    return candidate
+
+
+def job_results(*job_ids):
+    return {"hybrid_top": [{"job_id": job_id, "title": f"Developer {job_id}", "score": 1.0} for job_id in job_ids]}
+
+
+class LoopBoundGeminiClient:
+    """Fails like a gRPC channel used on another event loop than the one it was created on"""
+
+    instances = []
+
+    def __init__(self, **kwargs):
+        self.loop = asyncio.get_running_loop()
+        self.closed = False
+        self.transport = self
+        self.instances.append(self)
+
+    async def batch_embed_contents(self, request, **kwargs):
+        if self.closed or asyncio.get_running_loop() is not self.loop:
+            raise RuntimeError("Event loop is closed")
+        return glm.BatchEmbedContentsResponse(embeddings=[{"values": [1.0, 0.0]} for _ in request.requests])
+
+    async def close(self):
+        self.closed = True
+
+
+class RecommendationTestCase(UnmanagedTablesMixin, FakeRedisMixin, TestCase):
+    def setUp(self):
+        super().setUp()
+        job_query_service._active_job_ids = None
+        self.addCleanup(setattr, job_query_service, "_active_job_ids", None)
+
+
+class RecommendationCacheKeyTests(RecommendationTestCase):
+    def setUp(self):
+        super().setUp()
+        self.recruiter = make_recruiter()
+        make_job(self.recruiter, 1)
+        make_candidate(1)
+
+    async def test_key_is_stable_without_changes(self):
+        first = await build_recommendation_cache_key(1, {"title": "dev"}, 10)
+        second = await build_recommendation_cache_key(1, {"title": "dev"}, 10)
+        self.assertEqual(first, second)
+
+    async def test_key_does_not_load_active_jobs(self):
+        with mock.patch.object(job_query_service, "_active_jobs_queryset") as queryset:
+            await build_recommendation_cache_key(1, {"title": "dev"}, 10)
+        queryset.assert_not_called()
+
+    async def test_job_posting_signal_changes_key(self):
+        before = await build_recommendation_cache_key(1, {"title": "dev"}, 10)
+        await JobPostings.objects.filter(id=1).aupdate(status="CLOSED")
+        job = await JobPostings.objects.aget(id=1)
+        await job.asave()  # post_save bumps the jobs generation
+        after = await build_recommendation_cache_key(1, {"title": "dev"}, 10)
+        self.assertNotEqual(before, after)
+
+    async def test_unreachable_redis_is_not_retried_on_every_request(self):
+        class DownRedis:
+            async def ping(self):
+                raise ConnectionError("Connection refused")
+
+            async def aclose(self):
+                pass
+
+        from_url = mock.Mock(return_value=DownRedis())
+        with mock.patch.object(redis_client, "aioredis", SimpleNamespace(Redis=SimpleNamespace(from_url=from_url))):
+            first = await build_recommendation_cache_key(1, {"title": "dev"}, 10)
+            second = await build_recommendation_cache_key(1, {"title": "dev"}, 10)
+
+        self.assertEqual((first, second), (None, None))
+        from_url.assert_called_once()
+
+    def test_reload_with_changed_job_set_bumps_generation(self):
+        job_query_service.get_active_job_ids()
+        generation = int(self.redis.get(JOBS_GENERATION_KEY) or 0)
+
+        # Written without signals, like the Spring Boot backend does
+        JobPostings.objects.bulk_create([JobPostings(
+            id=2, recruiter=self.recruiter, title="Developer 2", status="ACTIVE",
+            expiration_date=datetime.date.today() + datetime.timedelta(days=5),
+        )])
+        with mock.patch.object(job_query_service, "ACTIVE_JOB_IDS_TTL", 0):
+            self.assertEqual(list(job_query_service.get_active_job_ids()), [1, 2])
+            self.assertEqual(int(self.redis.get(JOBS_GENERATION_KEY)), generation + 1)
+
+            # Same set on the next reload: no bump
+            job_query_service.get_active_job_ids()
+        self.assertEqual(int(self.redis.get(JOBS_GENERATION_KEY)), generation + 1)
+
+
+class RecommendationSnapshotTests(RecommendationTestCase):
+    url = "/api/v1/jobs/job-postings/"
+
+    def setUp(self):
+        super().setUp()
+        recruiter = make_recruiter()
+        for job_id in range(1, 13):
+            make_job(recruiter, job_id)
+        make_candidate(1, skills=["python", "django"])
+
+    def _post(self, top_n, results):
+        with mock.patch("apps.recommendation_agent.views.get_hybrid_job_recommendations",
+                        mock.AsyncMock(return_value=results)):
+            return self.client.post(self.url, {"candidate_id": 1, "top_n": top_n, "mode": "snapshot"},
+                                    content_type="application/json")
+
+    def test_shallow_live_result_does_not_replace_snapshot(self):
+        RecommendationSnapshot.objects.create(candidate_id=1, results=job_results(*range(1, 11)),
+                                              top_n=10, generated_at=timezone.now() - datetime.timedelta(days=2))
+
+        response = self._post(3, job_results(1, 2, 3))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["snapshot"], {"hit": False})
+        self.assertEqual(RecommendationSnapshot.objects.get(candidate_id=1).top_n, 10)
+
+    def test_full_depth_live_result_is_stored(self):
+        response = self._post(recommendation_snapshot_service.RECOMMENDATION_SNAPSHOT_TOP_N, job_results(*range(1, 11)))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(RecommendationSnapshot.objects.get(candidate_id=1).top_n,
+                         recommendation_snapshot_service.RECOMMENDATION_SNAPSHOT_TOP_N)
+
+        # Served from the snapshot on the next request, truncated to top_n
+        response = self._post(3, {})
+        self.assertTrue(response.json()["snapshot"]["hit"])
+        self.assertEqual([job["job_id"] for job in response.json()["results"]["hybrid_top"]], [1, 2, 3])
+
+    async def test_chunk_closes_loop_clients_even_on_failure(self):
+        closers = {name: mock.AsyncMock() for name in (
+            "close_async_weaviate_client", "close_embedding_clients", "close_async_redis_clients")}
+        with mock.patch.multiple(recommendation_snapshot_service, **closers), \
+                mock.patch.object(recommendation_snapshot_service, "build_recommendation_snapshots",
+                                  mock.AsyncMock(side_effect=RuntimeError("weaviate down"))):
+            with self.assertRaises(RuntimeError):
+                await recommendation_snapshot_service.run_snapshot_chunk([1], 10)
+        for close in closers.values():
+            close.assert_awaited_once()
+
+    def test_chunks_have_their_own_queue(self):
+        from Careermate.celery_app import app
+
+        routes = app.conf.task_routes
+        self.assertEqual(routes["apps.recommendation_agent.tasks.build_recommendation_snapshot_chunk_task"]["queue"], "snapshots")
+        self.assertEqual(routes["apps.recommendation_agent.tasks.refresh_recommendation_snapshots_task"]["queue"], "training")
+
+    def test_chunks_run_one_after_another_in_one_process(self):
+        # Each Celery chunk task runs on its own short-lived loop (async_to_sync)
+        async def embed_profiles(candidate_ids, top_n):
+            return await embedding_service.get_gemini_embeddings_batch_async(["python django"] * len(candidate_ids))
+
+        LoopBoundGeminiClient.instances = []
+        with mock.patch.object(embedding_service, "EMBEDDING_SERVICE_URL", None), \
+                mock.patch.object(embedding_service.glm, "GenerativeServiceAsyncClient", LoopBoundGeminiClient), \
+                mock.patch.object(recommendation_snapshot_service, "build_recommendation_snapshots", embed_profiles):
+            first = async_to_sync(recommendation_snapshot_service.run_snapshot_chunk)([1, 2], 10)
+            second = async_to_sync(recommendation_snapshot_service.run_snapshot_chunk)([3], 10)
+
+        self.assertEqual(first, [[1.0, 0.0], [1.0, 0.0]])
+        self.assertEqual(second, [[1.0, 0.0]])
+        self.assertEqual(len(LoopBoundGeminiClient.instances), 2)
+        self.assertTrue(all(client.closed for client in LoopBoundGeminiClient.instances))
+
+
+class FeedbackStreamTests(RecommendationTestCase):
+    def setUp(self):
+        super().setUp()
+        recruiter = make_recruiter()
+        for job_id in (1, 2, 3):
+            make_job(recruiter, job_id)
+        make_candidate(1)
+        make_candidate(2)
+
+    def _ingest(self, *events):
+        return async_to_sync(ingest_feedback)([
+            {"candidate_id": candidate_id, "job_id": job_id, "feedback_type": feedback_type, "score": None}
+            for candidate_id, job_id, feedback_type in events
+        ])
+
+    def test_unknown_candidates_and_jobs_are_rejected_before_buffering(self):
+        result = self._ingest((1, 1, "apply"), (99, 1, "apply"), (1, 99, "like"))
+
+        self.assertEqual(result, {"accepted": 1, "rejected": 2, "buffered": True})
+        self.assertEqual(self.redis.xlen(FEEDBACK_STREAM_KEY), 1)
+        user_jobs, _, _ = InteractionStore().get()
+        self.assertEqual(user_jobs, {1: {1}})
+
+    def test_flush_writes_rows_and_records_position(self):
+        self._ingest((1, 1, "apply"), (2, 1, "like"), (99, 2, "apply"))
+
+        self.assertEqual(flush_feedback_stream(), {"flushed": 2, "batches": 1})
+        self.assertEqual(
+            set(JobFeedback.objects.values_list("candidate_id", "job_id", "feedback_type")),
+            {(1, 1, "apply"), (2, 1, "like")},
+        )
+        last_id = self.redis.xrevrange(FEEDBACK_STREAM_KEY, count=1)[0][0]
+        self.assertEqual(self.redis.get(FEEDBACK_FLUSHED_ID_KEY), last_id)
+
+        # Nothing new: a second run writes nothing
+        self.assertEqual(flush_feedback_stream(), {"flushed": 0, "batches": 0})
+
+    def test_rebuild_replays_only_unflushed_events(self):
+        self._ingest((1, 1, "apply"))
+        flush_feedback_stream()
+        self._ingest((2, 2, "like"))
+
+        store = InteractionStore()
+        with mock.patch.object(store, "_apply", wraps=store._apply) as apply:
+            user_jobs, job_users, _ = store.get()
+        self.assertEqual(user_jobs, {1: {1}, 2: {2}})
+        self.assertEqual(set(job_users), {1, 2})
+        # Only the unflushed event came from the stream
+        self.assertEqual(len(apply.call_args.args[0]), 1)
+
+    def test_flush_trims_written_entries_older_than_rebuild_interval(self):
+        self._ingest((1, 1, "apply"), (1, 2, "apply"))
+        with mock.patch.object(feedback_ingest_service, "CF_INTERACTIONS_TTL", 0):
+            flush_feedback_stream()
+        # Everything before the last written entry is gone
+        self.assertEqual(self.redis.xlen(FEEDBACK_STREAM_KEY), 1)
+
+        self._ingest((2, 3, "apply"))
+        with mock.patch.object(feedback_ingest_service, "CF_INTERACTIONS_TTL", 3600):
+            flush_feedback_stream()
+        # Recent entries stay for processes that are still tailing
+        self.assertEqual(self.redis.xlen(FEEDBACK_STREAM_KEY), 2)
+
+    def test_get_returns_snapshot_unaffected_by_later_events(self):
+        store = InteractionStore()
+        user_jobs, job_users, weights = store.get()
+        self.assertEqual(user_jobs, {})
+
+        self._ingest((1, 1, "apply"))
+        first = store.get()
+        self._ingest((1, 2, "like"), (2, 1, "like"))
+        second = store.get()
+
+        self.assertEqual(first[0], {1: {1}})
+        self.assertEqual(first[1], {1: {1: 1.0}})
+        self.assertEqual(second[0], {1: {1, 2}, 2: {1}})
+        self.assertEqual(second[1][1], {1: 1.0, 2: 0.7})
+
+
+class JobRecommendationViewTests(RecommendationTestCase):
+    url = "/api/v1/jobs/job-postings/"
+
+    def setUp(self):
+        super().setUp()
+        recruiter = make_recruiter()
+        for job_id in (1, 2, 3):
+            make_job(recruiter, job_id)
+        make_candidate(1, skills=["python", "django"])
+        make_candidate(2)
+        self.hybrid = mock.AsyncMock(return_value=job_results(1, 2))
+        patcher = mock.patch.object(views, "get_hybrid_job_recommendations", self.hybrid)
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    async def _post(self, path="", **data):
+        return await self.async_client.post(self.url + path, data, content_type="application/json")
+
+    async def test_profile_query_is_served_from_cache_the_second_time(self):
+        first = await self._post(candidate_id=1, top_n=2)
+        second = await self._post(candidate_id=1, top_n=2)
+
+        self.assertEqual(first.status_code, 200)
+        self.assertEqual(first.json()["cache"], {"hit": False, "bypassed": False})
+        self.assertEqual(second.json()["cache"], {"hit": True})
+        self.assertEqual(second.json()["results"], job_results(1, 2))
+        self.hybrid.assert_awaited_once()
+        query_item = self.hybrid.await_args.kwargs["query_item"]
+        self.assertEqual(sorted(query_item["skills"]), ["django", "python"])
+        self.assertEqual(sorted(self.hybrid.await_args.kwargs["job_ids"]), [1, 2, 3])
+
+    async def test_explain_bypasses_cache(self):
+        await self._post(candidate_id=1, top_n=2)
+        response = await self._post(candidate_id=1, top_n=2, explain=True)
+
+        self.assertEqual(response.json()["cache"], {"hit": False, "bypassed": True})
+        self.assertEqual(self.hybrid.await_count, 2)
+
+    async def test_unknown_candidate_and_empty_profile(self):
+        self.assertEqual((await self._post(candidate_id=99)).status_code, 404)
+        # Candidate 2 has a title only: a usable profile query
+        self.assertEqual((await self._post(candidate_id=2)).status_code, 200)
+
+    async def test_batch_reports_missing_candidates(self):
+        batch = mock.AsyncMock(return_value={1: job_results(1), 2: job_results(2)})
+        with mock.patch.object(views, "get_hybrid_job_recommendations_batch", batch):
+            response = await self._post("batch/", candidate_ids=[1, 99, 2, 1], top_n=1)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.json()["missing"], [99])
+        self.assertEqual(batch.await_args.kwargs["candidate_ids"], [1, 2])
+
+
+class CandidatePaginationTests(RecommendationTestCase):
+    url = "/api/v1/jobs/candidates/"
+
+    def setUp(self):
+        super().setUp()
+        for candidate_id in (3, 5, 8, 13, 21):
+            make_candidate(candidate_id, skills=["python"])
+
+    async def _get(self, expected_status=200, **params):
+        response = await self.async_client.get(self.url, params)
+        self.assertEqual(response.status_code, expected_status)
+        if response.streaming:
+            return json.loads("".join([chunk.decode() async for chunk in response.streaming_content]))
+        return response.json()
+
+    async def test_keyset_pages_cover_every_candidate_once(self):
+        first = await self._get(limit=2, total="exact")
+        second = await self._get(limit=2, cursor=first["next_cursor"])
+        last = await self._get(limit=2, cursor=second["next_cursor"])
+
+        self.assertEqual([first["total"], first["next_cursor"], second["next_cursor"]], [5, 5, 13])
+        self.assertEqual(
+            [c["candidate_id"] for page in (first, second, last) for c in page["data"]],
+            [3, 5, 8, 13, 21],
+        )
+        self.assertIsNone(last["next_cursor"])
+
+    async def test_total_is_only_counted_on_request(self):
+        default = await self._get(limit=10)
+        none = await self._get(limit=10, total="none")
+
+        # No table statistics on SQLite: the default estimate is unknown, not a COUNT(*)
+        self.assertEqual((default["total"], default["total_estimated"]), (None, False))
+        self.assertIsNone(none["total"])
+        self.assertIsNone(none["next_cursor"])
+        self.assertEqual(len(none["data"]), 5)
+
+    async def test_invalid_parameters_are_rejected(self):
+        for params in ({"cursor": "abc"}, {"cursor": "5;DROP"}, {"limit": "x"}, {"total": "all"}):
+            page = await self._get(expected_status=400, **params)
+            self.assertFalse(page["success"])
+
+    async def test_streamed_page_matches_buffered_page(self):
+        buffered = await self._get(limit=10, cursor=3)
+        with mock.patch.object(views, "CANDIDATE_STREAM_THRESHOLD", 1), mock.patch.object(views, "CANDIDATE_STREAM_CHUNK", 3):
+            streamed = await self._get(limit=10, cursor=3)
+
+        self.assertEqual(streamed, buffered)
+        self.assertEqual([c["candidate_id"] for c in streamed["data"]], [5, 8, 13, 21])
+
+
+class CollaborativeBatchTests(RecommendationTestCase):
+    def setUp(self):
+        super().setUp()
+        recruiter = make_recruiter()
+        for job_id in range(1, 11):
+            make_job(recruiter, job_id)
+        # Random positive interactions; jobs 11-12 are interacted with but not active
+        rng = np.random.default_rng(7)
+        user_job_weights = {}
+        for user_id in range(1, 16):
+            jobs = rng.choice(np.arange(1, 13), size=rng.integers(1, 6), replace=False)
+            user_job_weights[user_id] = {
+                int(job_id): float(rng.choice([0.3, 0.5, 0.7, 1.0]) * rng.choice([1, 2]))
+                for job_id in jobs
+            }
+        job_users = {}
+        for user_id, weights in user_job_weights.items():
+            for job_id, weight in weights.items():
+                job_users.setdefault(job_id, {})[user_id] = weight
+        interactions = ({user_id: set(weights) for user_id, weights in user_job_weights.items()}, job_users, user_job_weights)
+        patcher = mock.patch.object(collaborative_recommender, "get_interaction_store",
+                                    return_value=SimpleNamespace(get=lambda: interactions))
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_batch_matches_the_per_candidate_path(self):
+        candidate_ids = list(range(1, 18))  # 16 and 17 have no interactions
+        job_ids = list(range(1, 11))
+
+        with mock.patch.object(collaborative_recommender, "CF_BATCH_CHUNK_SIZE", 4):
+            batch = collaborative_recommender._collaborative_filtering_batch_sync(candidate_ids, job_ids, n=5)
+
+        self.assertEqual(sorted(batch), candidate_ids)
+        for candidate_id in candidate_ids:
+            single = collaborative_recommender._collaborative_filtering_sync(candidate_id, job_ids, n=5)
+            with self.subTest(candidate_id=candidate_id):
+                self.assertEqual(
+                    [(job["job_id"], job["raw_cf_score"], job["similarity"]) for job in batch[candidate_id]],
+                    [(job["job_id"], job["raw_cf_score"], job["similarity"]) for job in single],
+                )
+        self.assertTrue(any(batch.values()))
+        self.assertFalse(batch[16] or batch[17])
+
+
+class MetricsTests(RecommendationTestCase):
+    def setUp(self):
+        super().setUp()
+        make_job(make_recruiter(), 1)
+        make_candidate(1, skills=["python"])
+
+    @staticmethod
+    def _hybrid_count():
+        return REGISTRY.get_sample_value("recommendation_stage_duration_seconds_count", {"stage": "hybrid_total"}) or 0
+
+    def test_request_is_timed_and_scraped(self):
+        before = self._hybrid_count()
+        with mock.patch.object(views, "get_hybrid_job_recommendations", mock.AsyncMock(return_value=job_results(1))):
+            response = self.client.post("/api/v1/jobs/job-postings/", {"candidate_id": 1}, content_type="application/json")
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self._hybrid_count(), before + 1)
+        scrape = self.client.get("/metrics").content.decode()
+        self.assertIn('recommendation_stage_duration_seconds_count{stage="hybrid_total"}', scrape)
+
+    def test_queue_depth_reads_every_priority_list(self):
+        collector = metrics.CeleryQueueDepthCollector()
+        collector._client = self.redis
+        self.redis.rpush("llm", "a", "b")
+        self.redis.rpush("llm\x06\x163", "c")
+
+        samples = {sample.labels["queue"]: sample.value for sample in next(collector.collect()).samples}
+
+        self.assertEqual(samples["llm"], 3)
+        self.assertEqual(samples["ocr"], 0)
+
+    def test_queue_depth_with_unreachable_broker_reports_nothing(self):
+        collector = metrics.CeleryQueueDepthCollector()
+        with self.settings(CELERY_BROKER_URL="redis://127.0.0.1:1/0"), \
+                self.assertLogs("agent_core.utils.metrics", level="WARNING"):
+            families = list(collector.collect())
+
+        self.assertEqual([family.name for family in families], ["celery_queue_depth"])
+        self.assertEqual(families[0].samples, [])
+
+
+class ExplainBreakdownTests(SimpleTestCase):
+    QUERY = {"skills": ["python", "django"], "title": "Backend Developer", "description": ""}
+    JOBS = [
+        {"job_id": 1, "title": "Backend Developer", "skills": "Python, Django", "distance": 0.4},
+        {"job_id": 2, "title": "Python Engineer", "skills": "Python, Kubernetes", "distance": 0.6},
+        {"job_id": 3, "title": "Backend Developer", "skills": "Java, Spring", "distance": 0.2},
+    ]
+    CF = [{"job_id": 2, "similarity": 1.0, "raw_cf_score": 1.7}, {"job_id": 9, "similarity": 0.5, "raw_cf_score": 0.85}]
+
+    async def _recommend(self, explain):
+        with mock.patch.object(content_based_recommender, "get_gemini_embedding_async", mock.AsyncMock(return_value=[0.1])), \
+                mock.patch.object(content_based_recommender, "query_weaviate_async",
+                                  mock.AsyncMock(side_effect=lambda *a, **k: [dict(job) for job in self.JOBS])), \
+                mock.patch.object(hybrid_recommender, "get_collaborative_filtering_recommendations",
+                                  mock.AsyncMock(return_value=[dict(job) for job in self.CF])):
+            return await hybrid_recommender.get_hybrid_job_recommendations(1, self.QUERY, [1, 2, 3], top_n=3, explain=explain)
+
+    async def test_components_add_up_to_the_final_score(self):
+        results = await self._recommend(explain=True)
+
+        by_job = {job["job_id"]: job for job in results["hybrid_top"]}
+        self.assertEqual(set(by_job), {1, 2, 3})
+        for job_id, job in by_job.items():
+            breakdown = job["explain"]
+            with self.subTest(job_id=job_id):
+                base = breakdown["semantic_weight"] * breakdown["semantic_similarity"] + breakdown["skill_weight"] * breakdown["skill_overlap"]
+                self.assertAlmostEqual(base, breakdown["base_score"], delta=1e-3)
+                if breakdown["penalty"] is None:
+                    content = breakdown["base_score"] + breakdown["title_boost"]
+                else:
+                    content = breakdown["base_score"] * breakdown["penalty"]["factor"]
+                self.assertAlmostEqual(content, breakdown["content_score"], delta=1e-3)
+                self.assertAlmostEqual(breakdown["content_contribution"] + breakdown["cf_contribution"],
+                                       breakdown["final_score"], delta=1e-3)
+                self.assertEqual(breakdown["final_score"], job["final_score"])
+
+        self.assertEqual(by_job[3]["explain"]["penalty"]["reason"], "no_skill_match")
+        self.assertEqual((by_job[2]["explain"]["cf_score"], by_job[2]["explain"]["cf_raw_score"]), (1.0, 1.7))
+        self.assertEqual(by_job[1]["explain"]["cf_contribution"], 0)
+
+    async def test_no_breakdown_without_explain(self):
+        results = await self._recommend(explain=False)
+
+        self.assertTrue(results["hybrid_top"])
+        self.assertFalse(any("explain" in job for job in results["hybrid_top"] + results["content_based"]))
@@ -1,9 +1,14 @@
 from django.urls import path
-from .views import JobPostingView
+from .views import JobPostingView, BatchJobRecommendationView, CandidateView, FeedbackIngestView
 
 
 urlpatterns = [
     # Get all Job Postings
     path('job-postings/', JobPostingView.as_view(), name='get_job_postings'),
+    path('job-postings/batch/', BatchJobRecommendationView.as_view(), name='get_job_postings_batch'),
+    # Write-behind feedback ingestion (like/apply)
+    path('feedback/', FeedbackIngestView.as_view(), name='ingest_feedback'),
+    # Candidates with their skills
+    path('candidates/', CandidateView.as_view(), name='get_candidates'),
 
 ]
@@ -1,19 +1,55 @@
+import json
+import os
+import random
+
+from adrf.views import APIView as AsyncAPIView
+from asgiref.sync import sync_to_async
 from drf_spectacular.utils import extend_schema
-from rest_framework.views import APIView
 from rest_framework.permissions import AllowAny
 from rest_framework.response import Response
 from rest_framework import status
-from django.db.models import Prefetch
-import asyncio
-from .models import JobPostings, JobDescription, Account, Candidate, Resume, Skill
+from django.db import connection
+from django.http import StreamingHttpResponse
+from agent_core.utils.metrics import stage_timer
+from .models import Candidate
 from .serializers import (
-    JobPostingSerializer,
-    AccountSerializer,
     CandidateSerializer,
     JobRecommendationRequestSerializer,
-    JobRecommendationResponseSerializer
+    JobRecommendationResponseSerializer,
+    BatchJobRecommendationRequestSerializer,
+    BatchJobRecommendationResponseSerializer,
+    FeedbackIngestRequestSerializer,
+    FeedbackIngestResponseSerializer,
+)
+from .services.recommendation_system import (
+    get_hybrid_job_recommendations,
+    get_hybrid_job_recommendations_batch,
+)
+from .services.job_query_service import get_active_job_ids_async
+from .services.feedback_ingest_service import ingest_feedback
+from .services.candidate_profile_service import (
+    aget_candidate_profile_docs,
+    aget_candidate_query_items,
+    query_item_from_profile_doc,
 )
-from .services.recommendation_system import get_hybrid_job_recommendations, query_all_jobs
+from .services.recommendation_snapshot_service import (
+    RECOMMENDATION_SNAPSHOT_TOP_N,
+    get_fresh_snapshot,
+    save_recommendation_snapshots,
+)
+from .services.recommendation_cache import (
+    build_recommendation_cache_key,
+    get_cached_recommendations,
+    set_cached_recommendations,
+)
+
+# Fraction of recommendation requests explained even without explain=true (0 = off)
+RECOMMENDATION_EXPLAIN_SAMPLE_RATE = float(os.getenv("RECOMMENDATION_EXPLAIN_SAMPLE_RATE", "0"))
+
+# Pages larger than this are streamed instead of rendered in one response body
+CANDIDATE_STREAM_THRESHOLD = int(os.getenv("CANDIDATE_STREAM_THRESHOLD", "200"))
+CANDIDATE_PAGE_MAX = 1000
+CANDIDATE_STREAM_CHUNK = 100
 
 
 @extend_schema(
@@ -27,14 +63,17 @@ from .services.recommendation_system import get_hybrid_job_recommendations, quer
     description="Get hybrid job recommendations for a candidate based on collaborative filtering and content-based filtering",
     summary="Get Job Recommendations"
 )
-class JobPostingView(APIView):
+class JobPostingView(AsyncAPIView):
     """
     API endpoint to get hybrid job recommendations for a candidate
     POST /job-recommendations/ - Get personalized job recommendations
+
+    Native async view: runs on the ASGI worker's event loop so the embedding,
+    Weaviate and Redis clients are reused across requests.
     """
     permission_classes = [AllowAny]
 
-    def post(self, request):
+    async def post(self, request):
         try:
             # 1️⃣ Validate and extract data from request
             serializer = JobRecommendationRequestSerializer(data=request.data)
@@ -47,9 +86,13 @@ class JobPostingView(APIView):
             validated_data = serializer.validated_data
             candidate_id = validated_data.get("candidate_id")
             top_n = validated_data.get("top_n", 5)
+            force_refresh = validated_data.get("force_refresh", False)
+            mode = validated_data.get("mode", "live")
+            explain = validated_data.get("explain", False) or random.random() < RECOMMENDATION_EXPLAIN_SAMPLE_RATE
 
-            # 2️⃣ Validate candidate exists in database
-            if not Candidate.objects.filter(candidate_id=candidate_id).exists():
+            # 2️⃣ Validate candidate exists (profile document: one cache lookup)
+            profile = (await aget_candidate_profile_docs([candidate_id])).get(candidate_id)
+            if profile is None:
                 return Response({
                     "ok": False,
                     "error": f"Candidate with ID {candidate_id} does not exist in database",
@@ -71,26 +114,23 @@ class JobPostingView(APIView):
             if "description" in validated_data and validated_data.get("description"):
                 query_item["description"] = validated_data["description"]
 
+            # Snapshot mode: serve the nightly precomputed profile recommendations
+            from_profile = not query_item
+            use_snapshot = mode == "snapshot" and from_profile and not force_refresh and not explain
+            if use_snapshot:
+                snapshot = await get_fresh_snapshot(candidate_id, top_n)
+                if snapshot is not None:
+                    results, generated_at = snapshot
+                    return Response({
+                        "ok": True,
+                        "results": results,
+                        "snapshot": {"hit": True, "generated_at": generated_at.isoformat()}
+                    }, status=status.HTTP_200_OK)
+
             # If no query parameters provided, try to fetch from candidate's profile
-            if not query_item:
-                # Fetch candidate data from database
-                candidate = Candidate.objects.select_related('account').prefetch_related(
-                    Prefetch('resumes', queryset=Resume.objects.prefetch_related('skills'))
-                ).filter(candidate_id=candidate_id).first()
-
-                # Build query_item from candidate's resume
-                if candidate.title:
-                    query_item["title"] = candidate.title
-
-                # Get skills from latest resume
-                resumes = list(candidate.resumes.all())
-                if resumes:
-                    latest_resume = resumes[0]
-                    skills = [skill.skill_name for skill in latest_resume.skills.all()]
-                    if skills:
-                        query_item["skills"] = skills
-                    if latest_resume.about_me:
-                        query_item["description"] = latest_resume.about_me
+            if from_profile:
+                # Build query_item from candidate's latest resume
+                query_item = query_item_from_profile_doc(profile)
 
                 # If still no query_item data, return error
                 if not query_item:
@@ -100,21 +140,114 @@ class JobPostingView(APIView):
                         "candidate_id": candidate_id
                     }, status=status.HTTP_400_BAD_REQUEST)
 
-            # 4️⃣ Lấy danh sách job từ DB hoặc Weaviate
-            job_ids = [j["job_id"] for j in query_all_jobs()]
-
-            # 5️⃣ Gọi service hybrid with proper async handling
-            recs = asyncio.run(get_hybrid_job_recommendations(
-                candidate_id=candidate_id,
-                query_item=query_item,
-                job_ids=job_ids,
-                top_n=top_n
-            ))
+            # 4️⃣ Trả về kết quả đã cache nếu có (cùng candidate, query và top_n)
+            # Explain responses are never read from or written to the cache
+            cache_key = None if explain else await build_recommendation_cache_key(candidate_id, query_item, top_n)
+            if not force_refresh and not explain:
+                cached = await get_cached_recommendations(cache_key)
+                if cached is not None:
+                    return Response({
+                        "ok": True,
+                        "results": cached,
+                        "cache": {"hit": True}
+                    }, status=status.HTTP_200_OK)
+
+            # Tập job đang active (chỉ ID, cache dùng chung trong worker)
+            job_ids = await get_active_job_ids_async()
+
+            # 5️⃣ Gọi service hybrid trên event loop của worker
+            with stage_timer("hybrid_total"):
+                recs = await get_hybrid_job_recommendations(
+                    candidate_id=candidate_id,
+                    query_item=query_item,
+                    job_ids=job_ids,
+                    top_n=top_n,
+                    explain=explain
+                )
+            await set_cached_recommendations(cache_key, recs)
+
+            # Snapshot thiếu hoặc quá cũ -> lưu lại kết quả live để lần sau dùng
+            response = {
+                "ok": True,
+                "results": recs,
+                "cache": {"hit": False, "bypassed": explain}
+            }
+            if use_snapshot:
+                # Chỉ lưu khi đủ sâu, không ghi đè snapshot nightly bằng top_n nhỏ hơn
+                if top_n >= RECOMMENDATION_SNAPSHOT_TOP_N:
+                    await save_recommendation_snapshots({candidate_id: recs}, top_n)
+                response["snapshot"] = {"hit": False}
+            if explain:
+                response["explain"] = True
 
             # 6️⃣ Trả về response JSON
+            return Response(response, status=status.HTTP_200_OK)
+
+        except Exception as e:
+            import traceback
+            return Response({
+                "ok": False,
+                "error": str(e),
+                "traceback": traceback.format_exc()
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+@extend_schema(
+    tags=['Job Recommendations'],
+    request=BatchJobRecommendationRequestSerializer,
+    responses={
+        200: BatchJobRecommendationResponseSerializer,
+        400: {'description': 'Bad Request - Invalid candidate_ids'},
+        500: {'description': 'Internal Server Error'}
+    },
+    description="Get hybrid job recommendations for many candidates in one call (profiles are read from their latest resume)",
+    summary="Get Job Recommendations (Batch)"
+)
+class BatchJobRecommendationView(AsyncAPIView):
+    """
+    API endpoint to get hybrid job recommendations for many candidates
+    POST /job-postings/batch/ - Batch recommendations (e.g. digests, precompute)
+
+    Profiles are embedded in one call, vector searches share one client and
+    collaborative filtering scores the whole batch with one matrix product.
+    """
+    permission_classes = [AllowAny]
+
+    async def post(self, request):
+        try:
+            serializer = BatchJobRecommendationRequestSerializer(data=request.data)
+            if not serializer.is_valid():
+                return Response({
+                    "error": "Invalid request data",
+                    "details": serializer.errors
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            validated_data = serializer.validated_data
+            candidate_ids = list(dict.fromkeys(validated_data["candidate_ids"]))
+            top_n = validated_data.get("top_n", 5)
+
+            # 1️⃣ Load all profiles; unknown candidates or empty profiles are reported as missing
+            query_items = await aget_candidate_query_items(candidate_ids)
+            found_ids = [cid for cid in candidate_ids if query_items.get(cid)]
+            missing = [cid for cid in candidate_ids if not query_items.get(cid)]
+
+            results = {}
+            if found_ids:
+                job_ids = await get_active_job_ids_async()
+
+                # 2️⃣ Gọi pipeline batch một lần cho toàn bộ candidate
+                with stage_timer("hybrid_batch_total"):
+                    results = await get_hybrid_job_recommendations_batch(
+                        candidate_ids=found_ids,
+                        query_items=[query_items[cid] for cid in found_ids],
+                        job_ids=job_ids,
+                        top_n=top_n
+                    )
+
             return Response({
                 "ok": True,
-                "results": recs
+                "results": results,
+                "missing": missing
             }, status=status.HTTP_200_OK)
 
         except Exception as e:
@@ -127,76 +260,180 @@ class JobPostingView(APIView):
 
 
 
+@extend_schema(
+    tags=['Job Recommendations'],
+    request=FeedbackIngestRequestSerializer,
+    responses={
+        202: FeedbackIngestResponseSerializer,
+        400: {'description': 'Bad Request - Invalid events'},
+        500: {'description': 'Internal Server Error'}
+    },
+    description="Record like/apply feedback; CF and cached recommendations pick it up within seconds",
+    summary="Ingest Job Feedback"
+)
+class FeedbackIngestView(AsyncAPIView):
+    """
+    API endpoint to ingest job feedback events
+    POST /feedback/ - Buffer events for a bulk write and apply them to CF immediately
+    """
+    permission_classes = [AllowAny]
 
+    async def post(self, request):
+        try:
+            serializer = FeedbackIngestRequestSerializer(data=request.data)
+            if not serializer.is_valid():
+                return Response({
+                    "error": "Invalid request data",
+                    "details": serializer.errors
+                }, status=status.HTTP_400_BAD_REQUEST)
+
+            result = await ingest_feedback(serializer.validated_data["events"])
+            return Response({"ok": True, **result}, status=status.HTTP_202_ACCEPTED)
+
+        except Exception as e:
+            import traceback
+            return Response({
+                "ok": False,
+                "error": str(e),
+                "traceback": traceback.format_exc()
+            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
+
+
+def _candidate_list_item(profile: dict) -> dict:
+    return {
+        'candidate_id': profile['candidate_id'],
+        'title': profile['title'],
+        'fullname': profile['fullname'],
+        'email': profile['email'],
+        'skills': [
+            {
+                'skill_name': skill['skill_name'],
+                'skill_type': skill['skill_type'],
+                'yearOfExperience': skill['year_of_experience']
+            }
+            for skill in profile['skills']
+        ]
+    }
+
+
+def _approximate_candidate_count():
+    """Row estimate from planner statistics (PostgreSQL); None if unavailable"""
+    if connection.vendor != 'postgresql':
+        return None
+    with connection.cursor() as cursor:
+        cursor.execute("SELECT reltuples::bigint FROM pg_class WHERE oid = %s::regclass", [Candidate._meta.db_table])
+        row = cursor.fetchone()
+    # reltuples is -1 until the table has been analyzed
+    return int(row[0]) if row and row[0] >= 0 else None
+
+
+async def _stream_candidate_page(meta: dict, page_ids: list):
+    """Yield the page as one JSON document, loading profiles chunk by chunk"""
+    yield json.dumps(meta, ensure_ascii=False)[:-1] + ', "data": ['
+    first = True
+    for start in range(0, len(page_ids), CANDIDATE_STREAM_CHUNK):
+        chunk = page_ids[start:start + CANDIDATE_STREAM_CHUNK]
+        profiles = await aget_candidate_profile_docs(chunk)
+        for page_id in chunk:
+            profile = profiles.get(page_id)
+            if profile is None:
+                continue
+            yield ("" if first else ", ") + json.dumps(_candidate_list_item(profile), ensure_ascii=False)
+            first = False
+    yield "]}"
 
 
 @extend_schema(tags=['Candidates'])
-class CandidateView(APIView):
+class CandidateView(AsyncAPIView):
     """
     API endpoint to get all candidates with their skills
     GET /candidates/ - List all candidates joined with resume and skills
     """
     permission_classes = [AllowAny]
 
-    def get(self, request):
+    async def get(self, request):
         """
         Get list of candidates with their skills by joining candidate, resume, and skill tables
         Query params:
         - candidate_id: Filter by specific candidate ID
-        - limit: Number of results to return (default: 20)
-        - offset: Offset for pagination (default: 0)
+        - limit: Number of results to return (default: 20, max: 1000)
+        - cursor: Keyset cursor; return candidates after this candidate_id (use next_cursor)
+        - offset: Legacy offset pagination, ignored when cursor is given (default: 0)
+        - total: 'approx' (table statistics, default), 'exact' (COUNT) or 'none'
         """
+        # Validate query parameters: a bad or tampered cursor is a client error
         try:
-            # Get query parameters
             candidate_id = request.GET.get('candidate_id', None)
-            limit = int(request.GET.get('limit', 20))
-            offset = int(request.GET.get('offset', 0))
+            if candidate_id:
+                candidate_id = int(candidate_id)
+            limit = min(max(int(request.GET.get('limit', 20)), 1), CANDIDATE_PAGE_MAX)
+            cursor = request.GET.get('cursor')
+            cursor = int(cursor) if cursor else None
+            offset = 0 if cursor is not None else max(int(request.GET.get('offset', 0)), 0)
+        except ValueError:
+            return Response({
+                'success': False,
+                'error': 'candidate_id, limit, offset and cursor must be integers'
+            }, status=status.HTTP_400_BAD_REQUEST)
+        total_mode = request.GET.get('total', 'approx')
+        if total_mode not in ('approx', 'exact', 'none'):
+            return Response({
+                'success': False,
+                'error': "total must be 'approx', 'exact' or 'none'"
+            }, status=status.HTTP_400_BAD_REQUEST)
+
+        try:
 
-            # Build query with prefetch to optimize joins
-            queryset = Candidate.objects.select_related('account').prefetch_related(
-                Prefetch('resumes', queryset=Resume.objects.prefetch_related('skills'))
-            )
+            # Page over candidate IDs only; profiles come from the document cache
+            queryset = Candidate.objects.order_by('candidate_id')
 
             # Apply filters
             if candidate_id:
                 queryset = queryset.filter(candidate_id=candidate_id)
 
-            # Get total count
-            total_count = queryset.count()
-
-            # Apply pagination
-            candidates = queryset[offset:offset + limit]
-
-            # Serialize data
-            candidate_data = []
-            for candidate in candidates:
-                # Collect all skills from all resumes
-                skills = []
-                for resume in candidate.resumes.all():
-                    for skill in resume.skills.all():
-                        skills.append({
-                            'skill_name': skill.skill_name,
-                            'skill_type': skill.skill_type or '',
-                            'yearOfExperience': skill.yearOfExperience or 0
-                        })
-
-                candidate_data.append({
-                    'candidate_id': candidate.candidate_id,
-                    'title': candidate.title or '',
-                    'fullname': candidate.fullname or '',
-                    'email': candidate.account.email,
-                    'skills': skills
-                })
-
-            serializer = CandidateSerializer(candidate_data, many=True)
-
-            return Response({
+            # Get total count: COUNT(*) only on request (or for a single candidate);
+            # the estimate is None where table statistics are unavailable
+            total_count = None
+            total_estimated = False
+            if total_mode == 'exact' or (candidate_id and total_mode != 'none'):
+                total_count = await queryset.acount()
+            elif total_mode == 'approx':
+                total_count = await sync_to_async(_approximate_candidate_count)()
+                total_estimated = total_count is not None
+
+            # Apply pagination: keyset on candidate_id (one extra row tells if there is a next page)
+            if cursor is not None:
+                queryset = queryset.filter(candidate_id__gt=cursor)
+            page_ids = [
+                cid async for cid in queryset.values_list('candidate_id', flat=True)[offset:offset + limit + 1]
+            ]
+            next_cursor = page_ids[limit - 1] if len(page_ids) > limit else None
+            page_ids = page_ids[:limit]
+
+            meta = {
                 'success': True,
                 'total': total_count,
+                'total_estimated': total_estimated,
                 'limit': limit,
                 'offset': offset,
-                'data': serializer.data
-            }, status=status.HTTP_200_OK)
+                'next_cursor': next_cursor,
+            }
+
+            # Large pages are streamed so the body is never built in memory at once
+            if len(page_ids) > CANDIDATE_STREAM_THRESHOLD:
+                return StreamingHttpResponse(
+                    _stream_candidate_page(meta, page_ids),
+                    content_type='application/json'
+                )
+
+            profiles = await aget_candidate_profile_docs(page_ids)
+            candidate_data = [
+                _candidate_list_item(profiles[page_id])
+                for page_id in page_ids if page_id in profiles
+            ]
+            serializer = CandidateSerializer(candidate_data, many=True)
+
+            return Response({**meta, 'data': serializer.data}, status=status.HTTP_200_OK)
 
         except Exception as e:
             return Response({
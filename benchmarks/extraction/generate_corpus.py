@@ -0,0 +1,199 @@
+"""
+Generate an extraction benchmark corpus from agent_core/data/resume_dataset.txt
+
+Renders the dataset's resumes into three formats, for each requested page count:
+
+    pdf      text PDFs (text layer, no OCR)
+    docx     Word documents with the same text volume (docx has no pages)
+    scanned  PDFs whose pages are only a raster image of the text (OCR path)
+
+Longer documents are filled with consecutive resumes, so a 4-page file holds
+about four pages of real resume text. Output is deterministic for a given
+set of arguments; manifest.json lists every file with its format and pages.
+
+Usage:
+    python benchmarks/extraction/generate_corpus.py [--out benchmarks/extraction/corpus]
+        [--docs-per-size 10] [--pages 1,2,4] [--formats pdf,docx,scanned] [--scan-dpi 150]
+"""
+import argparse
+import json
+import os
+import sys
+import textwrap
+import zipfile
+from xml.sax.saxutils import escape
+
+import fitz  # PyMuPDF
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DEFAULT_CORPUS = os.path.join(REPO_ROOT, "agent_core", "data", "resume_dataset.txt")
+DEFAULT_OUT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+FORMATS = ("pdf", "docx", "scanned")
+
+# A4 in points, 10 pt Helvetica
+PAGE_WIDTH, PAGE_HEIGHT = 595, 842
+MARGIN = 50
+FONT_SIZE = 10
+LINE_HEIGHT = 1.25
+LINES_PER_PAGE = int((PAGE_HEIGHT - 2 * MARGIN) / (FONT_SIZE * LINE_HEIGHT))
+WRAP_WIDTH = 95
+
+
+def load_resumes(path):
+    """Resume texts from the JSON-lines dataset ("input" field)"""
+    texts = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                texts.append(json.loads(line)["input"])
+            except (ValueError, KeyError):
+                continue
+    return texts
+
+
+def _wrap(text):
+    lines = []
+    for paragraph in text.splitlines():
+        lines.extend(textwrap.wrap(paragraph, WRAP_WIDTH) or [""])
+    return lines
+
+
+class ResumeLines:
+    """Endless stream of wrapped resume lines, cycling through the dataset"""
+
+    def __init__(self, resumes):
+        self.resumes = resumes
+        self.index = 0
+
+    def take(self, count):
+        lines = []
+        while len(lines) < count:
+            lines.extend(_wrap(self.resumes[self.index % len(self.resumes)]))
+            lines.append("")
+            self.index += 1
+        return lines[:count]
+
+
+def _text_pages(lines_source, pages):
+    return ["\n".join(lines_source.take(LINES_PER_PAGE)) for _ in range(pages)]
+
+
+def _draw_page(doc, text):
+    page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+    page.insert_text(
+        (MARGIN, MARGIN + FONT_SIZE),
+        text,
+        fontsize=FONT_SIZE,
+        fontname="helv",
+        lineheight=LINE_HEIGHT,
+    )
+    return page
+
+
+def write_text_pdf(path, page_texts):
+    with fitz.open() as doc:
+        for text in page_texts:
+            _draw_page(doc, text)
+        doc.save(path, garbage=3, deflate=True)
+
+
+def write_scanned_pdf(path, page_texts, dpi):
+    """Each page is a grayscale JPEG of the rendered text, like a scanner produces"""
+    with fitz.open() as scratch, fitz.open() as doc:
+        for text in page_texts:
+            pix = _draw_page(scratch, text).get_pixmap(dpi=dpi, colorspace=fitz.csGRAY)
+            page = doc.new_page(width=PAGE_WIDTH, height=PAGE_HEIGHT)
+            page.insert_image(page.rect, stream=pix.tobytes("jpeg"))
+        doc.save(path, garbage=3, deflate=True)
+
+
+_DOCX_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+</Types>"""
+
+_DOCX_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+</Relationships>"""
+
+
+def write_docx(path, page_texts):
+    """Minimal WordprocessingML package (one paragraph per line, a page break per page)"""
+    body = []
+    for i, text in enumerate(page_texts):
+        for line in text.split("\n"):
+            body.append(f'<w:p><w:r><w:t xml:space="preserve">{escape(line)}</w:t></w:r></w:p>')
+        if i < len(page_texts) - 1:
+            body.append('<w:p><w:r><w:br w:type="page"/></w:r></w:p>')
+    document = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<w:document xmlns:w="http://schemas.openxmlformats.org/wordprocessingml/2006/main"><w:body>'
+        + "".join(body)
+        + "</w:body></w:document>"
+    )
+    with zipfile.ZipFile(path, "w", zipfile.ZIP_DEFLATED) as z:
+        z.writestr("[Content_Types].xml", _DOCX_CONTENT_TYPES)
+        z.writestr("_rels/.rels", _DOCX_RELS)
+        z.writestr("word/document.xml", document)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS, help="resume dataset (JSON lines)")
+    parser.add_argument("--out", default=DEFAULT_OUT)
+    parser.add_argument("--docs-per-size", type=int, default=10, help="documents per format and page count")
+    parser.add_argument("--pages", default="1,2,4", help="comma-separated page counts")
+    parser.add_argument("--formats", default=",".join(FORMATS))
+    parser.add_argument("--scan-dpi", type=int, default=150, help="raster resolution of scanned pages")
+    args = parser.parse_args()
+
+    formats = [f.strip() for f in args.formats.split(",") if f.strip()]
+    unknown = set(formats) - set(FORMATS)
+    if unknown:
+        sys.exit(f"❌ Unknown formats: {', '.join(sorted(unknown))}")
+    page_counts = [int(p) for p in args.pages.split(",") if p.strip()]
+
+    resumes = load_resumes(args.corpus)
+    if not resumes:
+        sys.exit(f"❌ No resumes found in {args.corpus}")
+
+    os.makedirs(args.out, exist_ok=True)
+    manifest = []
+    for fmt in formats:
+        # Same text for every format, so formats are directly comparable
+        lines_source = ResumeLines(resumes)
+        for pages in page_counts:
+            for n in range(args.docs_per_size):
+                page_texts = _text_pages(lines_source, pages)
+                ext = "docx" if fmt == "docx" else "pdf"
+                name = f"{fmt}_{pages}p_{n:03d}.{ext}"
+                path = os.path.join(args.out, name)
+                if fmt == "pdf":
+                    write_text_pdf(path, page_texts)
+                elif fmt == "docx":
+                    write_docx(path, page_texts)
+                else:
+                    write_scanned_pdf(path, page_texts, args.scan_dpi)
+                manifest.append({
+                    "file": name,
+                    "format": fmt,
+                    "pages": pages,
+                    "chars": sum(len(t) for t in page_texts),
+                    "bytes": os.path.getsize(path),
+                })
+        print(f"📄 {fmt}: {len(page_counts) * args.docs_per_size} files")
+
+    with open(os.path.join(args.out, "manifest.json"), "w", encoding="utf-8") as f:
+        json.dump({"scan_dpi": args.scan_dpi, "files": manifest}, f, indent=2)
+    print(f"✅ Corpus written to {args.out} ({len(manifest)} files)")
+
+
+if __name__ == "__main__":
+    main()
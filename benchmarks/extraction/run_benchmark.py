@@ -0,0 +1,261 @@
+"""
+Measure extract_text throughput on the generated corpus (see generate_corpus.py)
+
+Every format is run twice through apps.cv_analysis_agent.services.extract_text:
+serially (one worker process) and in parallel (--workers processes, like a
+prefork Celery worker). Workers are fresh spawned processes, so peak memory
+belongs to the format being measured. Reported per run:
+
+    docs/s, pages/s         wall-clock throughput
+    latency p50/p95/max     per document, in ms
+    peak_rss_mb             highest RSS of a worker process (MuPDF included,
+                            tesseract subprocesses not)
+    baseline_rss_mb         RSS of a worker after importing extract_text
+    empty                   documents that produced no text
+    ocr_stages_ms           scanned PDFs: mean page render time (calling
+                            thread, serial) and Tesseract time (OCR threads)
+                            per document
+
+Scanned PDFs need the tesseract binary (TESSERACT_PATH) and are skipped
+without it; note that each document also OCRs up to OCR_MAX_WORKERS pages in
+parallel. --render-only times just the page renders of the scanned PDFs (no
+Tesseract needed).
+
+Usage:
+    python benchmarks/extraction/run_benchmark.py [--corpus-dir benchmarks/extraction/corpus]
+        [--formats pdf,docx,scanned] [--workers 4] [--repeat 3] [--budget 2000] [--out extraction.json]
+    python benchmarks/extraction/run_benchmark.py --render-only
+"""
+import argparse
+import json
+import os
+import resource
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from multiprocessing import get_context
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+DEFAULT_CORPUS_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "corpus")
+
+_baseline_rss_kb = None
+_stage_seconds = {"render": 0.0, "ocr": 0.0}
+_stage_lock = threading.Lock()
+
+
+def _timed(stage, func):
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return func(*args, **kwargs)
+        finally:
+            with _stage_lock:
+                _stage_seconds[stage] += time.perf_counter() - start
+    return wrapper
+
+
+def _init_worker():
+    global _baseline_rss_kb
+    sys.path.insert(0, REPO_ROOT)
+    os.environ.setdefault("TESSERACT_PATH", "tesseract")
+    from apps.cv_analysis_agent.services import extract_text
+
+    # Render runs in the calling thread, OCR in the executor threads
+    extract_text._render_page = _timed("render", extract_text._render_page)
+    extract_text._ocr_image = _timed("ocr", extract_text._ocr_image)
+    _baseline_rss_kb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+
+def _extract_one(path, budget):
+    from apps.cv_analysis_agent.services.extract_text import extract_text
+
+    for stage in _stage_seconds:
+        _stage_seconds[stage] = 0.0
+    start = time.perf_counter()
+    error = None
+    chars = 0
+    try:
+        with open(path, "rb") as f:
+            chars = len(extract_text(f, budget=budget))
+    except Exception as e:
+        error = str(e)[:200]
+    return {
+        "latency": time.perf_counter() - start,
+        "stages": dict(_stage_seconds),
+        "chars": chars,
+        "error": error,
+        "rss_kb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+        "baseline_rss_kb": _baseline_rss_kb,
+    }
+
+
+def _init_noop(_):
+    # Slow enough that every worker process picks up one call
+    time.sleep(0.2)
+
+
+def percentile(sorted_values: list, p: float):
+    if not sorted_values:
+        return None
+    k = min(len(sorted_values) - 1, max(0, int(round(p / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+def run(files: list, corpus_dir: str, workers: int, repeat: int, budget) -> dict:
+    """Extract every file `repeat` times with `workers` processes"""
+    jobs = [entry for _ in range(repeat) for entry in files]
+    with ProcessPoolExecutor(max_workers=workers, mp_context=get_context("spawn"), initializer=_init_worker) as pool:
+        # Start the workers (imports, model loading) before the clock starts
+        list(pool.map(_init_noop, range(workers)))
+        start = time.perf_counter()
+        results = list(pool.map(
+            _extract_one,
+            [os.path.join(corpus_dir, entry["file"]) for entry in jobs],
+            [budget] * len(jobs),
+        ))
+        elapsed = time.perf_counter() - start
+
+    ok = [(entry, result) for entry, result in zip(jobs, results) if result["error"] is None]
+    errors = {}
+    for result in results:
+        if result["error"] is not None:
+            errors[result["error"]] = errors.get(result["error"], 0) + 1
+    latencies = sorted(result["latency"] for _, result in ok)
+
+    def ms(value):
+        return None if value is None else round(value * 1000, 1)
+
+    def mb(kb):
+        return round(kb / 1024, 1) if kb else None
+
+    return {
+        "workers": workers,
+        "docs": len(jobs),
+        "ok": len(ok),
+        "elapsed_s": round(elapsed, 3),
+        "docs_per_s": round(len(ok) / elapsed, 2) if elapsed else None,
+        "pages_per_s": round(sum(entry["pages"] for entry, _ in ok) / elapsed, 2) if elapsed else None,
+        "latency_ms": {
+            "p50": ms(percentile(latencies, 50)),
+            "p95": ms(percentile(latencies, 95)),
+            "max": ms(latencies[-1] if latencies else None),
+        },
+        "peak_rss_mb": mb(max(result["rss_kb"] for result in results)),
+        "baseline_rss_mb": mb(max(result["baseline_rss_kb"] or 0 for result in results)),
+        "empty": sum(1 for _, result in ok if not result["chars"]),
+        "errors": errors,
+        "ocr_stages_ms": {
+            stage: ms(sum(result["stages"][stage] for _, result in ok) / len(ok)) if ok else None
+            for stage in _stage_seconds
+        },
+    }
+
+
+def print_run(fmt: str, mode: str, report: dict):
+    lat = report["latency_ms"]
+    print(
+        f"  {fmt:<8}{mode:<10}{report['workers']:>3} proc | {report['docs_per_s']:>8} docs/s | "
+        f"{report['pages_per_s']:>8} pages/s | p50 {lat['p50']} ms, p95 {lat['p95']} ms | "
+        f"peak rss {report['peak_rss_mb']} MB (base {report['baseline_rss_mb']} MB)",
+        flush=True,
+    )
+    stages = report["ocr_stages_ms"]
+    if stages["ocr"]:
+        print(f"      per document: render {stages['render']} ms (serial), tesseract {stages['ocr']} ms (OCR threads)")
+    if report["empty"]:
+        print(f"      {report['empty']} documents produced no text")
+    if report["errors"]:
+        print(f"      errors: {report['errors']}")
+
+
+def _tesseract_available() -> bool:
+    import pytesseract
+
+    pytesseract.pytesseract.tesseract_cmd = os.getenv("TESSERACT_PATH", "tesseract")
+    try:
+        pytesseract.get_tesseract_version()
+        return True
+    except Exception:
+        return False
+
+
+def render_only(files: list, corpus_dir: str) -> dict:
+    """Time the OCR page renders of the scanned PDFs, in this process"""
+    _init_worker()
+    import fitz
+    from apps.cv_analysis_agent.services import extract_text
+
+    timings = []
+    for entry in files:
+        with fitz.open(os.path.join(corpus_dir, entry["file"])) as doc:
+            for page in doc:
+                start = time.perf_counter()
+                extract_text._render_page(page, extract_text._ocr_dpi(page))
+                timings.append(time.perf_counter() - start)
+    timings.sort()
+    return {
+        "pages": len(timings),
+        "render_ms_per_page": {
+            "mean": round(1000 * sum(timings) / len(timings), 1) if timings else None,
+            "p95": round(1000 * percentile(timings, 95), 1) if timings else None,
+        },
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus-dir", default=DEFAULT_CORPUS_DIR)
+    parser.add_argument("--formats", default=None, help="comma-separated subset of the corpus formats")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 2, help="processes for the parallel run")
+    parser.add_argument("--repeat", type=int, default=3, help="passes over the corpus per run")
+    parser.add_argument("--budget", type=int, default=None, help="extract_text character budget (default: full text)")
+    parser.add_argument("--render-only", action="store_true", help="only time the page renders of scanned PDFs")
+    parser.add_argument("--out", help="write the report as JSON")
+    args = parser.parse_args()
+
+    manifest_path = os.path.join(args.corpus_dir, "manifest.json")
+    if not os.path.exists(manifest_path):
+        sys.exit(f"❌ {manifest_path} not found, run generate_corpus.py first")
+    with open(manifest_path, encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    if args.render_only:
+        files = [entry for entry in manifest["files"] if entry["format"] == "scanned"]
+        report = render_only(files, args.corpus_dir)
+        print(f"📊 OCR page render: {report['pages']} pages, "
+              f"mean {report['render_ms_per_page']['mean']} ms, p95 {report['render_ms_per_page']['p95']} ms")
+        if args.out:
+            with open(args.out, "w", encoding="utf-8") as f:
+                json.dump(report, f, indent=2)
+        return
+
+    formats = sorted({entry["format"] for entry in manifest["files"]})
+    if args.formats:
+        formats = [fmt for fmt in args.formats.split(",") if fmt in formats]
+    if "scanned" in formats and not _tesseract_available():
+        print("⚠️ tesseract not found (TESSERACT_PATH), skipping scanned PDFs")
+        formats.remove("scanned")
+
+    print(f"📊 extract_text benchmark: {args.repeat} passes, budget={args.budget}, parallel={args.workers} processes")
+    report = {"budget": args.budget, "repeat": args.repeat, "scan_dpi": manifest.get("scan_dpi"), "formats": {}}
+    for fmt in formats:
+        files = [entry for entry in manifest["files"] if entry["format"] == fmt]
+        report["formats"][fmt] = {
+            "files": len(files),
+            "pages": sum(entry["pages"] for entry in files),
+            "serial": run(files, args.corpus_dir, 1, args.repeat, args.budget),
+        }
+        print_run(fmt, "serial", report["formats"][fmt]["serial"])
+        if args.workers > 1:
+            report["formats"][fmt]["parallel"] = run(files, args.corpus_dir, args.workers, args.repeat, args.budget)
+            print_run(fmt, "parallel", report["formats"][fmt]["parallel"])
+
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"✅ Report written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""
+Fake embedding server for load tests
+
+Stands in for the Gemini embedding API behind EMBEDDING_SERVICE_URL:
+
+    POST /embed  {"texts": ["...", ...]}  ->  {"embeddings": [[768 floats], ...]}
+
+Each request sleeps for a configurable latency (base + per text + jitter) to
+model the remote call. Vectors are deterministic per text; with --index they
+are drawn near a job vector from the Weaviate backup so that searches against
+the local vector index return realistic distance spreads.
+
+Usage:
+    python benchmarks/loadtest/fake_embedding_server.py --port 8790 --latency-ms 120 --jitter-ms 40
+"""
+import argparse
+import hashlib
+import json
+import random
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import numpy as np
+
+DIMENSIONS = 768
+
+
+class EmbeddingModel:
+    def __init__(self, index_path: str = None, noise: float = 0.3):
+        self.noise = noise
+        self.anchors = None
+        if index_path:
+            with open(index_path, encoding="utf-8") as f:
+                raw = json.load(f)
+            vectors = [obj["vector"]["default"] for obj in raw if (obj.get("vector") or {}).get("default")]
+            if vectors:
+                self.anchors = np.asarray(vectors, dtype=np.float32)
+
+    def embed(self, text: str) -> list:
+        seed = int.from_bytes(hashlib.sha256(text.encode("utf-8")).digest()[:8], "little")
+        rng = np.random.default_rng(seed)
+        dims = self.anchors.shape[1] if self.anchors is not None else DIMENSIONS
+        vector = rng.normal(0, 1, dims).astype(np.float32)
+        vector /= np.linalg.norm(vector)
+        if self.anchors is not None:
+            anchor = self.anchors[rng.integers(len(self.anchors))]
+            vector = anchor / np.linalg.norm(anchor) + self.noise * vector
+        return vector.tolist()
+
+
+def make_handler(model: EmbeddingModel, latency_ms: float, per_text_ms: float, jitter_ms: float):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def do_POST(self):
+            length = int(self.headers.get("Content-Length") or 0)
+            try:
+                texts = json.loads(self.rfile.read(length) or b"{}")["texts"]
+            except (ValueError, KeyError):
+                self._reply(400, {"error": "expected {\"texts\": [...]}"})
+                return
+
+            delay = latency_ms + per_text_ms * len(texts) + random.uniform(-jitter_ms, jitter_ms)
+            time.sleep(max(delay, 0) / 1000)
+            self._reply(200, {"embeddings": [model.embed(str(text)) for text in texts]})
+
+        def do_GET(self):
+            self._reply(200, {"status": "ok"})
+
+        def _reply(self, status: int, payload: dict):
+            body = json.dumps(payload).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, format, *args):
+            pass
+
+    return Handler
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8790)
+    parser.add_argument("--latency-ms", type=float, default=120, help="Base latency per request")
+    parser.add_argument("--per-text-ms", type=float, default=2, help="Extra latency per text in a batch")
+    parser.add_argument("--jitter-ms", type=float, default=40, help="Uniform +/- jitter")
+    parser.add_argument("--index", help="Weaviate backup JSON to draw query vectors near")
+    parser.add_argument("--noise", type=float, default=0.3, help="Distance of query vectors from their anchor")
+    args = parser.parse_args()
+
+    model = EmbeddingModel(args.index, args.noise)
+    server = ThreadingHTTPServer((args.host, args.port), make_handler(
+        model, args.latency_ms, args.per_text_ms, args.jitter_ms
+    ))
+    server.daemon_threads = True
+    print(f"🧪 Fake embedding server on http://{args.host}:{args.port}/embed "
+          f"(latency {args.latency_ms}±{args.jitter_ms} ms)", flush=True)
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,393 @@
+"""
+Open-loop load test for POST /api/v1/jobs/job-postings/
+
+Starts the app the way the Dockerfile does (gunicorn + uvicorn workers, 300 s
+timeout) against local stand-ins, then offers increasing request rates:
+
+    * fake embedding server (fake_embedding_server.py) via EMBEDDING_SERVICE_URL
+    * in-process vector index from the Weaviate backup via WEAVIATE_BACKEND=local
+    * SQLite or PostgreSQL (DATABASE_URL) seeded by seed_db.py
+
+Traffic is open-loop: requests are fired on a fixed (or Poisson) schedule no
+matter how many are still in flight, and latency is measured from the
+scheduled send time, so a saturated server shows up as growing latency and
+errors instead of silently lowering the offered load. Each step reports
+throughput, latency percentiles, error rate and per-worker CPU/RSS (sampled
+from /proc, Linux only).
+
+Usage:
+    python benchmarks/loadtest/run_loadtest.py --rps 2,5,10,20,40 --step-seconds 30
+    python benchmarks/loadtest/run_loadtest.py --target http://localhost:8000 --server-pid <gunicorn pid>
+"""
+import argparse
+import asyncio
+import json
+import os
+import random
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+import httpx
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), "..", ".."))
+HERE = os.path.dirname(os.path.abspath(__file__))
+ENDPOINT = "/api/v1/jobs/job-postings/"
+HEALTH_PATH = "/api/cv-creation/health/"
+DEFAULT_INDEX = os.path.join(REPO_ROOT, "weaviate_jobposting_backup_20251029_222626.json")
+
+CLK_TCK = os.sysconf("SC_CLK_TCK") if hasattr(os, "sysconf") else 100
+
+
+# ---------------------------------------------------------------------------
+# Stand-in processes
+# ---------------------------------------------------------------------------
+
+def _stack_env(args) -> dict:
+    env = dict(os.environ)
+    env.update({
+        "DATABASE_URL": args.database_url,
+        "EMBEDDING_SERVICE_URL": f"http://127.0.0.1:{args.embed_port}/embed",
+        "WEAVIATE_BACKEND": "local",
+        "LOCAL_VECTOR_INDEX_PATH": args.index,
+        "LOCAL_VECTOR_INDEX_SIZE": str(args.jobs),
+        "DEBUG": "False",
+    })
+    env.setdefault("GOOGLE_API_KEY", "loadtest")
+    env.setdefault("TESSERACT_PATH", "/usr/bin/tesseract")
+    return env
+
+
+def start_stack(args) -> list:
+    """Seed the DB, start the fake embedding server and gunicorn; returns the processes"""
+    env = _stack_env(args)
+
+    if not args.skip_seed:
+        subprocess.run(
+            [sys.executable, os.path.join(HERE, "seed_db.py"), "--create-tables", "--reset",
+             "--candidates", str(args.candidates), "--jobs", str(args.jobs), "--index", args.index],
+            cwd=REPO_ROOT, env=env, check=True,
+        )
+
+    embed = subprocess.Popen(
+        [sys.executable, os.path.join(HERE, "fake_embedding_server.py"), "--port", str(args.embed_port),
+         "--latency-ms", str(args.embed_latency_ms), "--jitter-ms", str(args.embed_jitter_ms),
+         "--index", args.index],
+        cwd=REPO_ROOT, env=env,
+    )
+
+    env["PROMETHEUS_MULTIPROC_DIR"] = tempfile.mkdtemp(prefix="loadtest-prom-")
+    # Same server settings as the Dockerfile CMD
+    app = subprocess.Popen(
+        [sys.executable, "-m", "gunicorn", "Careermate.asgi:application",
+         "--worker-class", "uvicorn_worker.UvicornWorker",
+         "--bind", f"127.0.0.1:{args.port}",
+         "--workers", str(args.workers),
+         "--timeout", "300",
+         "--error-logfile", "-", "--log-level", "warning"],
+        cwd=REPO_ROOT, env=env,
+    )
+    return [embed, app]
+
+
+def stop_stack(processes: list):
+    for process in processes:
+        if process.poll() is None:
+            process.send_signal(signal.SIGTERM)
+    for process in processes:
+        try:
+            process.wait(timeout=15)
+        except subprocess.TimeoutExpired:
+            process.kill()
+
+
+async def wait_until_healthy(base_url: str, timeout: float = 120):
+    deadline = time.monotonic() + timeout
+    async with httpx.AsyncClient(timeout=5) as client:
+        while time.monotonic() < deadline:
+            try:
+                if (await client.get(base_url + HEALTH_PATH)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            await asyncio.sleep(1)
+    raise RuntimeError(f"{base_url} did not become healthy within {timeout:.0f}s")
+
+
+# ---------------------------------------------------------------------------
+# Worker CPU / RSS sampling (/proc)
+# ---------------------------------------------------------------------------
+
+def _read_stat(pid: int):
+    """(ppid, cpu seconds) of a process"""
+    with open(f"/proc/{pid}/stat") as f:
+        fields = f.read().rsplit(")", 1)[1].split()
+    return int(fields[1]), (int(fields[11]) + int(fields[12])) / CLK_TCK
+
+
+def _read_rss_mb(pid: int) -> float:
+    with open(f"/proc/{pid}/status") as f:
+        for line in f:
+            if line.startswith("VmRSS:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def worker_pids(master_pid: int) -> list:
+    """Direct children of the gunicorn master (the workers)"""
+    pids = []
+    for entry in os.listdir("/proc"):
+        if entry.isdigit():
+            try:
+                if _read_stat(int(entry))[0] == master_pid:
+                    pids.append(int(entry))
+            except (OSError, IndexError, ValueError):
+                continue
+    return sorted(pids)
+
+
+class ResourceSampler:
+    """Samples CPU% and RSS of every gunicorn worker once per interval"""
+
+    def __init__(self, master_pid: int, interval: float = 1.0):
+        self.master_pid = master_pid
+        self.interval = interval
+        self.samples = {}  # pid -> list of (cpu_percent, rss_mb)
+        self._last = {}
+        self._task = None
+
+    def _sample(self):
+        now = time.monotonic()
+        for pid in worker_pids(self.master_pid):
+            try:
+                _, cpu = _read_stat(pid)
+                rss = _read_rss_mb(pid)
+            except (OSError, IndexError, ValueError):
+                continue
+            last = self._last.get(pid)
+            self._last[pid] = (now, cpu)
+            if last is not None and now > last[0]:
+                cpu_percent = 100 * (cpu - last[1]) / (now - last[0])
+                self.samples.setdefault(pid, []).append((cpu_percent, rss))
+
+    async def _run(self):
+        while True:
+            self._sample()
+            await asyncio.sleep(self.interval)
+
+    def start(self):
+        self.samples = {}
+        self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> dict:
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        return {
+            str(pid): {
+                "cpu_avg_percent": round(sum(c for c, _ in rows) / len(rows), 1),
+                "cpu_max_percent": round(max(c for c, _ in rows), 1),
+                "rss_max_mb": round(max(r for _, r in rows), 1),
+            }
+            for pid, rows in self.samples.items() if rows
+        }
+
+
+# ---------------------------------------------------------------------------
+# Open-loop driver
+# ---------------------------------------------------------------------------
+
+def percentile(sorted_values: list, p: float):
+    if not sorted_values:
+        return None
+    k = min(len(sorted_values) - 1, max(0, int(round(p / 100 * (len(sorted_values) - 1)))))
+    return sorted_values[k]
+
+
+async def _send(client, url, payload, scheduled_at, results):
+    try:
+        response = await client.post(url, json=payload)
+        ok = 200 <= response.status_code < 300
+        error = None if ok else f"HTTP {response.status_code}"
+    except httpx.TimeoutException:
+        ok, error = False, "timeout"
+    except httpx.HTTPError as e:
+        ok, error = False, type(e).__name__
+    results.append((time.monotonic() - scheduled_at, ok, error))
+
+
+async def run_step(client, base_url: str, rps: float, duration: float, args, sampler=None) -> dict:
+    """Offer `rps` requests/s for `duration` seconds and wait for stragglers"""
+    rng = random.Random(int(rps * 1000))
+    url = base_url + ENDPOINT
+    results, tasks = [], []
+
+    if sampler:
+        sampler.start()
+    start = time.monotonic()
+    next_at = start
+    while next_at < start + duration:
+        delay = next_at - time.monotonic()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        payload = {
+            "candidate_id": rng.randint(1, args.candidates),
+            "top_n": args.top_n,
+            "force_refresh": not args.use_cache,
+        }
+        tasks.append(asyncio.create_task(_send(client, url, payload, next_at, results)))
+        next_at += rng.expovariate(rps) if args.poisson else 1 / rps
+
+    if tasks:
+        await asyncio.wait(tasks)
+    elapsed = time.monotonic() - start
+    workers = await sampler.stop() if sampler else {}
+
+    latencies = sorted(latency for latency, ok, _ in results if ok)
+    errors = {}
+    for _, ok, error in results:
+        if not ok:
+            errors[error] = errors.get(error, 0) + 1
+    sent = len(results)
+
+    def ms(value):
+        return round(value * 1000, 1) if value is not None else None
+
+    return {
+        "offered_rps": rps,
+        "sent": sent,
+        "ok": len(latencies),
+        "throughput_rps": round(len(latencies) / max(elapsed, duration), 2),
+        "error_rate": round((sent - len(latencies)) / sent, 4) if sent else 0.0,
+        "errors": errors,
+        "latency_ms": {
+            "p50": ms(percentile(latencies, 50)),
+            "p90": ms(percentile(latencies, 90)),
+            "p95": ms(percentile(latencies, 95)),
+            "p99": ms(percentile(latencies, 99)),
+            "max": ms(latencies[-1] if latencies else None),
+        },
+        "workers": workers,
+    }
+
+
+def is_saturated(step: dict, args) -> bool:
+    p99 = step["latency_ms"]["p99"]
+    return (
+        step["throughput_rps"] < 0.9 * step["offered_rps"]
+        or step["error_rate"] > args.max_error_rate
+        or p99 is None
+        or p99 > args.slo_p99_ms
+    )
+
+
+def print_step(step: dict):
+    lat = step["latency_ms"]
+    print(
+        f"  {step['offered_rps']:>7.1f} rps offered | {step['throughput_rps']:>7.2f} rps ok | "
+        f"err {step['error_rate'] * 100:5.1f}% | p50 {lat['p50']} ms, p95 {lat['p95']} ms, "
+        f"p99 {lat['p99']} ms, max {lat['max']} ms",
+        flush=True,
+    )
+    for pid, usage in step["workers"].items():
+        print(f"      worker {pid}: cpu avg {usage['cpu_avg_percent']}% / max {usage['cpu_max_percent']}%, "
+              f"rss {usage['rss_max_mb']} MB")
+    if step["errors"]:
+        print(f"      errors: {step['errors']}")
+
+
+async def drive(args, master_pid=None) -> dict:
+    base_url = args.target or f"http://127.0.0.1:{args.port}"
+    await wait_until_healthy(base_url)
+
+    sampler = ResourceSampler(master_pid) if master_pid and os.path.isdir("/proc") else None
+    limits = httpx.Limits(max_connections=args.max_connections, max_keepalive_connections=args.max_connections)
+    steps, saturation = [], None
+
+    async with httpx.AsyncClient(timeout=args.timeout, limits=limits) as client:
+        if args.warmup:
+            print(f"🔥 Warm-up: {args.warmup} requests")
+            await asyncio.gather(*(
+                client.post(base_url + ENDPOINT, json={"candidate_id": i % args.candidates + 1, "top_n": args.top_n})
+                for i in range(args.warmup)
+            ), return_exceptions=True)
+
+        print(f"🚀 Driving {base_url}{ENDPOINT} ({'Poisson' if args.poisson else 'uniform'} arrivals, "
+              f"{args.step_seconds:.0f}s per step)")
+        for rps in args.rps:
+            step = await run_step(client, base_url, rps, args.step_seconds, args, sampler)
+            step["saturated"] = is_saturated(step, args)
+            steps.append(step)
+            print_step(step)
+            if step["saturated"]:
+                saturation = saturation or rps
+                if not args.continue_past_saturation:
+                    break
+
+    healthy = [s["offered_rps"] for s in steps if not s["saturated"]]
+    return {
+        "config": {
+            "workers": args.workers,
+            "embed_latency_ms": args.embed_latency_ms,
+            "candidates": args.candidates,
+            "top_n": args.top_n,
+            "use_cache": args.use_cache,
+            "slo_p99_ms": args.slo_p99_ms,
+        },
+        "steps": steps,
+        "max_sustained_rps": max(healthy) if healthy else None,
+        "saturated_at_rps": saturation,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rps", default="2,5,10,20,40,80",
+                        type=lambda v: [float(x) for x in v.split(",")], help="Comma-separated RPS steps")
+    parser.add_argument("--step-seconds", type=float, default=30)
+    parser.add_argument("--poisson", action="store_true", help="Exponential inter-arrival times")
+    parser.add_argument("--top-n", type=int, default=5)
+    parser.add_argument("--use-cache", action="store_true", help="Don't send force_refresh (measure cache hits too)")
+    parser.add_argument("--timeout", type=float, default=30, help="Client timeout per request")
+    parser.add_argument("--max-connections", type=int, default=1000)
+    parser.add_argument("--warmup", type=int, default=10, help="Requests sent before the first step")
+    parser.add_argument("--slo-p99-ms", type=float, default=2000, help="p99 above this marks saturation")
+    parser.add_argument("--max-error-rate", type=float, default=0.01)
+    parser.add_argument("--continue-past-saturation", action="store_true")
+    parser.add_argument("--out", help="Write the report as JSON")
+
+    stack = parser.add_argument_group("local stack (ignored with --target)")
+    stack.add_argument("--target", help="Drive an already running server instead of starting one")
+    stack.add_argument("--server-pid", type=int, help="gunicorn master PID of --target, for CPU/RSS sampling")
+    stack.add_argument("--workers", type=int, default=2)
+    stack.add_argument("--port", type=int, default=8800)
+    stack.add_argument("--embed-port", type=int, default=8790)
+    stack.add_argument("--embed-latency-ms", type=float, default=120)
+    stack.add_argument("--embed-jitter-ms", type=float, default=40)
+    stack.add_argument("--database-url", default="sqlite:////tmp/careermate_loadtest.sqlite3")
+    stack.add_argument("--index", default=DEFAULT_INDEX, help="Weaviate backup JSON for the local index")
+    stack.add_argument("--candidates", type=int, default=2000)
+    stack.add_argument("--jobs", type=int, default=0, help="Index/job count (0 = backup size)")
+    stack.add_argument("--skip-seed", action="store_true", help="Reuse the already seeded database")
+    args = parser.parse_args()
+
+    processes = [] if args.target else start_stack(args)
+    master_pid = args.server_pid if args.target else processes[-1].pid
+    try:
+        report = asyncio.run(drive(args, master_pid))
+    finally:
+        stop_stack(processes)
+
+    print(f"\n📊 Max sustained: {report['max_sustained_rps']} rps; saturated at: {report['saturated_at_rps']} rps")
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"💾 Report written to {args.out}")
+
+
+if __name__ == "__main__":
+    main()
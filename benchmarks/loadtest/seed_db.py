@@ -0,0 +1,167 @@
+"""
+Seed a load-test database with synthetic candidates, jobs and feedback
+
+Jobs mirror the local vector index (same job IDs, titles and skills as
+LocalVectorIndex builds from the Weaviate backup), so content-based results
+survive the active-job filter. Candidates get one resume with skills drawn
+from the job vocabulary, and feedback follows a skewed job popularity so the
+CF matrix looks like real traffic rather than uniform noise.
+
+Works against SQLite or PostgreSQL through DATABASE_URL. With --create-tables
+the (unmanaged) recommendation tables are created when missing, which is what
+a fresh SQLite file needs.
+
+Usage:
+    DATABASE_URL=sqlite:////tmp/loadtest.sqlite3 \\
+        python benchmarks/loadtest/seed_db.py --create-tables --candidates 2000 --jobs 500
+"""
+import argparse
+import datetime
+import os
+import random
+import sys
+
+import django
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), "..", "..")))
+os.environ.setdefault("DJANGO_SETTINGS_MODULE", "Careermate.settings")
+django.setup()
+
+from django.apps import apps  # noqa: E402
+from django.db import connection, transaction  # noqa: E402
+
+from apps.recommendation_agent.models import (  # noqa: E402
+    Account, Candidate, JobFeedback, JobPostings, RecommendationSnapshot, Recruiter, Resume, Skill,
+)
+from apps.recommendation_agent.services.local_vector_index import (  # noqa: E402
+    LOCAL_VECTOR_INDEX_PATH,
+    load_backup_objects,
+)
+
+SEEDED_MODELS = [JobFeedback, RecommendationSnapshot, Skill, Resume, Candidate, JobPostings, Recruiter, Account]
+
+ABOUT_ME = [
+    "Backend developer who enjoys building APIs and data pipelines.",
+    "Frontend engineer focused on accessible, fast web applications.",
+    "Full-stack developer with a taste for clean architecture and testing.",
+    "Data engineer working on ETL, warehousing and analytics platforms.",
+    "Mobile developer shipping cross-platform apps to production.",
+]
+
+
+def create_missing_tables():
+    """Create the recommendation tables that don't exist yet (fresh SQLite / empty PG)"""
+    existing = set(connection.introspection.table_names())
+    with connection.schema_editor() as editor:
+        for model in apps.get_app_config("recommendation_agent").get_models():
+            if model._meta.db_table not in existing:
+                editor.create_model(model)
+                print(f"  ➕ created table {model._meta.db_table}")
+
+
+def reset_tables():
+    for model in SEEDED_MODELS:
+        model.objects.all().delete()
+
+
+def _skills_of(props: dict) -> list:
+    skills = props.get("skills") or []
+    if isinstance(skills, str):
+        skills = [s.strip() for s in skills.split(",")]
+    return [str(s)[:100] for s in skills if s]
+
+
+def seed(candidates: int, jobs: int, feedback_per_candidate: int, index_path: str, seed_value: int = 42):
+    rng = random.Random(seed_value)
+    today = datetime.date.today()
+
+    objects = load_backup_objects(index_path, jobs)
+    job_props = [props for props, _ in objects]
+    vocabulary = sorted({skill for props in job_props for skill in _skills_of(props)}) or ["Python", "SQL"]
+    titles = sorted({props.get("title") or "Software Engineer" for props in job_props})
+
+    recruiter_account = Account.objects.create(account_id=1, email="recruiter@loadtest.local", password="x")
+    recruiter = Recruiter.objects.create(id=1, account=recruiter_account, company_name="Load Test Inc.")
+
+    JobPostings.objects.bulk_create([
+        JobPostings(
+            id=props["jobId"],
+            recruiter=recruiter,
+            title=(props.get("title") or f"Job {props['jobId']}")[:255],
+            description=props.get("description") or "",
+            address=(props.get("address") or "")[:255],
+            status="ACTIVE",
+            expiration_date=today + datetime.timedelta(days=30),
+            created_at=today,
+        )
+        for props in job_props
+    ], batch_size=500)
+    job_ids = [props["jobId"] for props in job_props]
+    print(f"  💼 {len(job_ids)} jobs")
+
+    Account.objects.bulk_create([
+        Account(account_id=i + 1, email=f"candidate{i}@loadtest.local", password="x", status="ACTIVE")
+        for i in range(1, candidates + 1)
+    ], batch_size=1000)
+    Candidate.objects.bulk_create([
+        Candidate(
+            candidate_id=i,
+            account_id=i + 1,
+            title=rng.choice(titles)[:255],
+            fullname=f"Candidate {i}",
+            exp_year=rng.randint(0, 12),
+        )
+        for i in range(1, candidates + 1)
+    ], batch_size=1000)
+    Resume.objects.bulk_create([
+        Resume(resume_id=i, candidate_id=i, about_me=rng.choice(ABOUT_ME))
+        for i in range(1, candidates + 1)
+    ], batch_size=1000)
+    Skill.objects.bulk_create([
+        Skill(resume_id=i, skill_name=name, skill_type="technical", year_of_experience=rng.randint(0, 8))
+        for i in range(1, candidates + 1)
+        for name in rng.sample(vocabulary, min(len(vocabulary), rng.randint(3, 8)))
+    ], batch_size=2000)
+    print(f"  👤 {candidates} candidates with resumes and skills")
+
+    # Zipf-like popularity: a few jobs collect most of the interactions
+    popularity = [1 / (rank + 1) for rank in range(len(job_ids))]
+    feedback = []
+    for candidate_id in range(1, candidates + 1):
+        picked = set(rng.choices(job_ids, weights=popularity, k=feedback_per_candidate))
+        for job_id in picked:
+            feedback.append(JobFeedback(
+                candidate_id=candidate_id,
+                job_id=job_id,
+                feedback_type=rng.choice(["apply", "like"]),
+                score=round(rng.uniform(0.5, 1.0), 3),
+            ))
+    JobFeedback.objects.bulk_create(feedback, batch_size=2000, ignore_conflicts=True)
+    print(f"  👍 {len(feedback)} feedback rows")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--candidates", type=int, default=2000)
+    parser.add_argument("--jobs", type=int, default=0, help="Jobs to create (0 = one per backup object)")
+    parser.add_argument("--feedback-per-candidate", type=int, default=8)
+    parser.add_argument("--index", default=LOCAL_VECTOR_INDEX_PATH, help="Weaviate backup JSON")
+    parser.add_argument("--create-tables", action="store_true", help="Create missing recommendation tables")
+    parser.add_argument("--reset", action="store_true", help="Delete existing rows first (never on a shared DB!)")
+    args = parser.parse_args()
+
+    print(f"🌱 Seeding {connection.vendor} database")
+    if args.create_tables:
+        create_missing_tables()
+
+    with transaction.atomic():
+        if args.reset:
+            reset_tables()
+        elif Candidate.objects.exists() or JobPostings.objects.exists():
+            sys.exit("❌ Database already has candidates/jobs; use --reset on a disposable database")
+        seed(args.candidates, args.jobs, args.feedback_per_candidate, args.index)
+    print("✅ Done")
+
+
+if __name__ == "__main__":
+    main()
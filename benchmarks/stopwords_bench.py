@@ -0,0 +1,96 @@
+"""
+Benchmark stopword filtering on the resume corpus
+
+Compares the previous per-document TfidfVectorizer.fit approach with the
+single-pass frozenset filter used by extract_text, checks that both produce
+the same output and prints per-document timings.
+
+Usage:
+    python benchmarks/stopwords_bench.py [--repeat 5] [--corpus agent_core/data/resume_dataset.txt]
+"""
+import argparse
+import json
+import os
+import re
+import statistics
+import sys
+import time
+
+from sklearn.feature_extraction.text import TfidfVectorizer
+
+REPO_ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
+sys.path.insert(0, REPO_ROOT)
+os.environ.setdefault("TESSERACT_PATH", "tesseract")
+
+from apps.cv_analysis_agent.services.extract_text import remove_stopwords  # noqa: E402
+
+DEFAULT_CORPUS = os.path.join(REPO_ROOT, "agent_core", "data", "resume_dataset.txt")
+
+_legacy_vectorizer = TfidfVectorizer(stop_words='english', lowercase=True, token_pattern=r'\b[a-zA-Z]{2,}\b')
+
+
+def legacy_remove_stopwords_tfidf(text):
+    """The previous implementation: fit a TfidfVectorizer on the single document"""
+    if not text or not text.strip():
+        return ""
+    try:
+        _legacy_vectorizer.fit([text])
+        valid_words = set(_legacy_vectorizer.get_feature_names_out())
+        words = re.findall(r'\b[a-zA-Z]{2,}\b', text.lower())
+        return ' '.join(word for word in words if word in valid_words)
+    except Exception:
+        words = re.findall(r'\b[a-zA-Z]{2,}\b', text.lower())
+        return ' '.join(words)
+
+
+def load_corpus(path):
+    """Resume texts from the JSON-lines dataset ("input" field)"""
+    texts = []
+    with open(path, encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                texts.append(json.loads(line)["input"])
+            except (ValueError, KeyError):
+                continue
+    return texts
+
+
+def time_per_doc(func, texts, repeat):
+    """Best-of-`repeat` total time, divided by the number of documents"""
+    runs = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for text in texts:
+            func(text)
+        runs.append(time.perf_counter() - start)
+    return min(runs) / len(texts), statistics.mean(runs) / len(texts)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--corpus", default=DEFAULT_CORPUS)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+
+    texts = load_corpus(args.corpus)
+    if not texts:
+        sys.exit(f"❌ No documents found in {args.corpus}")
+
+    mismatches = sum(legacy_remove_stopwords_tfidf(t) != remove_stopwords(t) for t in texts)
+    print(f"📄 {len(texts)} resumes, {sum(map(len, texts)) / len(texts):.0f} chars on average")
+    print(f"🔍 Output mismatches vs. TF-IDF version: {mismatches}")
+
+    legacy_best, legacy_mean = time_per_doc(legacy_remove_stopwords_tfidf, texts, args.repeat)
+    new_best, new_mean = time_per_doc(remove_stopwords, texts, args.repeat)
+
+    print(f"{'implementation':<28}{'best us/doc':>14}{'mean us/doc':>14}")
+    print(f"{'TfidfVectorizer.fit':<28}{legacy_best * 1e6:>14.1f}{legacy_mean * 1e6:>14.1f}")
+    print(f"{'frozenset single pass':<28}{new_best * 1e6:>14.1f}{new_mean * 1e6:>14.1f}")
+    print(f"🚀 Speedup: {legacy_best / new_best:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
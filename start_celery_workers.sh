@@ -0,0 +1,56 @@
+#!/bin/bash
+# Start one Celery worker per queue (see CELERY_QUEUES in Careermate/celery_app.py) and beat.
+#
+#   ocr      - prefork, prefetch 1 (long CPU-bound OCR); each task OCRs up to
+#              OCR_MAX_WORKERS pages in parallel, so processes x OCR_MAX_WORKERS ~ cores
+#   llm      - threads, many concurrent LLM calls, small prefetch
+#   training  - prefork, a single retrain or snapshot fan-out at a time, prefetch 1
+#   snapshots - prefork, snapshot chunks in parallel (mostly waiting on the
+#               embedding API and Weaviate), prefetch 1
+#   sync      - prefork, short periodic tasks
+#
+# Override concurrency with CELERY_<QUEUE>_CONCURRENCY. gevent can replace the
+# threads pool for the llm worker (CELERY_LLM_POOL=gevent) once gevent is installed.
+# PROMETHEUS_MULTIPROC_DIR (set in the image) lets prefork children report
+# metrics; it is emptied here on start. Set CELERY_METRICS_PORT_BASE to expose
+# each worker's metrics on its own port.
+
+set -e
+
+CPUS=$(nproc 2>/dev/null || echo 2)
+LOGLEVEL=${CELERY_LOGLEVEL:-info}
+METRICS_PORT_BASE=${CELERY_METRICS_PORT_BASE:-}
+export OCR_MAX_WORKERS=${OCR_MAX_WORKERS:-2}
+
+# Stale files from a previous run would be merged into the new metrics
+if [ -n "$PROMETHEUS_MULTIPROC_DIR" ]; then
+    rm -rf "${PROMETHEUS_MULTIPROC_DIR:?}"/*
+    mkdir -p "$PROMETHEUS_MULTIPROC_DIR"
+fi
+
+start_worker() {
+    queue=$1; pool=$2; concurrency=$3; prefetch=$4; offset=$5
+    port=""
+    if [ -n "$METRICS_PORT_BASE" ]; then
+        port=$((METRICS_PORT_BASE + offset))
+    fi
+    CELERY_METRICS_PORT=$port celery -A Careermate worker \
+        --queues "$queue" \
+        --hostname "$queue@%h" \
+        --pool "$pool" \
+        --concurrency "$concurrency" \
+        --prefetch-multiplier "$prefetch" \
+        --loglevel "$LOGLEVEL" &
+}
+
+start_worker ocr prefork "${CELERY_OCR_CONCURRENCY:-$(( (CPUS + 1) / 2 ))}" 1 0
+start_worker llm "${CELERY_LLM_POOL:-threads}" "${CELERY_LLM_CONCURRENCY:-16}" 4 1
+start_worker training prefork "${CELERY_TRAINING_CONCURRENCY:-1}" 1 2
+start_worker sync prefork "${CELERY_SYNC_CONCURRENCY:-2}" 1 3
+start_worker snapshots prefork "${CELERY_SNAPSHOTS_CONCURRENCY:-4}" 1 4
+
+celery -A Careermate beat --loglevel "$LOGLEVEL" &
+
+# Stop everything when one process exits
+wait -n 2>/dev/null || wait
+kill 0